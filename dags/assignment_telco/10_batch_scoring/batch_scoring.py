@@ -0,0 +1,216 @@
+import os
+import sys
+import time
+import sqlite3
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# --- Paths ---
+BASE_DIR = os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco")
+DB_FILE = os.path.join(BASE_DIR, "customer_db_test.sqlite")
+MLRUNS_PATH = os.path.join(BASE_DIR, "mlruns")
+SOURCE_TABLE = "processed_data"
+SCORES_TABLE = "churn_scores"
+REGISTERED_MODEL_NAME = "Churn_SVC_Model"
+
+# Rows per scoring task; each worker holds one chunk at a time, so memory stays flat
+SCORING_CHUNK_SIZE = 50_000
+SCORING_WORKERS = int(os.environ.get("TELCO_SCORING_WORKERS", str(os.cpu_count() or 1)))
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("batch_scoring")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+# The logged pipelines reference telco_common (preprocessing helpers, custom estimators)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telco_common.instrumentation import instrumented  # noqa: E402
+from telco_common import schema  # noqa: E402
+from telco_common.schema import apply_dtypes  # noqa: E402
+from telco_common.stage_cache import StageCache, fingerprint  # noqa: E402
+from telco_common.feature_engine import load_version  # noqa: E402
+
+SCORES_DDL = f"""
+CREATE TABLE IF NOT EXISTS {SCORES_TABLE} (
+    customerID TEXT NOT NULL,
+    model_version INTEGER NOT NULL,
+    churn_probability REAL,
+    scored_at TIMESTAMP,
+    PRIMARY KEY (customerID, model_version)
+)
+"""
+
+
+# -------------------------
+# Model resolution
+# -------------------------
+def latest_model_version(model_name: str = REGISTERED_MODEL_NAME) -> int:
+    """
+    Highest registered version of model_name in the local MLflow registry. The file store
+    keeps one version-<n> directory per version, so listing it avoids importing MLflow.
+    """
+    model_dir = os.path.join(MLRUNS_PATH, "models", model_name)
+    if os.path.isdir(model_dir):
+        versions = [int(name[len("version-"):]) for name in os.listdir(model_dir)
+                    if name.startswith("version-") and name[len("version-"):].isdigit()]
+        if versions:
+            return max(versions)
+
+    from mlflow.tracking import MlflowClient
+
+    client = MlflowClient(tracking_uri=f"file:{MLRUNS_PATH}")
+    versions = client.search_model_versions(f"name='{model_name}'")
+    if not versions:
+        raise RuntimeError(f"No registered versions of {model_name}. Run Model Building step first.")
+    return max(int(v.version) for v in versions)
+
+
+# -------------------------
+# Worker side
+# -------------------------
+_model = None
+
+
+def _init_worker(model_uri: str):
+    """
+    Load the registered pipeline once per worker process.
+    """
+    global _model
+    import mlflow
+    import mlflow.sklearn
+
+    mlflow.set_tracking_uri(f"file:{MLRUNS_PATH}")
+    _model = mlflow.sklearn.load_model(model_uri)
+    if not hasattr(_model, "named_steps") or "preprocess" not in _model.named_steps:
+        raise RuntimeError(f"{model_uri} has no preprocessing step; retrain it with the current model_building")
+
+
+def score_range(db_file: str, first_rowid: int, last_rowid: int):
+    """
+    Read one rowid range of processed_data and score it with a single vectorized
+    predict_proba (preprocessing included). Returns (customerIDs, churn probabilities).
+    """
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        chunk = pd.read_sql_query(
+            f"SELECT * FROM {SOURCE_TABLE} WHERE rowid BETWEEN ? AND ?", conn, params=(first_rowid, last_rowid)
+        )
+    finally:
+        conn.close()
+    if chunk.empty:
+        return np.empty(0, dtype=object), np.empty(0)
+    # Same dtypes as the frame the model was trained on
+    probabilities = _model.predict_proba(apply_dtypes(chunk))[:, 1]
+    return chunk["customerID"].to_numpy(dtype=object), probabilities
+
+
+# -------------------------
+# Driver
+# -------------------------
+def rowid_ranges(conn, chunk_size: int = SCORING_CHUNK_SIZE) -> list:
+    """
+    Split processed_data into rowid ranges of about chunk_size rows.
+    """
+    low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {SOURCE_TABLE}").fetchone()
+    if low is None:
+        return []
+    return [(start, min(start + chunk_size - 1, high)) for start in range(low, high + 1, chunk_size)]
+
+
+def write_scores(conn, customer_ids, probabilities, model_version: int, scored_at: str) -> int:
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {SCORES_TABLE} (customerID, model_version, churn_probability, scored_at) "
+        f"VALUES (?, ?, ?, ?)",
+        zip(customer_ids.tolist(), [model_version] * len(customer_ids), probabilities.tolist(),
+            [scored_at] * len(customer_ids)),
+    )
+    conn.execute("COMMIT")
+    return len(customer_ids)
+
+
+def scored_rows(db_file: str, model_version: int):
+    """
+    Rows of churn_scores for model_version (None if the table does not exist yet).
+    """
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {SCORES_TABLE} WHERE model_version = ?", (model_version,)).fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+@instrumented("batch_scoring", rows_out=lambda rows: rows)
+def run_batch_scoring(db_file: str = DB_FILE, model_version: int = None, chunk_size: int = SCORING_CHUNK_SIZE,
+                      max_workers: int = SCORING_WORKERS) -> int:
+    """
+    Score every customer in processed_data with the latest (or given) registered model version
+    and upsert the results into churn_scores keyed by (customerID, model_version).
+    Chunks are scored in a process pool with at most two chunks in flight per worker, and
+    this process is the only writer. Scoring is skipped when neither the model version nor
+    processed_data (load_version) changed since the last run. Returns the number of rows scored.
+    """
+    if not os.path.exists(db_file):
+        logger.error(f"{db_file} not found. Run Data Storage step first.")
+        print(f"{db_file} not found. Run Data Storage step first.")
+        return 0
+
+    model_version = model_version or latest_model_version()
+
+    cache = StageCache("batch_scoring")
+    source_version = load_version(db_file, SOURCE_TABLE)
+    fp = fingerprint(code=[os.path.abspath(__file__), schema.__file__],
+                     params={"model_version": model_version, "db_file": os.path.abspath(db_file)},
+                     extra=[source_version])
+    if source_version is not None and cache.hit(fp) and scored_rows(db_file, model_version) == cache.metadata().get("rows"):
+        rows = cache.metadata()["rows"]
+        print(f"{SCORES_TABLE} up to date: {rows} customers scored with {REGISTERED_MODEL_NAME} v{model_version}")
+        return rows
+
+    model_uri = f"models:/{REGISTERED_MODEL_NAME}/{model_version}"
+    scored_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(SCORES_DDL)
+    ranges = rowid_ranges(conn, chunk_size)
+
+    start = time.perf_counter()
+    total = 0
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(model_uri,)) as executor:
+            pending = set()
+            for first, last in ranges:
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        total += write_scores(conn, *future.result(), model_version, scored_at)
+                pending.add(executor.submit(score_range, db_file, first, last))
+            for future in pending:
+                total += write_scores(conn, *future.result(), model_version, scored_at)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    logger.info(f"Scored {total} customers with {model_uri} in {elapsed:.2f}s ({rate:,.0f} rows/sec) into {SCORES_TABLE}")
+    print(f"Scored {total} customers with {REGISTERED_MODEL_NAME} v{model_version} in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    if source_version is not None:
+        cache.store(fp, outputs=[db_file], metadata={"rows": scored_rows(db_file, model_version)})
+    return total
+
+
+if __name__ == "__main__":
+    run_batch_scoring()
@@ -1,8 +1,13 @@
 import sqlite3
 import pandas as pd
 import os
+import re
+import csv
 import stat
+import time
+import sys
 import logging
+from itertools import islice
 
 # Setup logging
 logger = logging.getLogger("create_sqlite_from_sql")
@@ -12,12 +17,41 @@ if not logger.handlers:
     console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
     logger.addHandler(console_handler)
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telco_common.instrumentation import instrumented  # noqa: E402
+from telco_common.stage_cache import StageCache, fingerprint  # noqa: E402
+
 # File paths
-# BASE_DIR = "/opt/airflow/logs/assignment_telco"  # Use logs directory for writable storage
-DB_FILE = "/opt/airflow/logs/assignment_telco/customer_db_test.sqlite"
-SQL_FILE = "/opt/airflow/dags/assignment_telco/1_problem_formulation/insert_data.sql"
+BASE_DIR = os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco")  # Use logs directory for writable storage
+DB_FILE = os.path.join(BASE_DIR, "customer_db_test.sqlite")
+SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "insert_data.sql")
 TABLE_NAME = "customer_data"
 
+# Load mode: "bulk" streams rows with executemany, "script" runs insert_data.sql as-is
+LOAD_MODE = os.environ.get("TELCO_DB_LOAD_MODE", "bulk")
+BULK_BATCH_SIZE = 100_000
+
+# Typed columns (the SQL dump declares everything as TEXT)
+COLUMNS = [
+    ("customerID", "TEXT"),
+    ("tenure", "INTEGER"),
+    ("MonthlyCharges", "REAL"),
+    ("TotalCharges", "REAL"),
+]
+
+# Connection settings of the staging file a bulk load writes to. They are unsafe on a crash,
+# so they never touch DB_FILE, which also holds processed_data, the feature store and scores
+BULK_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+    "PRAGMA locking_mode = EXCLUSIVE",
+]
+
+INSERT_LINE = re.compile(r"^\s*INSERT INTO \w+ VALUES \((.*)\);\s*$", re.IGNORECASE)
+
+
 def create_db_file(db_file, sql_file):
     # Connect to DB (creates file if not exists)
     conn = sqlite3.connect(db_file)
@@ -34,5 +68,183 @@ def create_db_file(db_file, sql_file):
     conn.commit()
     conn.close()
 
+
+# -------------------------
+# Bulk-load row sources
+# -------------------------
+def iter_sql_dump_rows(sql_file):
+    """
+    Stream the VALUES tuples out of an INSERT-per-row SQL dump, one line at a time.
+    Non-INSERT statements (DROP/CREATE) are skipped.
+    """
+    with open(sql_file, "r", encoding="utf-8") as f:
+        for line in f:
+            match = INSERT_LINE.match(line)
+            if match:
+                yield next(csv.reader([match.group(1)], quotechar="'", skipinitialspace=True))
+
+
+def iter_csv_rows(csv_file):
+    """
+    Stream rows from a CSV file that has (at least) the customer_data columns in its header.
+    """
+    names = [name for name, _ in COLUMNS]
+    with open(csv_file, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(name) for name in names]
+        for row in reader:
+            yield [row[i] for i in positions]
+
+
+def iter_parquet_rows(parquet_file, batch_size=BULK_BATCH_SIZE):
+    """
+    Stream rows from a Parquet file in record batches (requires pyarrow).
+    """
+    import pyarrow.parquet as pq
+
+    names = [name for name, _ in COLUMNS]
+    for batch in pq.ParquetFile(parquet_file).iter_batches(batch_size=batch_size, columns=names):
+        yield from zip(*(batch.column(name).to_pylist() for name in names))
+
+
+def iter_source_rows(source):
+    """
+    Pick a row iterator based on the source file extension (.sql, .csv, .parquet).
+    """
+    ext = os.path.splitext(source)[1].lower()
+    if ext == ".sql":
+        return iter_sql_dump_rows(source)
+    if ext == ".csv":
+        return iter_csv_rows(source)
+    if ext in (".parquet", ".pq"):
+        return iter_parquet_rows(source)
+    raise ValueError(f"Unsupported bulk-load source: {source}")
+
+
+def _to_number(value, cast):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return cast(value)
+    value = value.strip()
+    # Blank TotalCharges (new customers) are stored as NULL instead of ' '
+    return cast(value) if value else None
+
+
+def coerce_row(row):
+    customer_id, tenure, monthly, total = row
+    return (customer_id, _to_number(tenure, int), _to_number(monthly, float), _to_number(total, float))
+
+
+# -------------------------
+# Bulk loader
+# -------------------------
+def swap_in_table(db_file, staging_file, table_name=TABLE_NAME):
+    """
+    Replace table_name in db_file with the one in staging_file, in one journaled transaction:
+    readers see either the old or the new table, and a crash leaves the old one in place.
+    """
+    column_sql = ", ".join(f"{name} {col_type}" for name, col_type in COLUMNS)
+    conn = sqlite3.connect(db_file, isolation_level=None, timeout=60)
+    try:
+        conn.execute("ATTACH DATABASE ? AS staging", (staging_file,))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"DROP TABLE IF EXISTS main.{table_name}")
+            conn.execute(f"CREATE TABLE main.{table_name} ({column_sql})")
+            conn.execute(f"INSERT INTO main.{table_name} SELECT * FROM staging.{table_name}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("DETACH DATABASE staging")
+    finally:
+        conn.close()
+
+
+def bulk_load_db(db_file, source, table_name=TABLE_NAME, batch_size=BULK_BATCH_SIZE):
+    """
+    Recreate table_name with typed columns: stream rows from source (.sql dump, .csv or
+    .parquet) with executemany into a separate staging file (unjournaled, one transaction per
+    batch), then swap the table into db_file in one transaction (swap_in_table).
+    Returns the number of rows loaded.
+    """
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    staging_file = f"{db_file}.staging"
+    if os.path.exists(staging_file):
+        os.remove(staging_file)
+    try:
+        conn = sqlite3.connect(staging_file, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            for pragma in BULK_PRAGMAS:
+                cursor.execute(pragma)
+
+            column_sql = ", ".join(f"{name} {col_type}" for name, col_type in COLUMNS)
+            cursor.execute(f"CREATE TABLE {table_name} ({column_sql})")
+
+            insert_sql = f"INSERT INTO {table_name} VALUES ({', '.join('?' * len(COLUMNS))})"
+            rows = map(coerce_row, iter_source_rows(source))
+            total = 0
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                cursor.execute("BEGIN")
+                cursor.executemany(insert_sql, batch)
+                cursor.execute("COMMIT")
+                total += len(batch)
+        finally:
+            conn.close()
+
+        swap_in_table(db_file, staging_file, table_name)
+    finally:
+        if os.path.exists(staging_file):
+            os.remove(staging_file)
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    logger.info(f"Bulk-loaded {total} rows into {table_name} from {source} in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    print(f"Bulk-loaded {total} rows into {table_name} in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return total
+
+
+def table_row_count(db_file, table_name=TABLE_NAME):
+    if not os.path.exists(db_file):
+        return None
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+@instrumented("db_creation", rows_out=lambda rows: rows)
+def create_database():
+    """
+    Entry point of the db_creation stage: (re)build customer_data in LOAD_MODE.
+    Skipped when the source file, LOAD_MODE and this module are unchanged and the table
+    still holds the rows the last build loaded.
+    """
+    source = SQL_FILE if LOAD_MODE == "script" else os.environ.get("TELCO_DB_SOURCE", SQL_FILE)
+    cache = StageCache("db_creation")
+    fp = fingerprint(inputs=[source], code=[os.path.abspath(__file__)], params={"load_mode": LOAD_MODE})
+    if cache.hit(fp) and table_row_count(DB_FILE) == cache.metadata().get("rows"):
+        print(f"{TABLE_NAME} in {DB_FILE} is up to date")
+        return cache.metadata()["rows"]
+
+    if LOAD_MODE == "script":
+        create_db_file(DB_FILE, SQL_FILE)
+        rows = None
+    else:
+        rows = bulk_load_db(DB_FILE, source)
+    cache.store(fp, outputs=[DB_FILE], metadata={"rows": table_row_count(DB_FILE)})
+    return rows
+
+
 if __name__ == "__main__":
-    create_db_file(DB_FILE, SQL_FILE)
\ No newline at end of file
+    create_database()
@@ -1,7 +1,14 @@
 import os
+import sys
+import csv
+import json
+import hashlib
+import time
+import fcntl
 import sqlite3
 import pandas as pd
 import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
 # -------------------------
 # Setup logging
@@ -14,25 +21,48 @@ if not logger.handlers:
     console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
     logger.addHandler(console_handler)
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telco_common.columnar_store import (  # noqa: E402
+    STORAGE_FORMAT, zone_path, list_parts, prune_sources, write_frame, write_partition, arrow_schema_from_sqlite,
+)
+from telco_common.stage_cache import evict_stale_artifacts  # noqa: E402
+from telco_common.instrumentation import instrumented, measure  # noqa: E402
+from telco_common.schema import csv_dtypes, apply_dtypes  # noqa: E402
+
 # -------------------------
 # Writable directories (inside /opt/airflow/logs, not dags/)
 # -------------------------
-BASE_DIR = "/opt/airflow/logs/assignment_telco"
+BASE_DIR = os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco")
 RAW_DIR_CSV = os.path.join(BASE_DIR, "3_raw_data", "csv")
 RAW_DIR_DB = os.path.join(BASE_DIR, "3_raw_data", "db")
 
+WATERMARK_FILE = os.path.join(RAW_DIR_DB, "_watermarks.json")
+INGESTION_REPORT_FILE = os.path.join(BASE_DIR, "3_raw_data", "ingestion_report.json")
+
+# Sources to ingest (CSV files and SQLite tables); see ingestion_sources.json
+INGESTION_CONFIG = os.environ.get(
+    "TELCO_INGESTION_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestion_sources.json"),
+)
+
 os.makedirs(RAW_DIR_CSV, exist_ok=True)
 os.makedirs(RAW_DIR_DB, exist_ok=True)
 
+# "incremental" appends only rows past the stored high-water mark, "full" rewrites the raw zone
+SQLITE_INGESTION_MODE = os.environ.get("TELCO_SQLITE_INGESTION_MODE", "incremental")
+SQLITE_CHUNK_SIZE = 50_000
+# Rows (lowest rowids) whose checksum is part of a table's signature
+SIGNATURE_HEAD_ROWS = 100
+
 # -------------------------
 # Ingestion functions
 # -------------------------
-def ingest_csv(csv_path):
+def ingest_csv(csv_path, source=None):
     try:
-        df = pd.read_csv(csv_path)
+        # Text columns parsed straight into categories, integers narrowed to the schema's ranges
+        df = apply_dtypes(pd.read_csv(csv_path, dtype=csv_dtypes()))
 
-        raw_file = os.path.join(RAW_DIR_CSV, "latest.csv")
-        df.to_csv(raw_file, index=False)
+        raw_file = write_frame(df, zone_path(RAW_DIR_CSV), source=source)
 
         logger.info(f"CSV ingestion successful: {raw_file}")
         return df
@@ -40,40 +70,278 @@ def ingest_csv(csv_path):
         logger.error(f"CSV ingestion failed: {e}")
         return None
 
-def ingest_sqlite(sqlite_path, table_name):
+def ingest_sqlite(sqlite_path, table_name, source=None, watermark_column="rowid"):
+    """
+    Ingest a SQLite table into the raw zone (incrementally in SQLITE_INGESTION_MODE
+    "incremental"). Returns the number of rows written, or None on failure.
+    """
+    if SQLITE_INGESTION_MODE == "incremental":
+        return ingest_sqlite_incremental(sqlite_path, table_name, watermark_column=watermark_column, source=source)
+
     try:
         conn = sqlite3.connect(sqlite_path)
         query = f"SELECT * FROM {table_name};"
         df = pd.read_sql_query(query, conn)
         conn.close()
         
-        raw_file = os.path.join(RAW_DIR_DB, "latest.csv")
-        df.to_csv(raw_file, index=False)
+        raw_file = write_frame(df, zone_path(RAW_DIR_DB), source=source)
 
         logger.info(f"SQLite ingestion successful from table {table_name}: {raw_file}")
-        return df
+        return len(df)
     except Exception as e:
         logger.error(f"SQLite ingestion failed from table {table_name}: {e}")
         return None
 
 # -------------------------
-# Main ingestion pipeline
+# Incremental (watermark-based) SQLite ingestion
 # -------------------------
-def run_ingestion():
-    # These should stay in /opt/airflow/dags (mounted from your host)
-    CSV_PATH = "/opt/airflow/dags/assignment_telco/csv_data.csv"
-    SQLITE_PATH = "/opt/airflow/dags/assignment_telco/customer_db.sqlite"
-    TABLE_NAME = "customer_data"
+def load_watermarks():
+    if not os.path.exists(WATERMARK_FILE):
+        return {}
+    with open(WATERMARK_FILE, "r") as f:
+        return json.load(f)
+
+def save_watermark(key, value):
+    """
+    Persist the high-water mark for one source atomically (write to temp file, then rename).
+    An exclusive lock keeps concurrent sources from losing each other's updates.
+    """
+    with open(WATERMARK_FILE + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        watermarks = load_watermarks()
+        watermarks[key] = value
+        tmp_file = WATERMARK_FILE + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(watermarks, f, indent=2)
+        os.replace(tmp_file, WATERMARK_FILE)
+
+def table_signature(conn, table_name, watermark_column, watermark) -> dict:
+    """
+    What the rows already ingested looked like, to tell appends from a rebuilt table:
+      - PRAGMA schema_version, which changes on every DROP/CREATE (db_creation rebuilds
+        customer_data on every run, and the rebuilt table reuses the same rowids),
+      - a checksum of the SIGNATURE_HEAD_ROWS lowest-rowid rows (their rowids only with a
+        change-timestamp watermark, whose rows are expected to be updated in place),
+      - with the rowid watermark, the number of rows at or below it (catches deletes).
+    """
+    values = "rowid, *" if watermark_column == "rowid" else "rowid"
+    head = conn.execute(f"SELECT {values} FROM {table_name} ORDER BY rowid LIMIT ?", (SIGNATURE_HEAD_ROWS,)).fetchall()
+    signature = {
+        "schema_version": conn.execute("PRAGMA schema_version").fetchone()[0],
+        "head": hashlib.blake2b(repr(head).encode(), digest_size=16).hexdigest(),
+    }
+    if watermark_column == "rowid" and watermark is not None:
+        signature["rows"] = conn.execute(f"SELECT COUNT(*) FROM {table_name} WHERE rowid <= ?", (watermark,)).fetchone()[0]
+    return signature
+
+def ingest_sqlite_incremental(sqlite_path, table_name, watermark_column="rowid", chunk_size=SQLITE_CHUNK_SIZE, source=None):
+    """
+    Append only rows whose watermark_column is above the persisted high-water mark to the raw zone.
+
+    watermark_column defaults to SQLite's rowid, which only sees appended rows. Set a source's
+    "watermark_column" in ingestion_sources.json to a change-timestamp column to also pick up
+    rows updated in place (appended as new versions; data_preparation keeps the latest). With
+    the watermark, a table_signature() of the ingested rows is persisted; a rebuilt table,
+    deleted rows (rowid watermark) or a wiped raw zone force a full reload instead of
+    appending on top of stale rows. Rows are streamed through a cursor in chunk_size batches,
+    so memory stays flat and the cost scales with the delta, not the table size.
+    Returns the number of rows written, or None on failure.
+    """
+    raw_file = zone_path(RAW_DIR_DB)
+    key = f"{os.path.abspath(sqlite_path)}:{table_name}:{watermark_column}"
 
+    try:
+        # Watermarks written before signatures existed are plain values: reload once
+        state = load_watermarks().get(key)
+        watermark, signature = (state["value"], state["signature"]) if isinstance(state, dict) else (None, None)
+        conn = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+        try:
+            # One read snapshot for the signature check, the delta and the new signature
+            conn.execute("BEGIN")
+            # Table was rebuilt or rows below the watermark changed, or raw zone was wiped: start over
+            max_mark = conn.execute(f"SELECT MAX({watermark_column}) FROM {table_name}").fetchone()[0]
+            raw_missing = not list_parts(raw_file, source) if STORAGE_FORMAT == "arrow" else not os.path.exists(raw_file)
+            if watermark is not None and (raw_missing or max_mark is None or max_mark < watermark
+                                          or table_signature(conn, table_name, watermark_column, watermark) != signature):
+                logger.info(f"Watermark reset for {table_name}; running full reload")
+                watermark = None
+
+            if watermark is None:
+                cursor = conn.execute(
+                    f"SELECT {watermark_column} AS _watermark, * FROM {table_name} ORDER BY {watermark_column}"
+                )
+            else:
+                cursor = conn.execute(
+                    f"SELECT {watermark_column} AS _watermark, * FROM {table_name} "
+                    f"WHERE {watermark_column} > ? ORDER BY {watermark_column}",
+                    (watermark,),
+                )
+            columns = [d[0] for d in cursor.description][1:]
+
+            full_reload = watermark is None
+            appended = 0
+            if STORAGE_FORMAT == "arrow":
+                # One Arrow part per chunk, all with the table's declared types
+                schema = arrow_schema_from_sqlite(conn, table_name, columns)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    chunk = pd.DataFrame.from_records([row[1:] for row in rows], columns=columns)
+                    write_partition(chunk, raw_file, mode="overwrite" if full_reload and appended == 0 else "append",
+                                    schema=schema, source=source)
+                    watermark = rows[-1][0]
+                    appended += len(rows)
+                if full_reload and appended == 0:
+                    write_partition(pd.DataFrame(columns=columns), raw_file, mode="overwrite", schema=schema, source=source)
+            else:
+                with open(raw_file, "w" if full_reload else "a", newline="") as f:
+                    writer = csv.writer(f)
+                    if full_reload:
+                        writer.writerow(columns)
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        writer.writerows(row[1:] for row in rows)
+                        watermark = rows[-1][0]
+                        appended += len(rows)
+            if watermark is not None:
+                signature = table_signature(conn, table_name, watermark_column, watermark)
+        finally:
+            conn.close()
+
+        if watermark is not None:
+            save_watermark(key, {"value": watermark, "signature": signature})
+
+        logger.info(f"SQLite incremental ingestion from table {table_name}: {appended} new rows appended to {raw_file} (watermark={watermark})")
+        return appended
+    except Exception as e:
+        logger.error(f"SQLite incremental ingestion failed from table {table_name}: {e}")
+        return None
+
+# -------------------------
+# Concurrent multi-source ingestion engine
+# -------------------------
+def load_ingestion_config(config_path=INGESTION_CONFIG):
+    """
+    Read the list of sources to ingest. Each source has a unique "name", a "type" ("csv" or
+    "sqlite"), a "path" and, for SQLite, a "table" and optionally a "watermark_column"
+    (change-timestamp column for incremental ingestion; rowid by default).
+    """
+    with open(config_path, "r") as f:
+        config = json.load(f)
+
+    sources = config.get("sources", [])
+    names = [src["name"] for src in sources]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Duplicate source names in {config_path}")
+
+    if STORAGE_FORMAT != "arrow":
+        # latest.csv can only hold one source per zone
+        for kind in ("csv", "sqlite"):
+            if sum(src["type"] == kind for src in sources) > 1:
+                raise ValueError(f"Multiple {kind} sources need TELCO_STORAGE_FORMAT=arrow")
+    return config
+
+def fetch_source(source):
+    """
+    Ingest one configured source into its raw zone and return its timing and row count.
+    """
+    start = time.perf_counter()
+    if source["type"] == "csv":
+        result = ingest_csv(source["path"], source=source["name"])
+    elif source["type"] == "sqlite":
+        result = ingest_sqlite(source["path"], source["table"], source=source["name"],
+                               watermark_column=source.get("watermark_column", "rowid"))
+    else:
+        raise ValueError(f"Unknown source type: {source['type']}")
+
+    if isinstance(result, pd.DataFrame):
+        rows = len(result)
+    else:
+        rows = result
+
+    return {
+        "name": source["name"],
+        "type": source["type"],
+        "rows": rows,
+        "seconds": round(time.perf_counter() - start, 4),
+        "status": "ok" if result is not None else "failed",
+    }
+
+def ingest_sources(sources, max_workers=4, executor="thread"):
+    """
+    Fetch all sources concurrently on a bounded thread or process pool.
+    Returns the per-source results in config order.
+    """
+    pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    results = {}
+    with pool_class(max_workers=max(1, min(max_workers, len(sources)))) as pool:
+        futures = {pool.submit(fetch_source, src): src["name"] for src in sources}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Ingestion of source {name} failed: {e}")
+                results[name] = {"name": name, "rows": None, "seconds": None, "status": "failed"}
+    return [results[src["name"]] for src in sources]
+
+# -------------------------
+# Per-source ingestion (one mapped DAG task per source)
+# -------------------------
+def plan_ingestion(config_path=INGESTION_CONFIG) -> list:
+    """
+    Once-per-run setup before the sources are ingested: evict stale cache artifacts, drop raw
+    parts of sources that were removed from the config, and return the configured sources.
+    """
+    evict_stale_artifacts(BASE_DIR)
+    sources = load_ingestion_config(config_path)["sources"]
+
+    if STORAGE_FORMAT == "arrow":
+        prune_sources(RAW_DIR_CSV, [src["name"] for src in sources if src["type"] == "csv"])
+        prune_sources(RAW_DIR_DB, [src["name"] for src in sources if src["type"] == "sqlite"])
+    return sources
+
+def ingest_source(source: dict) -> dict:
+    """
+    Ingest one configured source; raises if it failed so the source's task can be retried alone.
+    """
+    with measure("data_ingestion") as m:
+        m.extra["source"] = source["name"]
+        result = fetch_source(source)
+        m.rows_out = result["rows"]
+    logger.info(f"Source {result['name']}: status={result['status']}, rows={result['rows']}, seconds={result['seconds']}")
+    if result["status"] != "ok":
+        raise RuntimeError(f"Ingestion of source {source['name']} failed")
+    return result
+
+# -------------------------
+# Main ingestion pipeline
+# -------------------------
+@instrumented("data_ingestion", rows_out=lambda results: sum(res["rows"] or 0 for res in results))
+def run_ingestion(config_path=INGESTION_CONFIG):
     logger.info("Starting data ingestion job")
-    
-    df_csv = ingest_csv(CSV_PATH)
-    df_sql = ingest_sqlite(SQLITE_PATH, TABLE_NAME)
+    config = load_ingestion_config(config_path)
+    sources = plan_ingestion(config_path)
+
+    start = time.perf_counter()
+    results = ingest_sources(sources, config.get("max_workers", 4), config.get("executor", "thread"))
+    elapsed = time.perf_counter() - start
+
+    for res in results:
+        logger.info(f"Source {res['name']}: status={res['status']}, rows={res['rows']}, seconds={res['seconds']}")
+    logger.info(f"Ingested {len(sources)} sources in {elapsed:.2f}s")
+
+    with open(INGESTION_REPORT_FILE, "w") as f:
+        json.dump({"total_seconds": round(elapsed, 4), "sources": results}, f, indent=2)
 
-    if df_csv is not None and df_sql is not None:
+    if all(res["status"] == "ok" for res in results):
         logger.info("Data ingestion completed successfully.")
     else:
         logger.warning("Data ingestion completed with errors.")
+    return results
 
 if __name__ == "__main__":
     run_ingestion()
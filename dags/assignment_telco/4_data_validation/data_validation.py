@@ -1,10 +1,12 @@
 import os
+import sys
 import pandas as pd
 import logging
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
 # --- Paths ---
-BASE_DIR = "/opt/airflow/logs/assignment_telco/"
+BASE_DIR = os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco")
 RAW_DATA_PATH = os.path.join(BASE_DIR, "3_raw_data")
 VALIDATION_REPORTS_PATH = os.path.join(BASE_DIR, "4_data_validation/validation_reports")
 os.makedirs(VALIDATION_REPORTS_PATH, exist_ok=True)
@@ -20,40 +22,67 @@ if not logger.handlers:
     console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
     logger.addHandler(console_handler)
 
-def validate_csv(file_path: str) -> str:
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telco_common.columnar_store import STORAGE_FORMAT, zone_path, iter_frames, list_parts  # noqa: E402
+from telco_common import columnar_store, streaming_stats  # noqa: E402
+from telco_common.streaming_stats import FrameStats  # noqa: E402
+from telco_common.stage_cache import StageCache, fingerprint  # noqa: E402
+from telco_common.instrumentation import instrumented, measure, step  # noqa: E402
+
+# Rows per chunk for the streaming validator
+VALIDATION_CHUNK_SIZE = 100_000
+# Source files whose changes invalidate cached validation reports
+CODE_FILES = [os.path.abspath(__file__), columnar_store.__file__, streaming_stats.__file__]
+
+def validate_csv(file_path: str, source: str = None) -> str:
     """
-    Validate a CSV file and generate a validation report.
+    Validate a raw hand-off (CSV file or Arrow zone directory) and generate a validation report.
+    With source set, only that source's parts of an Arrow zone are validated (own report and cache entry).
+
+    The file is streamed once in chunks; missing values, duplicates, data types and
+    describe()-style summary stats are accumulated with mergeable per-column statistics
+    (quantiles, unique counts and top values are approximate on high-cardinality columns).
     Returns the path of the validation report.
     """
     try:
-        df = pd.read_csv(file_path)
-
-        validation_results = {}
+        inputs = [file_path]
+        if os.path.isdir(file_path):
+            subfolder_name, file_stem = os.path.basename(os.path.normpath(file_path)), source or "latest"
+            if source:
+                inputs = list_parts(file_path, source)
+        else:
+            subfolder_name = os.path.basename(os.path.dirname(file_path))
+            file_stem = os.path.basename(file_path).split('.')[0]
+        report_file = os.path.join(
+            VALIDATION_REPORTS_PATH,
+            f"{subfolder_name}_validation_report_{file_stem}.csv"
+        )
 
-        # Missing values
-        validation_results["missing_values"] = df.isnull().sum().to_dict()
+        # Skip if neither the data nor the validator changed since the last report
+        cache = StageCache(f"data_validation_{subfolder_name}" + (f"_{source}" if source else ""))
+        fp = fingerprint(inputs=inputs, code=CODE_FILES, params={"storage_format": STORAGE_FORMAT})
+        if cache.hit(fp):
+            print(f"Validation report up to date: {report_file}")
+            return report_file
 
-        # Duplicates
-        validation_results["duplicates_count"] = int(df.duplicated().sum())
+        stats = FrameStats()
+        with step(f"validate_{subfolder_name}_{file_stem}") as m:
+            m.rows_in = 0
+            for chunk in iter_frames(file_path, chunksize=VALIDATION_CHUNK_SIZE, source=source):
+                stats.update(chunk)
+                m.rows_in += len(chunk)
 
-        # Data types
-        validation_results["data_types"] = df.dtypes.astype(str).to_dict()
+        validation_results = stats.report()
 
-        # Basic statistics (flatten into plain dict of scalars)
-        desc = df.describe(include="all").to_dict()
-        summary_stats = {}
-        for col, stats in desc.items():
-            summary_stats[col] = {k: (v.item() if hasattr(v, "item") else v) for k, v in stats.items()}
-        validation_results["summary_stats"] = summary_stats
-
-        subfolder_name = os.path.basename(os.path.dirname(file_path))
-        report_file = os.path.join(
-            VALIDATION_REPORTS_PATH,
-            f"{subfolder_name}_validation_report_{os.path.basename(file_path).split('.')[0]}.csv"
-        )
+        # Flatten into plain dict of scalars
+        for col, col_stats in validation_results["summary_stats"].items():
+            validation_results["summary_stats"][col] = {
+                k: (v.item() if hasattr(v, "item") else v) for k, v in col_stats.items()
+            }
 
         # Convert nested dicts into DataFrame
         pd.json_normalize(validation_results).to_csv(report_file, index=False)
+        cache.store(fp, outputs=[report_file])
 
         logger.info(f"Validation successful. Report saved: {report_file}")
         print(f"Validation report generated: {report_file}")
@@ -65,6 +94,21 @@ def validate_csv(file_path: str) -> str:
         print(f"Error validating {file_path}: {e}")
         return None
 
+def validate_source(source: dict) -> str:
+    """
+    Validate the raw data of one configured ingestion source (a mapped DAG task per source).
+    Raises if no report could be produced.
+    """
+    subfolder = "csv" if source["type"] == "csv" else "db"
+    file_path = zone_path(os.path.join(RAW_DATA_PATH, subfolder))
+    with measure("data_validation") as m:
+        m.extra["source"] = source["name"]
+        report_file = validate_csv(file_path, source=source["name"] if STORAGE_FORMAT == "arrow" else None)
+    if report_file is None:
+        raise RuntimeError(f"Validation failed for source {source['name']}")
+    return report_file
+
+@instrumented("data_validation")
 def run_validation():
     """
     Run validation on specified CSV files in the raw data directory.
@@ -73,19 +117,26 @@ def run_validation():
 
     # Directories to process
     SUBFOLDERS = ["csv", "db"]
-    WATCH_FILES = [os.path.join(RAW_DATA_PATH, sub, "latest.csv") for sub in SUBFOLDERS]
+    WATCH_FILES = [zone_path(os.path.join(RAW_DATA_PATH, sub)) for sub in SUBFOLDERS]
 
+    existing_files = []
     for file in WATCH_FILES:
         if os.path.exists(file):
+            existing_files.append(file)
+        else:
+            logger.warning(f"File not found: {file}")
+            print(f"File not found: {file}")
+
+    # Validate the csv and db sources in parallel, one process each
+    with ProcessPoolExecutor(max_workers=max(1, len(existing_files))) as pool:
+        futures = {file: pool.submit(validate_csv, file) for file in existing_files}
+        for file, future in futures.items():
             logger.info(f"Processing file: {file}")
             try:
-                validate_csv(file)
+                future.result()
                 logger.info(f"Validation completed for {file}")
             except Exception as e:
                 logger.error(f"Validation failed for {file}: {e}")
-        else:
-            logger.warning(f"File not found: {file}")
-            print(f"File not found: {file}")
 
 if __name__ == "__main__":
     run_validation()
\ No newline at end of file
@@ -1,4 +1,8 @@
 import os
+import sys
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import logging
@@ -6,9 +10,7 @@ import warnings
 warnings.filterwarnings('ignore')
 
 # --- Paths ---
-BASE_DIR = "/opt/airflow/logs/assignment_telco"
-RAW_CSV_PATH = os.path.join(BASE_DIR, "3_raw_data/csv/latest.csv")
-RAW_DB_PATH = os.path.join(BASE_DIR, "3_raw_data/db/latest.csv")
+BASE_DIR = os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco")
 PROCESSED_DATA_PATH = os.path.join(BASE_DIR, "5_data_preparation")
 os.makedirs(PROCESSED_DATA_PATH, exist_ok=True)
 
@@ -23,22 +25,186 @@ if not logger.handlers:
     console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
     logger.addHandler(console_handler)
 
-def process_data(csv_path, db_path, output_path):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telco_common import columnar_store, hash_partition, schema  # noqa: E402
+from telco_common.columnar_store import STORAGE_FORMAT, zone_path, read_frame, iter_frames, write_frame  # noqa: E402
+from telco_common.stage_cache import StageCache, fingerprint  # noqa: E402
+from telco_common.instrumentation import instrumented, step, current  # noqa: E402
+from telco_common.hash_partition import bucket_count, partition_frames, read_bucket, input_size  # noqa: E402
+from telco_common.schema import csv_dtypes, apply_dtypes  # noqa: E402
+
+RAW_CSV_PATH = zone_path(os.path.join(BASE_DIR, "3_raw_data/csv"))
+RAW_DB_PATH = zone_path(os.path.join(BASE_DIR, "3_raw_data/db"))
+PROCESSED_ZONE_PATH = zone_path(PROCESSED_DATA_PATH, csv_name="cleaned_processed_data.csv")
+
+# "in_memory" loads both inputs whole; "out_of_core" hash-partitions them by customerID into
+# on-disk buckets and joins/cleans one bucket pair at a time, so peak memory stays around
+# PREPARATION_MEMORY_MB (on top of the interpreter and its libraries) whatever the input size
+PREPARATION_MODE = os.environ.get("TELCO_PREPARATION_MODE", "in_memory")
+PREPARATION_MEMORY_MB = float(os.environ.get("TELCO_PREPARATION_MEMORY_MB", "512"))
+PREPARATION_WORKERS = int(os.environ.get("TELCO_PREPARATION_WORKERS", "1"))
+PARTITION_CHUNK_ROWS = 100_000
+BUCKET_DIR = os.path.join(PROCESSED_DATA_PATH, "_buckets")
+
+
+def clean_db_data(db_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Latest version of each customer with a TotalCharges value, numerics cast to numbers.
+    """
+    # Incremental ingestion appends changed rows; keep the latest version of each customer
+    db_data = db_data.drop_duplicates(subset="customerID", keep="last").reset_index(drop=True)
+
+    # Clean TotalCharges column in db_data: typed bulk loads store blanks as NULL, text
+    # hand-offs keep them as blank strings. Numeric columns are never round-tripped through str
+    total = db_data["TotalCharges"]
+    if not pd.api.types.is_numeric_dtype(total):
+        total = pd.to_numeric(total.astype("string").str.strip().replace("", pd.NA))
+    db_data["TotalCharges"] = total
+    db_data_dropped = db_data[total.notna()].reset_index(drop=True)
+
+    # Typed zones keep the source table's declared types, so cast the numerics explicitly
+    for col in ("tenure", "MonthlyCharges"):
+        db_data_dropped[col] = pd.to_numeric(db_data_dropped[col])
+    return apply_dtypes(db_data_dropped)
+
+
+# -------------------------
+# Out-of-core mode
+# -------------------------
+def join_bucket(bucket_dir, bucket, out_dir):
+    """
+    Clean and join one bucket pair (runs in a worker process with PREPARATION_WORKERS > 1).
+    All rows of a customer hash to the same bucket, in input order, so per-bucket
+    de-duplication and the inner join give the same rows as on the full data.
+    Writes the joined rows to out_dir and returns (path or None, db rows kept, joined rows).
+    """
+    import pyarrow.feather as feather
+
+    csv_data = read_bucket(os.path.join(bucket_dir, "csv"), bucket)
+    db_data = read_bucket(os.path.join(bucket_dir, "db"), bucket)
+    if csv_data.empty or db_data.empty:
+        return None, 0, 0
+
+    db_data = clean_db_data(db_data)
+    df = apply_dtypes(pd.merge(csv_data, db_data, how='inner', on='customerID'))
+    if df.empty:
+        return None, len(db_data), 0
+
+    path = os.path.join(out_dir, f"joined-{bucket:05d}.arrow")
+    feather.write_feather(df, path, compression="uncompressed")
+    return path, len(db_data), len(df)
+
+
+def iter_joined_buckets(n_buckets, bucket_dir, out_dir, workers=PREPARATION_WORKERS):
+    """
+    Yield join_bucket() results in bucket order, running up to workers buckets at a time.
+    """
+    if workers <= 1:
+        for bucket in range(n_buckets):
+            yield join_bucket(bucket_dir, bucket, out_dir)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for bucket in range(n_buckets):
+            pending.append(pool.submit(join_bucket, bucket_dir, bucket, out_dir))
+            # Keep the pool busy without queueing every bucket up front
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def process_out_of_core(csv_path, db_path):
+    """
+    Hash-partition both inputs by customerID into on-disk buckets (streamed in
+    PARTITION_CHUNK_ROWS chunks), join and clean every bucket pair and stream the joined
+    buckets to the processed zone. Returns the number of rows written.
+    """
+    import pyarrow.feather as feather
+
+    n_buckets = bucket_count(input_size(csv_path) + input_size(db_path), PREPARATION_MEMORY_MB, PREPARATION_WORKERS)
+    csv_dir, db_dir, out_dir = (os.path.join(BUCKET_DIR, name) for name in ("csv", "db", "joined"))
+    shutil.rmtree(BUCKET_DIR, ignore_errors=True)
+    os.makedirs(out_dir)
+    print(f"Out-of-core preparation: {n_buckets} buckets, {PREPARATION_WORKERS} worker(s), "
+          f"{PREPARATION_MEMORY_MB:.0f} MB memory limit")
+    logger.info(f"Out-of-core preparation: {n_buckets} buckets, {PREPARATION_WORKERS} worker(s), "
+                f"{PREPARATION_MEMORY_MB:.0f} MB memory limit")
+
+    try:
+        with step("partition") as m:
+            csv_rows = partition_frames(iter_frames(csv_path, PARTITION_CHUNK_ROWS, dtype=csv_dtypes()),
+                                        "customerID", n_buckets, csv_dir)
+            # All-text CSV hand-offs: per-chunk type inference would give buckets mixed TotalCharges types
+            db_rows = partition_frames(iter_frames(db_path, PARTITION_CHUNK_ROWS, dtype=str),
+                                       "customerID", n_buckets, db_dir)
+            m.rows_out = csv_rows + db_rows
+
+        with step("join", rows_in=csv_rows + db_rows) as m:
+            db_kept = rows = 0
+            for path, kept, joined in iter_joined_buckets(n_buckets, BUCKET_DIR, out_dir):
+                db_kept += kept
+                if path is None:
+                    continue
+                write_frame(feather.read_table(path).to_pandas(), PROCESSED_ZONE_PATH,
+                            mode="overwrite" if rows == 0 else "append")
+                os.remove(path)
+                rows += joined
+            m.rows_out = rows
+    finally:
+        shutil.rmtree(BUCKET_DIR, ignore_errors=True)
+
+    if rows == 0:
+        raise ValueError("No customers matched between the CSV and database data")
+
+    print(f"Original db_data rows: {db_rows}, after de-duplication and dropping missing TotalCharges: {db_kept}")
+    logger.info(f"Original db_data rows: {db_rows}, after de-duplication and dropping missing TotalCharges: {db_kept}")
+    return rows
+
+
+@instrumented("data_preparation", rows_out=lambda result: len(result) if isinstance(result, pd.DataFrame) else None)
+def process_data(csv_path=RAW_CSV_PATH, db_path=RAW_DB_PATH, output_path=PROCESSED_DATA_PATH):
     """
     Process and merge CSV and database data, clean TotalCharges column, and save the result.
     
     Args:
-        csv_path (str): Path to the CSV data file
-        db_path (str): Path to the database data file
+        csv_path (str): Path to the CSV data file (or Arrow raw zone directory)
+        db_path (str): Path to the database data file (or Arrow raw zone directory)
         output_path (str): Path to save the merged and cleaned data
     
     Returns:
-        pandas.DataFrame: The processed and merged DataFrame
+        pandas.DataFrame: The processed and merged DataFrame (in out_of_core mode, the
+        path of the processed zone, so the result is never loaded whole)
     """
     try:
+        # Skip if the raw inputs, the schema's dtypes, this module and its helpers, and the
+        # modes deciding the output (row order, zone format) are unchanged since the last run
+        cache = StageCache("data_preparation")
+        fp = fingerprint(
+            inputs=[csv_path, db_path, schema.SCHEMA_FILE],
+            code=[os.path.abspath(__file__), columnar_store.__file__, hash_partition.__file__, schema.__file__],
+            params={"preparation_mode": PREPARATION_MODE, "storage_format": STORAGE_FORMAT},
+        )
+        if cache.hit(fp):
+            print(f"Processed data up to date: {PROCESSED_ZONE_PATH}")
+            if PREPARATION_MODE == "out_of_core":
+                return PROCESSED_ZONE_PATH
+            return apply_dtypes(read_frame(PROCESSED_ZONE_PATH, dtype=csv_dtypes()))
+
+        if PREPARATION_MODE == "out_of_core":
+            current().rows_out = process_out_of_core(csv_path, db_path)
+            cache.store(fp, outputs=[PROCESSED_ZONE_PATH])
+            print(f"Merged and cleaned data saved to: {output_path}")
+            logger.info(f"Merged and cleaned data saved to: {output_path}")
+            return PROCESSED_ZONE_PATH
+
         # Load data
-        csv_data = pd.read_csv(csv_path)
-        db_data = pd.read_csv(db_path)
+        with step("load") as m:
+            # Low-cardinality text columns as categories, small integers narrowed (telco_common.schema)
+            csv_data = apply_dtypes(read_frame(csv_path, dtype=csv_dtypes()))
+            db_data = read_frame(db_path, dtype={"customerID": str})
+            m.rows_out = len(csv_data) + len(db_data)
 
         # Print column names
         print(f"CSV data columns: {csv_data.columns.tolist()}")
@@ -46,9 +212,9 @@ def process_data(csv_path, db_path, output_path):
         print(f"Database data columns: {db_data.columns.tolist()}")
         logger.info(f"Database data columns: {db_data.columns.tolist()}")
 
-        # Clean TotalCharges column in db_data
-        db_data["TotalCharges"] = db_data["TotalCharges"].astype(str).str.strip()
-        db_data_dropped = db_data[~db_data["TotalCharges"].isna() & (db_data["TotalCharges"] != "")].reset_index(drop=True)
+        with step("clean", rows_in=len(db_data)) as m:
+            db_data_dropped = clean_db_data(db_data)
+            m.rows_out = len(db_data_dropped)
 
         # Print shape information
         print(f"Original db_data shape: {db_data.shape}")
@@ -57,12 +223,14 @@ def process_data(csv_path, db_path, output_path):
         logger.info(f"After dropping missing TotalCharges: {db_data_dropped.shape}")
 
         # Merge datasets
-        df = pd.merge(csv_data, db_data_dropped, how='inner', on='customerID')
+        with step("merge", rows_in=len(csv_data) + len(db_data_dropped)) as m:
+            df = apply_dtypes(pd.merge(csv_data, db_data_dropped, how='inner', on='customerID'))
+            m.rows_out = len(df)
 
         # Save the merged DataFrame
-        cleaned_processed_file = os.path.join(PROCESSED_DATA_PATH, "cleaned_processed_data.csv")
-
-        df.to_csv(cleaned_processed_file, index=False)
+        with step("write", rows_in=len(df)):
+            write_frame(df, PROCESSED_ZONE_PATH)
+        cache.store(fp, outputs=[PROCESSED_ZONE_PATH])
         print(f"Merged and cleaned data saved to: {output_path}")
         logger.info(f"Merged and cleaned data saved to: {output_path}")
 
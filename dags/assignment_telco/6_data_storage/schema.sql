@@ -3,7 +3,7 @@ DROP TABLE IF EXISTS processed_data;
 CREATE TABLE processed_data (
     customerID TEXT PRIMARY KEY,
     gender TEXT,
-    SeniorCitizen INTEGER,
+    SeniorCitizen INTEGER,  -- range: 0..1
     Partner TEXT,
     Dependents TEXT,
     PhoneService TEXT,
@@ -19,7 +19,7 @@ CREATE TABLE processed_data (
     PaperlessBilling TEXT,
     PaymentMethod TEXT,
     Churn TEXT,
-    tenure INTEGER,
+    tenure INTEGER,  -- range: 0..1200
     MonthlyCharges REAL,
     TotalCharges REAL,
     
@@ -1,9 +1,19 @@
+import os
+import sys
+import queue
 import sqlite3
+import time
+import threading
+import numpy as np
 import pandas as pd
 import logging
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 
-DB_FILE = "/opt/airflow/logs/assignment_telco/customer_db_test.sqlite"
+# TELCO_FEATURE_DB points the store (and the serving API) at another SQLite file
+DB_FILE = os.environ.get("TELCO_FEATURE_DB", os.path.join(
+    os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco"), "customer_db_test.sqlite"))
 
 # Setup logging
 logger = logging.getLogger("feature_store")
@@ -14,29 +24,22 @@ if not logger.handlers:
     console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
     logger.addHandler(console_handler)
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telco_common.feature_engine import (  # noqa: E402
+    FEATURE_HISTORY_TABLE, feature_definitions, ensure_feature_metadata, read_generation,
+)
+from telco_common.feature_snapshot import FeatureSnapshot, publish_snapshot  # noqa: E402
+from telco_common.instrumentation import instrumented  # noqa: E402
+
 # ---------- Central Feature Definitions ----------
-FEATURE_DEFINITIONS = [
-    ("AvgChargesPerMonth", "Average charges per tenure month", "processed_data", "v1"),
-    ("ExtraCharges", "Difference between billed and expected charges", "processed_data", "v1"),
-    ("LifetimeValue", "Total expected value of customer", "processed_data", "v1"),
-    ("Tenure_Charges_Interaction", "Interaction between tenure and charges", "processed_data", "v1"),
-]
+# (name, description, source, version), generated from the registry in telco_common.feature_engine
+FEATURE_DEFINITIONS = feature_definitions()
 
 
 # ---------- 1. Create metadata table ----------
 def init_feature_store():
     conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS feature_metadata (
-        feature_name TEXT PRIMARY KEY,
-        description TEXT,
-        source TEXT,
-        version TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
+    ensure_feature_metadata(conn)
 
     logger.info(f"Successfully created table feature_metadata for feature store")
     print(f"Successfully created table feature_metadata for feature store")
@@ -72,38 +75,351 @@ def get_feature_metadata():
 
 # ---------- 4. Retrieve features for a customer ----------
 def get_customer_features(customer_id: str):
-    conn = sqlite3.connect(DB_FILE)
-    feature_names = [f[0] for f in FEATURE_DEFINITIONS]
-    query = f"""
-    SELECT customerID, {', '.join(feature_names)}
-    FROM processed_data
-    WHERE customerID = ?
-    """
-    df = pd.read_sql_query(query, conn, params=(customer_id,))
-    conn.close()
-    return df
+    return get_client().get_customer_features(customer_id, as_frame=True)
 
 
 # ---------- 5. Bulk retrieval ----------
+@instrumented("feature_store_bulk_lookup", rows_out=len)
 def get_bulk_features(customer_ids: list[str]):
     if not customer_ids:
         return pd.DataFrame()
+    return get_client().get_bulk_features(customer_ids, output="frame")
 
-    conn = sqlite3.connect(DB_FILE)
-    feature_names = [f[0] for f in FEATURE_DEFINITIONS]
-    placeholders = ",".join("?" * len(customer_ids))
-    query = f"""
-    SELECT customerID, {', '.join(feature_names)}
-    FROM processed_data
-    WHERE customerID IN ({placeholders})
+
+# ---------- 6. Hot-feature cache ----------
+class FeatureCache:
     """
-    df = pd.read_sql_query(query, conn, params=customer_ids)
-    conn.close()
-    return df
+    Bounded in-process cache of feature rows keyed by (customerID, feature version).
+    Entries are evicted least-recently-used once max_entries is reached and expire after
+    ttl_seconds; the whole cache is dropped when the processed_data load generation changes.
+    """
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, row = entry
+            if expires_at < now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return row
+
+    def put(self, key, row):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, row)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def set_generation(self, generation: int):
+        """
+        Drop every entry if the store has been reloaded since they were cached.
+        """
+        with self._lock:
+            if generation != self.generation:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.generation = generation
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "generation": self.generation,
+            }
+
+
+# ---------- 7. Pooled read client ----------
+class FeatureStoreClient:
+    """
+    Read path for online lookups: a pool of read-only connections whose SQL text never
+    changes, so sqlite3's per-connection statement cache keeps every query prepared.
+
+    Bulk requests are split into fixed-size IN (...) chunks (padded so the same prepared
+    statement is reused and SQLite's bound-parameter limit is never hit); very large
+    requests go through a per-connection temp table join instead.
+    """
+
+    CHUNK_SIZE = 500
+    TEMP_TABLE_THRESHOLD = 20_000
+
+    GENERATION_CHECK_INTERVAL = 1.0
+
+    def __init__(self, db_file: str = DB_FILE, pool_size: int = 4, feature_names: list = None,
+                 cache: FeatureCache = None):
+        self.db_file = db_file
+        self.feature_names = feature_names or [f[0] for f in FEATURE_DEFINITIONS]
+        self.columns = ["customerID"] + self.feature_names
+        versions = {f[0]: f[3] for f in FEATURE_DEFINITIONS}
+        self.feature_version = "|".join(f"{name}:{versions.get(name, '')}" for name in self.feature_names)
+        self.cache = cache
+        self._generation_checked_at = 0.0
+        select = f"SELECT {', '.join(self.columns)} FROM processed_data"
+        self._point_sql = f"{select} WHERE customerID = ?"
+        self._chunk_sql = f"{select} WHERE customerID IN ({','.join('?' * self.CHUNK_SIZE)})"
+        self._join_sql = (
+            f"SELECT {', '.join('p.' + c for c in self.columns)} FROM temp.lookup_ids AS t "
+            f"JOIN processed_data AS p ON p.customerID = t.customerID"
+        )
+        self._pool = queue.LifoQueue()
+        self._pool_size = pool_size
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            f"file:{self.db_file}?mode=ro", uri=True, check_same_thread=False, cached_statements=64
+        )
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_ids (customerID TEXT PRIMARY KEY)")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self._pool_size
+                if create:
+                    self._created += 1
+            conn = self._connect() if create else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
+    def _check_generation(self):
+        """
+        Re-read the processed_data load generation (at most once per GENERATION_CHECK_INTERVAL)
+        so the cache is invalidated shortly after store_data writes a new load.
+        """
+        now = time.monotonic()
+        if self.cache is None or now - self._generation_checked_at < self.GENERATION_CHECK_INTERVAL:
+            return
+        self._generation_checked_at = now
+        with self.connection() as conn:
+            self.cache.set_generation(read_generation(conn))
+
+    def get_customer_features(self, customer_id: str, as_frame: bool = False):
+        """
+        One customer's features as a (customerID, *features) tuple (None if unknown),
+        or a one-row DataFrame when as_frame is set.
+        """
+        row = None
+        if self.cache is not None:
+            self._check_generation()
+            row = self.cache.get((customer_id, self.feature_version))
+        if row is None:
+            with self.connection() as conn:
+                row = conn.execute(self._point_sql, (customer_id,)).fetchone()
+            if row is not None and self.cache is not None:
+                self.cache.put((customer_id, self.feature_version), row)
+        if as_frame:
+            return pd.DataFrame([row] if row else [], columns=self.columns)
+        return row
+
+    def fetch_rows(self, customer_ids: list) -> list:
+        """
+        (customerID, *features) tuples for the given IDs that exist (order not guaranteed).
+        """
+        ids = list(dict.fromkeys(customer_ids))
+        rows = []
+        with self.connection() as conn:
+            if len(ids) >= self.TEMP_TABLE_THRESHOLD:
+                conn.execute("DELETE FROM temp.lookup_ids")
+                conn.executemany("INSERT INTO temp.lookup_ids VALUES (?)", ((cid,) for cid in ids))
+                rows = conn.execute(self._join_sql).fetchall()
+                conn.execute("DELETE FROM temp.lookup_ids")
+                return rows
+            for start in range(0, len(ids), self.CHUNK_SIZE):
+                chunk = ids[start:start + self.CHUNK_SIZE]
+                # Pad with a repeated ID so every chunk reuses the same prepared statement
+                chunk = chunk + [chunk[-1]] * (self.CHUNK_SIZE - len(chunk))
+                rows.extend(conn.execute(self._chunk_sql, chunk).fetchall())
+        return rows
+
+    def _cached_rows(self, customer_ids: list) -> list:
+        """
+        Serve cached IDs from memory and fetch only the misses from SQLite.
+        """
+        if self.cache is None:
+            return self.fetch_rows(customer_ids)
+        self._check_generation()
+        rows, misses = [], []
+        for cid in dict.fromkeys(customer_ids):
+            row = self.cache.get((cid, self.feature_version))
+            if row is None:
+                misses.append(cid)
+            else:
+                rows.append(row)
+        if misses:
+            fetched = self.fetch_rows(misses)
+            for row in fetched:
+                self.cache.put((row[0], self.feature_version), row)
+            rows.extend(fetched)
+        return rows
+
+    def get_bulk_features(self, customer_ids: list, output: str = "tuples"):
+        """
+        Features for many customers. output is "tuples" (list of rows), "numpy"
+        (array of IDs, float64 matrix in feature_names order) or "frame" (DataFrame).
+        """
+        rows = self._cached_rows(customer_ids) if customer_ids else []
+        if output == "tuples":
+            return rows
+        if output == "numpy":
+            ids = np.array([row[0] for row in rows], dtype=object)
+            values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(self.feature_names))
+            return ids, values
+        return pd.DataFrame(rows, columns=self.columns)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> FeatureStoreClient:
+    """
+    Process-wide FeatureStoreClient, created on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = FeatureStoreClient(cache=FeatureCache(
+                    max_entries=int(os.environ.get("TELCO_FEATURE_CACHE_SIZE", "100000")),
+                    ttl_seconds=float(os.environ.get("TELCO_FEATURE_CACHE_TTL", "300")),
+                ))
+    return _client
+
+
+# ---------- 8. Memory-mapped snapshot for SQL-free lookups ----------
+def export_feature_snapshot(db_file: str = DB_FILE) -> str:
+    """
+    Publish the FEATURE_DEFINITIONS columns of processed_data as a memory-mapped snapshot
+    (data_storage does this after every load). Returns the snapshot directory.
+    """
+    return publish_snapshot(db_file, "processed_data", [f[0] for f in FEATURE_DEFINITIONS])
+
+
+_snapshot = None
+
+
+def get_snapshot() -> FeatureSnapshot:
+    """
+    Process-wide FeatureSnapshot of the latest published snapshot, opened on first use;
+    it follows newer snapshots as they are published.
+    """
+    global _snapshot
+    if _snapshot is None:
+        with _client_lock:
+            if _snapshot is None:
+                _snapshot = FeatureSnapshot(feature_names=[f[0] for f in FEATURE_DEFINITIONS])
+    return _snapshot
+
+
+# ---------- 9. Point-in-time training sets ----------
+@instrumented("feature_store_training_set", rows_out=len)
+def get_training_dataset(entity_df: pd.DataFrame, features: list = None, as_of=None,
+                         timestamp_column: str = "event_timestamp", db_file: str = DB_FILE) -> pd.DataFrame:
+    """
+    Attach to every row of entity_df (customerID plus a label/event time) the feature values
+    that were valid at that time, from feature_history. The time is entity_df[timestamp_column],
+    or as_of for every row when given. Rows without a version valid at their time get NaN.
+
+    The lookup is one as-of join (pd.merge_asof, sorted by time) instead of a query per row,
+    so millions of label rows are handled in a few seconds.
+    """
+    features = list(features or [f[0] for f in FEATURE_DEFINITIONS])
+    unknown = set(features) - {f[0] for f in FEATURE_DEFINITIONS}
+    if unknown:
+        raise ValueError(f"Unknown features: {sorted(unknown)}")
+
+    if as_of is not None:
+        timestamps = np.full(len(entity_df), pd.Timestamp(as_of).to_datetime64())
+    elif timestamp_column in entity_df.columns:
+        timestamps = pd.to_datetime(entity_df[timestamp_column]).to_numpy()
+    else:
+        raise ValueError(f"entity_df has no {timestamp_column} column and no as_of was given")
+
+    left = pd.DataFrame({
+        "customerID": entity_df["customerID"].astype(str).to_numpy(),
+        "_event_time": np.asarray(timestamps).astype("datetime64[ns]"),
+        "_row": np.arange(len(entity_df)),
+    })
+    if left["_event_time"].isna().any():
+        raise ValueError("Entity timestamps must not be missing")
+
+    # Only versions that can be valid at the latest requested time are read (valid_from index)
+    cutoff = pd.Timestamp(left["_event_time"].max()).strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        history = pd.read_sql_query(
+            f"SELECT customerID, valid_from, {', '.join(features)} FROM {FEATURE_HISTORY_TABLE} WHERE valid_from <= ?",
+            conn, params=(cutoff,),
+        )
+    finally:
+        conn.close()
+
+    history = history[history["customerID"].isin(left["customerID"].unique())]
+    history["valid_from"] = pd.to_datetime(history["valid_from"], format="%Y-%m-%d %H:%M:%S").astype("datetime64[ns]")
+
+    joined = pd.merge_asof(
+        left.sort_values("_event_time", kind="stable"),
+        history.sort_values("valid_from", kind="stable"),
+        left_on="_event_time", right_on="valid_from", by="customerID", direction="backward",
+    ).sort_values("_row")
+
+    result = entity_df.reset_index(drop=True)
+    result = result.assign(**{name: joined[name].to_numpy() for name in features},
+                           feature_valid_from=joined["valid_from"].to_numpy())
+    logger.info(f"Built point-in-time training set: {len(result)} rows, {len(features)} features")
+    return result
 
 
 # ---------- Run once to initialize ----------
-if __name__ == "__main__":
+@instrumented("feature_store")
+def run_feature_store():
+    """
+    Entry point of the feature_store stage: create/refresh feature_metadata and show a sample lookup.
+    """
     print("Initializing Feature Store...")
     logger.info(f"Initializing Feature Store...")
     init_feature_store()
@@ -117,3 +433,7 @@ if __name__ == "__main__":
     sample_customer = "7590-VHVEG"  # replace with an ID from your DB
     print(f"\n Features for customer {sample_customer}:")
     print(get_customer_features(sample_customer))
+
+
+if __name__ == "__main__":
+    run_feature_store()
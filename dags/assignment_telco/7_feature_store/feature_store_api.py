@@ -1,112 +1,221 @@
-# from fastapi import FastAPI, HTTPException, Query
-# import sqlite3
-# import pandas as pd
-# from feature_store import (
-#     init_feature_store,
-#     register_features,
-#     get_feature_metadata,
-#     FEATURE_DEFINITIONS,
-# )
-
-# # DB_FILE = "../customer_db.sqlite"
-# DB_FILE = "/opt/airflow/dags/assignment_telco/customer_db.sqlite"
-
-# app = FastAPI(title="Feature Store API", version="1.3.0")
-
-
-# # ---------- Helper: Get DB connection ----------
-# def get_connection():
-#     return sqlite3.connect(DB_FILE)
-
-
-# # ---------- Startup: Initialize metadata + generate docs ----------
-# @app.on_event("startup")
-# def startup_event():
-#     init_feature_store()
-#     register_features()
-
-#     # Generate documentation file dynamically from metadata
-#     df = get_feature_metadata()
-#     with open("feature_store.md", "w", encoding="utf-8") as f:
-#         f.write("Feature Store Metadata\n\n")
-#         f.write(df.to_markdown(index=False))
-#     print("feature_store.md generated")
-
-
-# # ---------- API: Get feature metadata ----------
-# @app.get("/metadata")
-# def get_metadata():
-#     df = get_feature_metadata()
-#     return df.to_dict(orient="records")
-
-
-# # ---------- API: Get features for a single customer ----------
-# @app.get("/features/{customer_id}")
-# def get_features(customer_id: str):
-#     conn = get_connection()
-#     feature_names = [f[0] for f in FEATURE_DEFINITIONS]  # use central list
-#     query = f"""
-#     SELECT customerID, {', '.join(feature_names)}
-#     FROM processed_data
-#     WHERE customerID = ?
-#     """
-#     df = pd.read_sql_query(query, conn, params=(customer_id,))
-#     conn.close()
-
-#     if df.empty:
-#         raise HTTPException(status_code=404, detail=f"Customer {customer_id} not found")
-
-#     return df.to_dict(orient="records")[0]
-
-
-# # ---------- API: Bulk feature retrieval (POST, JSON body) ----------
-# @app.post("/features")
-# def get_features_bulk(customer_ids: list[str]):
-#     if not customer_ids:
-#         raise HTTPException(status_code=400, detail="Customer IDs list cannot be empty")
-
-#     conn = get_connection()
-#     feature_names = [f[0] for f in FEATURE_DEFINITIONS]
-#     placeholders = ",".join("?" * len(customer_ids))
-#     query = f"""
-#     SELECT customerID, {', '.join(feature_names)}
-#     FROM processed_data
-#     WHERE customerID IN ({placeholders})
-#     """
-#     df = pd.read_sql_query(query, conn, params=customer_ids)
-#     conn.close()
-
-#     if df.empty:
-#         raise HTTPException(status_code=404, detail="No matching customers found")
-
-#     return df.to_dict(orient="records")
-
-
-# # ---------- API: Bulk feature retrieval (GET, query param) ----------
-# @app.get("/features_bulk")
-# def get_features_bulk_query(ids: str = Query(..., description="Comma-separated list of customer IDs")):
-#     customer_ids = ids.split(",")
-#     if not customer_ids:
-#         raise HTTPException(status_code=400, detail="Customer IDs list cannot be empty")
-
-#     conn = get_connection()
-#     feature_names = [f[0] for f in FEATURE_DEFINITIONS]
-#     placeholders = ",".join("?" * len(customer_ids))
-#     query = f"""
-#     SELECT customerID, {', '.join(feature_names)}
-#     FROM processed_data
-#     WHERE customerID IN ({placeholders})
-#     """
-#     df = pd.read_sql_query(query, conn, params=customer_ids)
-#     conn.close()
-
-#     if df.empty:
-#         raise HTTPException(status_code=404, detail="No matching customers found")
-
-#     return df.to_dict(orient="records")
-
-
-# # ---------- API: Health check ----------
-# @app.get("/health")
-# def health_check():
-#     return {"status": "Feature Store is running!"}
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse
+
+from feature_store import (
+    init_feature_store,
+    register_features,
+    get_feature_metadata,
+    get_client,
+    get_snapshot,
+)
+
+try:
+    # orjson serializes the feature rows several times faster than the stdlib encoder
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+    import orjson  # noqa: F401
+except ImportError:
+    DefaultResponse = JSONResponse
+
+# Setup logging
+logger = logging.getLogger("feature_store_api")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+# Generated next to this module, not in whatever directory the server was started from
+FEATURE_DOC_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_store.md")
+
+
+# ---------- Micro-batching of single-customer lookups ----------
+class MicroBatcher:
+    """
+    Coalesces concurrent single-customer lookups into one bulk query.
+
+    Requests arriving within max_wait_ms of the first pending one (or until max_batch
+    distinct IDs are pending) are fetched together with one FeatureStoreClient call that
+    runs on a worker thread, so the event loop never blocks on SQLite.
+    """
+
+    def __init__(self, fetch, max_batch: int = 256, max_wait_ms: float = 2.0):
+        self._fetch = fetch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = {}
+        self._timer = None
+        # The event loop only keeps weak references to tasks: hold in-flight batches here
+        self._tasks = set()
+        self.requests = 0
+        self.batches = 0
+
+    async def get(self, customer_id: str):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(customer_id, []).append(future)
+        self.requests += 1
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            self.batches += 1
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict):
+        try:
+            rows = await asyncio.to_thread(self._fetch, list(batch))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        found = {row[0]: row for row in rows}
+        for customer_id, futures in batch.items():
+            row = found.get(customer_id)
+            for future in futures:
+                if not future.done():
+                    future.set_result(row)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+# "sql" serves from processed_data through FeatureStoreClient, "snapshot" from the
+# memory-mapped snapshot published by data_storage (no SQL on the request path)
+FEATURE_BACKEND = os.environ.get("TELCO_FEATURE_BACKEND", "sql")
+
+
+def get_store():
+    """
+    Backend serving lookups: the FeatureStoreClient, or the memory-mapped snapshot, opened
+    on first use so the API starts before data_storage has published one (503 until then).
+    """
+    if FEATURE_BACKEND != "snapshot":
+        return app.state.client
+    if app.state.snapshot is None:
+        try:
+            app.state.snapshot = get_snapshot()
+        except FileNotFoundError:
+            raise HTTPException(status_code=503, detail="No feature snapshot published yet")
+    return app.state.snapshot
+
+
+def _to_record(store, row) -> dict:
+    return dict(zip(store.columns, row))
+
+
+# ---------- Startup: Open backends, initialize metadata + generate docs ----------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.client = get_client()
+    app.state.batcher = MicroBatcher(app.state.client.get_bulk_features)
+    app.state.snapshot = None
+    if FEATURE_BACKEND == "snapshot":
+        try:
+            get_store()
+        except HTTPException:
+            logger.warning("No feature snapshot published yet; lookups return 503 until data_storage publishes one")
+
+    await asyncio.to_thread(init_feature_store)
+    await asyncio.to_thread(register_features)
+
+    # Generate documentation file dynamically from metadata
+    df = await asyncio.to_thread(get_feature_metadata)
+    with open(FEATURE_DOC_FILE, "w", encoding="utf-8") as f:
+        f.write("Feature Store Metadata\n\n")
+        f.write(df.to_markdown(index=False))
+    logger.info(f"{FEATURE_DOC_FILE} generated")
+    yield
+    app.state.client.close()
+
+
+app = FastAPI(title="Feature Store API", version="2.0.0", lifespan=lifespan, default_response_class=DefaultResponse)
+
+
+# ---------- API: Get feature metadata ----------
+@app.get("/metadata")
+async def get_metadata():
+    df = await asyncio.to_thread(get_feature_metadata)
+    return df.to_dict(orient="records")
+
+
+# ---------- API: Get features for a single customer ----------
+@app.get("/features/{customer_id}")
+async def get_features(customer_id: str):
+    store = get_store()
+    if FEATURE_BACKEND == "snapshot":
+        # A binary search over mmapped arrays is cheaper than a hop to a worker thread
+        row = store.get_customer_features(customer_id)
+    else:
+        row = await app.state.batcher.get(customer_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Customer {customer_id} not found")
+    return _to_record(store, row)
+
+
+# ---------- API: Bulk feature retrieval (POST, JSON body) ----------
+@app.post("/features")
+async def get_features_bulk(customer_ids: list[str]):
+    if not customer_ids:
+        raise HTTPException(status_code=400, detail="Customer IDs list cannot be empty")
+
+    store = get_store()
+    rows = await asyncio.to_thread(store.get_bulk_features, customer_ids)
+    if not rows:
+        raise HTTPException(status_code=404, detail="No matching customers found")
+
+    return [_to_record(store, row) for row in rows]
+
+
+# ---------- API: Bulk feature retrieval (GET, query param) ----------
+@app.get("/features_bulk")
+async def get_features_bulk_query(ids: str = Query(..., description="Comma-separated list of customer IDs")):
+    customer_ids = [cid for cid in ids.split(",") if cid]
+    if not customer_ids:
+        raise HTTPException(status_code=400, detail="Customer IDs list cannot be empty")
+
+    store = get_store()
+    rows = await asyncio.to_thread(store.get_bulk_features, customer_ids)
+    if not rows:
+        raise HTTPException(status_code=404, detail="No matching customers found")
+
+    return [_to_record(store, row) for row in rows]
+
+
+# ---------- API: Serving stats ----------
+@app.get("/stats")
+async def get_stats():
+    return {
+        "backend": FEATURE_BACKEND,
+        "batching": app.state.batcher.stats(),
+        "cache": app.state.client.cache.stats() if app.state.client.cache is not None else None,
+    }
+
+
+# ---------- API: Health check ----------
+@app.get("/health")
+async def health_check():
+    return {"status": "Feature Store is running!"}
@@ -0,0 +1,135 @@
+"""
+Local load test for feature_store_api: starts the API in-process against a SQLite file and
+fires concurrent single-customer /features/{customer_id} requests at it.
+
+    python load_test.py --db /opt/airflow/logs/assignment_telco/customer_db_test.sqlite \
+        --requests 20000 --concurrency 200
+"""
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import urllib.request
+import multiprocessing
+import numpy as np
+
+
+def load_customer_ids(db_file: str, limit: int = 100_000) -> list:
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        return [row[0] for row in conn.execute("SELECT customerID FROM processed_data LIMIT ?", (limit,))]
+    finally:
+        conn.close()
+
+
+def serve(port: int):
+    import uvicorn
+    from feature_store_api import app
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server(port: int, timeout: float = 30.0) -> multiprocessing.Process:
+    """
+    Run the API in its own process so the load generator does not compete with it for the GIL.
+    """
+    process = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    process.start()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit(f"API did not start on port {port} within {timeout:.0f}s")
+
+
+async def fetch(reader, writer, host: str, path: str):
+    """
+    One keep-alive HTTP/1.1 GET on an open connection. A raw asyncio client keeps the load
+    generator cheap enough that it measures the server rather than itself.
+    """
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    body = await reader.readexactly(length)
+    return int(status_line.split()[1]), body
+
+
+async def run_load(host: str, port: int, customer_ids: list, requests: int, concurrency: int):
+    latencies = []
+    statuses = {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for _ in remaining:
+                customer_id = random.choice(customer_ids)
+                start = time.perf_counter()
+                status, _ = await fetch(reader, writer, host, f"/features/{customer_id}")
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, body = await fetch(reader, writer, host, "/stats")
+    writer.close()
+    return latencies, statuses, json.loads(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the feature serving API on a local SQLite file")
+    parser.add_argument("--db", default=os.environ.get("TELCO_FEATURE_DB", "/opt/airflow/logs/assignment_telco/customer_db_test.sqlite"))
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # feature_store reads the DB path at import time
+    os.environ["TELCO_FEATURE_DB"] = args.db
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    customer_ids = load_customer_ids(args.db)
+    if not customer_ids:
+        raise SystemExit(f"No rows in processed_data of {args.db}")
+
+    server = start_server(args.port)
+    try:
+        start = time.perf_counter()
+        latencies, statuses, stats = asyncio.run(
+            run_load("127.0.0.1", args.port, customer_ids, args.requests, args.concurrency)
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.join()
+
+    ms = np.array(latencies) * 1000
+    print(f"Requests:     {len(latencies)} ({args.concurrency} concurrent), status codes {statuses}")
+    print(f"Throughput:   {len(latencies) / elapsed:,.0f} requests/sec")
+    print(f"Latency p50:  {np.percentile(ms, 50):.2f} ms")
+    print(f"Latency p99:  {np.percentile(ms, 99):.2f} ms")
+    print(f"Batching:     {stats['batching']}")
+    print(f"Cache:        {stats['cache']}")
+
+
+if __name__ == "__main__":
+    main()
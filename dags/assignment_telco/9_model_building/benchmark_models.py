@@ -0,0 +1,113 @@
+"""
+Benchmark: fit time, peak memory and accuracy of the churn model estimators
+(kernel SVC with probability=True vs. the scalable nystroem_sgd and hist_gb modes)
+at increasing row counts.
+
+The encoded training matrix is built from processed_data and bootstrap-resampled (with
+jitter on the numeric columns) up to each size. SVC is skipped above --svc-max-rows,
+since its training time grows superlinearly. Resampled rows repeat across the train/test
+split, so absolute accuracy at large sizes is optimistic; compare models at the same size.
+
+Usage: python benchmark_models.py [--sizes 10000 100000 1000000] [--svc-max-rows 20000]
+"""
+import os
+import sys
+import time
+import sqlite3
+import resource
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score, log_loss
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telco_common.churn_models import MODEL_PARAMS, fit_model  # noqa: E402
+
+DB_FILE_PATH = os.path.join(os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco"), "customer_db_test.sqlite")
+NUM_COLS = ['tenure', 'MonthlyCharges', 'TotalCharges', 'AvgChargesPerMonth', 'ExtraCharges',
+            'LifetimeValue', 'Tenure_Charges_Interaction']
+
+
+def load_encoded(db_path: str):
+    """
+    processed_data one-hot encoded and standardized the way model_building encodes it.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql("SELECT * FROM processed_data", conn)
+    finally:
+        conn.close()
+    df['SeniorCitizen'] = df['SeniorCitizen'].astype(str)
+    y = (df['Churn'] == 'Yes').astype(int).to_numpy()
+    num = df[NUM_COLS].fillna(0.0).to_numpy(dtype=np.float64)
+    num = (num - num.mean(axis=0)) / num.std(axis=0)
+    cat = pd.get_dummies(df.drop(columns=NUM_COLS + ['customerID', 'Churn']), dtype=np.float64).to_numpy()
+    return np.hstack([cat, num]), y, cat.shape[1]
+
+
+def resample(X, y, n_numeric_start: int, rows: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(X), rows)
+    X_big = X[idx].copy()
+    X_big[:, n_numeric_start:] += rng.normal(0.0, 0.05, size=(rows, X.shape[1] - n_numeric_start))
+    return X_big, y[idx]
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _fit_worker(model_type, X_train, X_test, y_train, y_test, queue):
+    base_rss = _rss_bytes()
+    start = time.perf_counter()
+    model = fit_model(model_type, X_train, y_train)
+    fit_s = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    proba = model.predict_proba(X_test)[:, 1]
+    queue.put({
+        "fit_s": fit_s,
+        "peak_mb": max(peak_rss - base_rss, 0) / 1e6,
+        "accuracy": accuracy_score(y_test, (proba >= 0.5).astype(int)),
+        "log_loss": log_loss(y_test, proba),
+    })
+
+
+def benchmark(model_type, X_train, X_test, y_train, y_test) -> dict:
+    """
+    Fit in a forked child so each measurement gets its own peak-RSS counter.
+    """
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_fit_worker, args=(model_type, X_train, X_test, y_train, y_test, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_FILE_PATH)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--models", nargs="+", default=list(MODEL_PARAMS), choices=list(MODEL_PARAMS))
+    parser.add_argument("--svc-max-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    X, y, n_cat = load_encoded(args.db)
+
+    print(f"{'rows':>10} {'model':>14} {'fit (s)':>10} {'peak MB':>10} {'accuracy':>9} {'log loss':>9}")
+    for rows in args.sizes:
+        X_big, y_big = resample(X, y, n_cat, rows)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_big, y_big, test_size=0.30, random_state=40, stratify=y_big
+        )
+        for model_type in args.models:
+            if model_type == "svc" and rows > args.svc_max_rows:
+                print(f"{rows:>10,} {model_type:>14} {'skipped (> --svc-max-rows)':>41}")
+                continue
+            r = benchmark(model_type, X_train, X_test, y_train, y_test)
+            print(f"{rows:>10,} {model_type:>14} {r['fit_s']:>10.2f} {r['peak_mb']:>10.1f} "
+                  f"{r['accuracy']:>9.4f} {r['log_loss']:>9.4f}", flush=True)
@@ -1,26 +1,57 @@
 import os
+import sys
 import sqlite3
 import pandas as pd
-import mlflow
-import mlflow.sklearn
 
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.svm import SVC
+from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, accuracy_score
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telco_common.stage_cache import StageCache, fingerprint, frame_digest  # noqa: E402
+from telco_common import churn_models  # noqa: E402
+from telco_common.churn_models import (  # noqa: E402
+    MODEL_PARAMS, NON_FEATURE_COLS, build_preprocessor, categorical_columns, fit_model, sample_configs,
+    with_preprocessing,
+)
+from telco_common.tracking import Tracker  # noqa: E402
+from telco_common.instrumentation import instrumented, mlflow_metrics, step  # noqa: E402
+from telco_common.schema import read_sql_compact  # noqa: E402
+from telco_common.feature_engine import load_version  # noqa: E402
 
-BASE_DIR = "/opt/airflow/logs/assignment_telco"
+
+BASE_DIR = os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco")
 DB_FILE_PATH = os.path.join(BASE_DIR, "customer_db_test.sqlite")
 MLRUNS_PATH = os.path.join(BASE_DIR, "mlruns")
-# Ensure mlruns folder exists
-os.makedirs(MLRUNS_PATH, exist_ok=True)
+EXPERIMENT_NAME = "Churn_Prediction"
+
+# Estimator to train: "svc" (kernel SVC), "nystroem_sgd" or "hist_gb" (see telco_common.churn_models)
+MODEL_TYPE = os.environ.get("TELCO_MODEL_TYPE", "svc")
+# Registered name of the pipeline's churn model, whichever estimator produced it
+REGISTERED_MODEL_NAME = "Churn_SVC_Model"
+
+# TELCO_TUNING_TRIALS > 0 runs a successive-halving search over that many configurations
+# (one nested MLflow run per trial) and trains the winner instead of the default parameters
+TUNING_TRIALS = int(os.environ.get("TELCO_TUNING_TRIALS", "0"))
+TUNING_ETA = 3
+TUNING_VALIDATION_FRACTION = 0.2
+TUNING_WORKERS = int(os.environ.get("TELCO_TUNING_WORKERS", str(os.cpu_count() or 1)))
+
+_tracker = None
+
 
-# Set local tracking URI using MLRUNS_PATH
-mlflow.set_tracking_uri(f"file:{MLRUNS_PATH}")
+def get_tracker() -> Tracker:
+    """
+    MLflow tracker for the Churn_Prediction experiment, created on first use
+    (importing this module does not touch MLflow).
+    """
+    global _tracker
+    if _tracker is None:
+        # Ensure mlruns folder exists
+        os.makedirs(MLRUNS_PATH, exist_ok=True)
+        _tracker = Tracker(f"file:{MLRUNS_PATH}", EXPERIMENT_NAME, state_dir=os.path.join(BASE_DIR, "9_model_building"))
+    return _tracker
 
-# Create / set experiment
-mlflow.set_experiment("Churn_Prediction")
 
 # --------------------------
 # Step 1. Load Processed Data
@@ -28,7 +59,8 @@ mlflow.set_experiment("Churn_Prediction")
 def load_processed_data(db_path) -> pd.DataFrame:
     conn = sqlite3.connect(db_path)
     try:
-        df = pd.read_sql("SELECT * FROM processed_data", conn)
+        # Read in chunks cast to the schema's compact dtypes (categories, int8/int16)
+        df = read_sql_compact(conn, "SELECT * FROM processed_data")
     finally:
         conn.close()
     return df
@@ -38,87 +70,226 @@ def load_processed_data(db_path) -> pd.DataFrame:
 # Step 2. Feature Encoding
 # --------------------------
 def prepare_train_test(df: pd.DataFrame):
-    # Convert SeniorCitizen to string (so it’s categorical)
-    df['SeniorCitizen'] = df['SeniorCitizen'].astype(str)
-
+    """
+    Split processed_data and encode it with a preprocessor fitted on the training rows only.
+    Returns sparse CSR train/test matrices, the labels and the fitted preprocessor, which is
+    logged with the model so scoring can apply exactly the same encoding.
+    """
     # Encode target variable
     le = LabelEncoder()
     df['Churn'] = le.fit_transform(df['Churn'])
 
     # Split
-    X = df.drop(columns=['customerID', 'Churn'])
+    X = df.drop(columns=NON_FEATURE_COLS)
     y = df['Churn']
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.30, random_state=40, stratify=y
     )
 
-    # Categorical vs numerical split
-    num_cols = ['tenure', 'MonthlyCharges', 'TotalCharges',
-                'AvgChargesPerMonth', 'ExtraCharges',
-                'LifetimeValue', 'Tenure_Charges_Interaction']
+    # One-hot categoricals (SeniorCitizen included) + scaled numerics, fitted on train only
+    preprocessor = build_preprocessor(categorical_columns(X.columns))
+    X_train_encoded = preprocessor.fit_transform(X_train)
+    X_test_encoded = preprocessor.transform(X_test)
+
+    return X_train_encoded, X_test_encoded, y_train, y_test, preprocessor
 
-    # Train set
-    X_train_cat = pd.get_dummies(
-        X_train.drop(columns=num_cols), dtype=int
-    )
-    scaler = StandardScaler()
-    X_train_num = pd.DataFrame(
-        scaler.fit_transform(X_train[num_cols]),
-        columns=num_cols, index=X_train.index
-    )
-    X_train_encoded = pd.concat([X_train_cat, X_train_num], axis=1)
 
-    # Test set
-    X_test_cat = pd.get_dummies(
-        X_test.drop(columns=num_cols), dtype=int
+# --------------------------
+# Step 3. Train & Log Model
+# --------------------------
+def log_trained_model(run_id: str, model, preprocessor, model_type: str, params: dict, metrics: dict):
+    """
+    Log params and metrics to run_id in one batch, then write the (preprocessor + model)
+    pipeline and register it as REGISTERED_MODEL_NAME in the background; the run is finished
+    once the upload completes. Returns the upload Future.
+    """
+    tracker = get_tracker()
+    tracker.log_batch(run_id, params={"model_type": model_type, **params}, metrics=metrics)
+
+    # Log preprocessing and model as one pipeline that scores raw processed_data rows
+    return tracker.log_model_async(
+        run_id,
+        with_preprocessing(preprocessor, model) if preprocessor is not None else model,
+        artifact_path=f"{model_type}_model",
+        registered_model_name=REGISTERED_MODEL_NAME,
     )
-    # Align columns (important if categories differ between train/test)
-    X_test_cat = X_test_cat.reindex(columns=X_train_cat.columns, fill_value=0)
 
-    X_test_num = pd.DataFrame(
-        scaler.transform(X_test[num_cols]),  # use transform (not fit_transform)
-        columns=num_cols, index=X_test.index
+
+def _store_when_logged(future, cache: StageCache, fp: str, run_id: str, run_name: str, acc: float):
+    """
+    Record the stage cache entry only after the model upload succeeded.
+    """
+    def _on_done(done):
+        if done.exception() is None:
+            cache.store(
+                fp,
+                outputs=[os.path.join(MLRUNS_PATH, get_tracker().experiment_id, run_id)],
+                metadata={"run_id": run_id, "run_name": run_name, "accuracy": acc},
+            )
+    future.add_done_callback(_on_done)
+
+
+@instrumented("model_training")
+def train_and_log(X_train, X_test, y_train, y_test, preprocessor=None, model_type: str = MODEL_TYPE,
+                  params: dict = None):
+
+    params = {**MODEL_PARAMS[model_type], **(params or {})}
+
+    # Skip retraining when the encoded data, model settings and this module are unchanged
+    cache = StageCache("model_building")
+    fp = fingerprint(
+        code=[os.path.abspath(__file__), churn_models.__file__],
+        params={"model": model_type, **params},
+        extra=[frame_digest(X_train), frame_digest(X_test), frame_digest(y_train), frame_digest(y_test)],
     )
-    X_test_encoded = pd.concat([X_test_cat, X_test_num], axis=1)
+    if cache.hit(fp):
+        meta = cache.metadata()
+        print(f"Model up to date: {meta.get('run_name')} with Accuracy: {meta.get('accuracy', 0):.4f}")
+        return
+
+    # Train the selected model (calibrated separately unless it is the SVC)
+    with step("fit", rows_in=X_train.shape[0]) as fit_step:
+        model = fit_model(model_type, X_train, y_train, params)
+    with step("evaluate", rows_in=X_test.shape[0]) as evaluate_step:
+        y_pred = model.predict(X_test)
+        acc = accuracy_score(y_test, y_pred)
 
-    return X_train_encoded, X_test_encoded, y_train, y_test
+    # Track run (the model itself is written in the background)
+    tracker = get_tracker()
+    run_name = f"run_{tracker.next_run_number()}"
+    run_id = tracker.start_run(run_name)
+    future = log_trained_model(run_id, model, preprocessor, model_type, params,
+                               {"accuracy": acc, **mlflow_metrics([fit_step, evaluate_step])})
+    _store_when_logged(future, cache, fp, run_id, run_name, acc)
+
+    print("Classification Report:\n", classification_report(y_test, y_pred))
+    print(f"Logged to MLflow as {run_name} with Accuracy: {acc:.4f}")
+    return future
 
 
 # --------------------------
-# Step 3. Train & Log Model
+# Step 4. Hyperparameter Tuning
 # --------------------------
-def train_and_log(X_train, X_test, y_train, y_test):
+@instrumented("model_tuning")
+def tune_and_log(X_train, X_test, y_train, y_test, preprocessor=None, model_type: str = MODEL_TYPE,
+                 n_trials: int = TUNING_TRIALS):
+    """
+    Successive-halving search over n_trials sampled configurations, scored on a validation
+    split of the training rows (the test rows stay untouched). Every trial is a nested MLflow
+    run under one parent run, which also gets the winner refitted on all training rows.
+    """
+    cache = StageCache(f"model_tuning_{model_type}")
+    fp = fingerprint(
+        code=[os.path.abspath(__file__), churn_models.__file__],
+        params={"model": model_type, "n_trials": n_trials, "eta": TUNING_ETA, **MODEL_PARAMS[model_type]},
+        extra=[frame_digest(X_train), frame_digest(X_test), frame_digest(y_train), frame_digest(y_test)],
+    )
+    if cache.hit(fp):
+        meta = cache.metadata()
+        print(f"Tuned model up to date: {meta.get('run_name')} with Accuracy: {meta.get('accuracy', 0):.4f}")
+        return
+
+    # Process-pool search machinery is only needed in tuning mode
+    from telco_common.hyperparameter_search import successive_halving
+
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=TUNING_VALIDATION_FRACTION, random_state=40, stratify=y_train
+    )
+    configs = sample_configs(model_type, n_trials)
 
-    # Train SVC model
-    svc = SVC(probability=True, random_state=42)
-    svc.fit(X_train, y_train)
-    y_pred = svc.predict(X_test)
-    acc = accuracy_score(y_test, y_pred)
+    tracker = get_tracker()
+    run_name = f"tune_{tracker.next_run_number()}"
+    parent_run_id = tracker.start_run(run_name)
+    tracker.log_batch(parent_run_id, params={"n_trials": n_trials, "eta": TUNING_ETA})
 
-    # Track run
-    experiment = mlflow.get_experiment_by_name("Churn_Prediction")
-    runs = mlflow.search_runs(experiment_ids=[experiment.experiment_id])
-    run_number = len(runs) + 1
+    def log_trial(result):
+        trial_run_id = tracker.start_run(f"trial_{result['trial_id']}_rung_{result['rung']}",
+                                         parent_run_id=parent_run_id)
+        tracker.log_batch(trial_run_id, params=result["params"],
+                          metrics={"val_accuracy": result["val_accuracy"], "train_rows": result["n_rows"],
+                                   "fit_seconds": result["fit_seconds"], "rung": result["rung"]})
+        tracker.end_run(trial_run_id)
 
-    with mlflow.start_run(run_name=f"run_{run_number}"):
-        mlflow.log_param("kernel", "rbf")
-        mlflow.log_param("probability", True)
-        mlflow.log_metric("accuracy", acc)
+    try:
+        with step("search", rows_in=X_fit.shape[0]) as search_step:
+            best = successive_halving(
+                model_type, configs, X_fit, y_fit, X_val, y_val,
+                data_dir=os.path.join(BASE_DIR, "9_model_building", f"_search_{parent_run_id}"),
+                eta=TUNING_ETA, max_workers=TUNING_WORKERS, on_result=log_trial,
+            )
+        search_seconds = search_step.wall_seconds
+        print(f"Search finished in {search_seconds:.1f}s, best trial {best['trial_id']}: "
+              f"val_accuracy {best['val_accuracy']:.4f} with {best['params']}")
+
+        params = {**MODEL_PARAMS[model_type], **best["params"]}
+        with step("fit", rows_in=X_train.shape[0]) as fit_step:
+            model = fit_model(model_type, X_train, y_train, params)
+        with step("evaluate", rows_in=X_test.shape[0]) as evaluate_step:
+            y_pred = model.predict(X_test)
+            acc = accuracy_score(y_test, y_pred)
+    except Exception:
+        tracker.end_run(parent_run_id, "FAILED")
+        raise
 
-        mlflow.sklearn.log_model(
-            sk_model=svc,
-            artifact_path="svc_model",
-            registered_model_name="Churn_SVC_Model"
-        )
+    future = log_trained_model(parent_run_id, model, preprocessor, model_type, params, {
+        "accuracy": acc, "best_val_accuracy": best["val_accuracy"], "search_seconds": search_seconds,
+        **mlflow_metrics([search_step, fit_step, evaluate_step]),
+    })
+    _store_when_logged(future, cache, fp, parent_run_id, run_name, acc)
 
-        print("Classification Report:\n", classification_report(y_test, y_pred))
-        print(f"Logged to MLflow as run_{run_number} with Accuracy: {acc:.4f}")
+    print("Classification Report:\n", classification_report(y_test, y_pred))
+    print(f"Logged to MLflow as {run_name} with Accuracy: {acc:.4f}")
+    return future
 
 
 # --------------------------
-# Step 4. Run Script
+# Step 5. Run Script
 # --------------------------
+@instrumented("model_building")
+def run_model_building(df: pd.DataFrame = None):
+    """
+    Entry point of the model_building stage. df is processed_data when data_storage ran in the
+    same process (it is read from the database otherwise). Returns once the model is registered.
+    Nothing is loaded or encoded when processed_data, the model settings and the code are
+    unchanged since the last logged model (keyed on load_version, not on the table's content).
+    """
+    source_cache = StageCache("model_building_source")
+    source_version = load_version(DB_FILE_PATH)
+    source_fp = fingerprint(
+        code=[os.path.abspath(__file__), churn_models.__file__],
+        params={"model": MODEL_TYPE, **MODEL_PARAMS[MODEL_TYPE], "tuning_trials": TUNING_TRIALS, "eta": TUNING_ETA},
+        extra=[source_version],
+    )
+    if source_version is not None and source_cache.hit(source_fp):
+        meta = source_cache.metadata()
+        print(f"Model up to date with processed_data: {meta.get('run_name')} with Accuracy: {meta.get('accuracy', 0):.4f}")
+        return
+
+    if df is None:
+        with step("load") as m:
+            df = load_processed_data(DB_FILE_PATH)
+            m.rows_out = len(df)
+    with step("encode", rows_in=len(df)):
+        X_train, X_test, y_train, y_test, preprocessor = prepare_train_test(df.copy())
+    if TUNING_TRIALS > 0:
+        future = tune_and_log(X_train, X_test, y_train, y_test, preprocessor)
+    else:
+        future = train_and_log(X_train, X_test, y_train, y_test, preprocessor)
+    model_cache = StageCache(f"model_tuning_{MODEL_TYPE}" if TUNING_TRIALS > 0 else "model_building")
+
+    def remember_source(done=None):
+        # Runs after _store_when_logged's callback (callbacks run in registration order)
+        if source_version is not None and (done is None or done.exception() is None):
+            source_cache.store(source_fp, outputs=model_cache.outputs(), metadata=model_cache.metadata())
+
+    # Block until the background model upload and registration are done (a cache hit logs
+    # nothing and returns None, so MLflow is not even imported)
+    if future is None:
+        remember_source()
+    else:
+        future.add_done_callback(remember_source)
+        get_tracker().wait()
+
+
 if __name__ == "__main__":
-    df = load_processed_data(DB_FILE_PATH)
-    X_train, X_test, y_train, y_test = prepare_train_test(df)
-    train_and_log(X_train, X_test, y_train, y_test)
+    run_model_building()
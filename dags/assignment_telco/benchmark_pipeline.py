@@ -0,0 +1,143 @@
+"""
+Scale benchmark: run every pipeline stage on synthetic datasets of increasing size and
+compare wall time and peak memory per stage against a stored baseline.
+
+For each size a deterministic dataset is generated (telco_common.synthetic_data, reused
+across runs) and the whole pipeline runs once in a fresh interpreter against its own
+TELCO_BASE_DIR, with the stage cache off. Stage metrics come from the instrumentation
+JSONL of that run. A stage regresses when its wall time or peak RSS exceeds the baseline
+by more than --tolerance (wall-time differences under --min-seconds are ignored as noise);
+the script then exits with status 1.
+
+Baselines are machine-specific: refresh them with --update-baseline on the machine that
+runs the comparison.
+
+Usage: python benchmark_pipeline.py [--sizes 100k 1m 10m] [--update-baseline]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PIPELINE_DIR)
+from telco_common.pipeline import STAGES  # noqa: E402
+from telco_common.synthetic_data import ensure_dataset, parse_size  # noqa: E402
+
+BASELINE_FILE = os.path.join(PIPELINE_DIR, "benchmark_baseline.json")
+WORK_DIR = os.path.join(os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco"), "_benchmark")
+
+RUN_PIPELINE = f"""
+import sys
+sys.path.insert(0, {PIPELINE_DIR!r})
+from telco_common.pipeline import run_pipeline
+run_pipeline()
+"""
+
+
+def run_size(size: str, work_dir: str, model_type: str) -> dict:
+    """
+    Run the pipeline on one synthetic dataset and return {stage: metrics} of its top-level stages.
+    """
+    rows = parse_size(size)
+    data_dir = os.path.join(work_dir, "data", size)
+    ensure_dataset(data_dir, rows, sql_dump=True)
+
+    run_dir = os.path.join(work_dir, "runs", size)
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(run_dir)
+    metrics_file = os.path.join(run_dir, "stage_metrics.jsonl")
+    env = {
+        **os.environ,
+        "TELCO_BASE_DIR": run_dir,
+        "TELCO_INGESTION_CONFIG": os.path.join(data_dir, "ingestion_sources.json"),
+        "TELCO_DB_SOURCE": os.path.join(data_dir, "insert_data.sql"),
+        "TELCO_METRICS_FILE": metrics_file,
+        "TELCO_STAGE_CACHE": "off",
+        "TELCO_MODEL_TYPE": model_type,
+    }
+    env.pop("TELCO_FEATURE_DB", None)
+
+    start = time.perf_counter()
+    with open(os.path.join(run_dir, "pipeline.log"), "w") as log:
+        subprocess.run([sys.executable, "-c", RUN_PIPELINE], env=env, cwd=run_dir,
+                       stdout=log, stderr=subprocess.STDOUT, check=True)
+    print(f"{size}: pipeline finished in {time.perf_counter() - start:.1f}s (log: {run_dir}/pipeline.log)")
+
+    results = {}
+    with open(metrics_file) as f:
+        for line in f:
+            record = json.loads(line)
+            if record["step"] is None and record["stage"] in STAGES:
+                results[record["stage"]] = {
+                    "wall_seconds": record["wall_seconds"],
+                    "peak_rss_mb": record["peak_rss_mb"],
+                    "rows_per_sec": record["rows_per_sec"],
+                }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_seconds: float) -> list:
+    """
+    (size, stage, metric, baseline, current) for every metric that regressed.
+    """
+    regressions = []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if not base:
+                continue
+            if (current["wall_seconds"] > base["wall_seconds"] * (1 + tolerance)
+                    and current["wall_seconds"] - base["wall_seconds"] > min_seconds):
+                regressions.append((size, stage, "wall_seconds", base["wall_seconds"], current["wall_seconds"]))
+            if current["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+                regressions.append((size, stage, "peak_rss_mb", base["peak_rss_mb"], current["peak_rss_mb"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["100k", "1m"])
+    parser.add_argument("--work-dir", default=WORK_DIR)
+    parser.add_argument("--model-type", default="hist_gb", help="SVC does not scale past a few 10K rows")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-seconds", type=float, default=2.0)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = {size: run_size(size, args.work_dir, args.model_type) for size in args.sizes}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+
+    print(f"\n{'size':>6} {'stage':>16} {'wall (s)':>9} {'baseline':>9} {'peak MB':>8} {'baseline':>9} {'rows/sec':>11}")
+    for size, stages in results.items():
+        for stage, m in stages.items():
+            base = baseline.get(size, {}).get(stage, {})
+            rate = f"{m['rows_per_sec']:,.0f}" if m["rows_per_sec"] else "-"
+            print(f"{size:>6} {stage:>16} {m['wall_seconds']:>9.2f} {base.get('wall_seconds', float('nan')):>9.2f} "
+                  f"{m['peak_rss_mb']:>8.0f} {base.get('peak_rss_mb', float('nan')):>9.0f} {rate:>11}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "machine": {"platform": platform.platform(), "cpus": os.cpu_count(), "python": platform.python_version()},
+                "model_type": args.model_type,
+                "results": {**baseline, **results},
+            }, f, indent=2)
+        print(f"\nBaseline updated: {args.baseline}")
+        sys.exit(0)
+
+    regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+    for size, stage, metric, base, current in regressions:
+        print(f"REGRESSION {size} {stage} {metric}: {base} -> {current}")
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one.")
+    sys.exit(1 if regressions else 0)
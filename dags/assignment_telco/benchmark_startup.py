@@ -0,0 +1,60 @@
+"""
+Benchmark: per-stage startup cost of the pipeline, one interpreter per stage (the old
+BashOperator tasks) vs. importing every stage in a single interpreter (the single-process
+fast path). Only interpreter startup and module imports are timed; no stage is run.
+
+Usage: python benchmark_startup.py [--repeat 3]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PIPELINE_DIR)
+from telco_common.pipeline import STAGES  # noqa: E402
+
+IMPORT_STAGES = f"""
+import sys, time, json
+sys.path.insert(0, {PIPELINE_DIR!r})
+from telco_common.pipeline import load_stage
+timings = {{}}
+for stage in sys.argv[1:]:
+    start = time.perf_counter()
+    load_stage(stage)
+    timings[stage] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def cold_start(stages: list) -> float:
+    """
+    Wall time of a fresh interpreter that imports the given stages and exits.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", IMPORT_STAGES, *stages], check=True, capture_output=True, cwd="/tmp")
+    return time.perf_counter() - start
+
+
+def in_process_imports(stages: list) -> dict:
+    out = subprocess.run([sys.executable, "-c", IMPORT_STAGES, *stages], check=True, capture_output=True,
+                         text=True, cwd="/tmp").stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    stages = list(STAGES)
+    per_stage = {stage: min(cold_start([stage]) for _ in range(args.repeat)) for stage in stages}
+    single = min(cold_start(stages) for _ in range(args.repeat))
+    incremental = in_process_imports(stages)
+
+    print(f"{'stage':>16} {'own process (s)':>16} {'shared process (s)':>19}")
+    for stage in stages:
+        print(f"{stage:>16} {per_stage[stage]:>16.2f} {incremental[stage]:>19.2f}")
+    print(f"{'total':>16} {sum(per_stage.values()):>16.2f} {single:>19.2f}")
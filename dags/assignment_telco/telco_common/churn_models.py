@@ -0,0 +1,230 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler, FunctionTransformer
+from sklearn.utils import check_array
+from sklearn.svm import SVC
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import SGDClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.frozen import FrozenEstimator
+from sklearn.model_selection import train_test_split
+
+# -------------------------
+# Preprocessing
+# -------------------------
+NUM_COLS = ['tenure', 'MonthlyCharges', 'TotalCharges',
+            'AvgChargesPerMonth', 'ExtraCharges',
+            'LifetimeValue', 'Tenure_Charges_Interaction']
+# Columns of processed_data that are neither features nor categorical inputs
+NON_FEATURE_COLS = ['customerID', 'Churn']
+
+
+def categorical_columns(columns) -> list:
+    return [col for col in columns if col not in NUM_COLS and col not in NON_FEATURE_COLS]
+
+
+def build_preprocessor(categorical_cols: list) -> ColumnTransformer:
+    """
+    Encoding shared by training and scoring: sparse one-hot categoricals (categories are
+    learned at fit time, unseen ones encode as all-zero) plus standardized numerics.
+    The output is a CSR matrix.
+    """
+    return ColumnTransformer(
+        [
+            ("categorical", OneHotEncoder(handle_unknown="ignore", sparse_output=True, dtype=np.float64),
+             categorical_cols),
+            ("numeric", make_pipeline(SimpleImputer(strategy="median"), StandardScaler()), NUM_COLS),
+        ],
+        sparse_threshold=1.0,
+    )
+
+
+def to_dense(X):
+    return X.toarray() if sp.issparse(X) else X
+
+
+def with_preprocessing(preprocessor, model) -> Pipeline:
+    """
+    The fitted preprocessor and model as one pipeline that scores raw processed_data rows.
+    """
+    return Pipeline([("preprocess", preprocessor), ("model", model)])
+
+
+# -------------------------
+# Estimators
+# -------------------------
+# Estimators selectable for the churn model (TELCO_MODEL_TYPE):
+#   svc           - kernel SVC with built-in Platt scaling (5-fold CV inside fit, ~6 fits)
+#   nystroem_sgd  - RBF kernel approximated with Nystroem features + linear SGD, O(n) training
+#                   in fixed-size batches
+#   hist_gb       - histogram gradient boosting, O(n) training, native probabilities
+MODEL_PARAMS = {
+    "svc": {"kernel": "rbf", "C": 1.0, "gamma": "scale", "probability": True, "random_state": 42},
+    "nystroem_sgd": {
+        "gamma": None, "n_components": 300, "loss": "hinge", "alpha": 1e-4,
+        "epochs": 5, "batch_size": 50_000, "calibration": "sigmoid", "random_state": 42,
+    },
+    "hist_gb": {
+        "max_iter": 200, "learning_rate": 0.1, "max_leaf_nodes": 31, "min_samples_leaf": 20,
+        "l2_regularization": 0.0, "early_stopping": True, "calibration": None, "random_state": 42,
+    },
+}
+
+# Share of the training rows held out to fit the calibrator
+CALIBRATION_FRACTION = 0.1
+
+
+def rbf_gamma(X) -> float:
+    """
+    gamma="scale" as SVC computes it: 1 / (n_features * X.var()).
+    """
+    if sp.issparse(X):
+        variance = X.multiply(X).mean() - X.mean() ** 2
+    else:
+        variance = np.asarray(X, dtype=np.float64).var()
+    return 1.0 / (X.shape[1] * variance) if variance > 0 else 1.0
+
+
+class NystroemSGDClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Approximate RBF-kernel classifier: Nystroem feature map followed by a linear SGD model.
+    The kernel features are produced one batch at a time (partial_fit over shuffled batches),
+    so memory is O(batch_size * n_components) instead of O(n_rows * n_components).
+    """
+
+    def __init__(self, gamma=None, n_components=300, loss="hinge", alpha=1e-4, epochs=5,
+                 batch_size=50_000, random_state=None):
+        self.gamma = gamma
+        self.n_components = n_components
+        self.loss = loss
+        self.alpha = alpha
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        X = check_array(X, accept_sparse="csr", dtype=np.float64)
+        y = np.asarray(y)
+        rng = np.random.default_rng(self.random_state)
+        gamma = self.gamma or rbf_gamma(X)
+        self.nystroem_ = Nystroem(kernel="rbf", gamma=gamma, n_components=min(self.n_components, X.shape[0]),
+                                  random_state=self.random_state).fit(X)
+        self.classes_ = np.unique(y)
+        self.sgd_ = SGDClassifier(loss=self.loss, alpha=self.alpha, random_state=self.random_state)
+        for _ in range(self.epochs):
+            order = rng.permutation(X.shape[0])
+            for start in range(0, X.shape[0], self.batch_size):
+                batch = order[start:start + self.batch_size]
+                self.sgd_.partial_fit(self.nystroem_.transform(X[batch]), y[batch], classes=self.classes_)
+        return self
+
+    def decision_function(self, X):
+        X = check_array(X, accept_sparse="csr", dtype=np.float64)
+        return np.concatenate([
+            self.sgd_.decision_function(self.nystroem_.transform(X[start:start + self.batch_size]))
+            for start in range(0, X.shape[0], self.batch_size)
+        ]) if X.shape[0] else np.empty(0)
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+def build_estimator(model_type: str, params: dict = None):
+    """
+    Unfitted estimator for model_type with MODEL_PARAMS (overridden by params).
+    """
+    if model_type not in MODEL_PARAMS:
+        raise ValueError(f"Unknown model type {model_type!r}, expected one of {sorted(MODEL_PARAMS)}")
+    p = {**MODEL_PARAMS[model_type], **(params or {})}
+
+    if model_type == "svc":
+        return SVC(kernel=p["kernel"], C=p["C"], gamma=p["gamma"], probability=p["probability"],
+                   random_state=p["random_state"])
+    if model_type == "nystroem_sgd":
+        return NystroemSGDClassifier(
+            gamma=p.get("gamma"), n_components=p["n_components"], loss=p["loss"], alpha=p["alpha"],
+            epochs=p["epochs"], batch_size=p["batch_size"], random_state=p["random_state"],
+        )
+    # Histogram boosting needs dense input; the ~45 one-hot/numeric columns are densified per call
+    return make_pipeline(
+        FunctionTransformer(to_dense, accept_sparse=True),
+        HistGradientBoostingClassifier(
+            max_iter=p["max_iter"], learning_rate=p["learning_rate"], max_leaf_nodes=p["max_leaf_nodes"],
+            min_samples_leaf=p["min_samples_leaf"], l2_regularization=p["l2_regularization"],
+            early_stopping=p["early_stopping"], random_state=p["random_state"],
+        ),
+    )
+
+
+def fit_model(model_type: str, X_train, y_train, params: dict = None):
+    """
+    Fit the selected estimator. When its params ask for calibration, a stratified
+    CALIBRATION_FRACTION of the training rows is held out and a sigmoid/isotonic calibrator
+    is fitted on the frozen model's scores: one extra cheap fit instead of SVC's 5-fold CV.
+    """
+    p = {**MODEL_PARAMS.get(model_type, {}), **(params or {})}
+    method = p.get("calibration")
+    if not method:
+        return build_estimator(model_type, params).fit(X_train, y_train)
+
+    X_fit, X_cal, y_fit, y_cal = train_test_split(
+        X_train, y_train, test_size=CALIBRATION_FRACTION, random_state=p.get("random_state"), stratify=y_train
+    )
+    model = build_estimator(model_type, params).fit(X_fit, y_fit)
+    return CalibratedClassifierCV(FrozenEstimator(model), method=method).fit(X_cal, y_cal)
+
+
+# -------------------------
+# Hyperparameter search spaces
+# -------------------------
+# name -> ("log", low, high) | ("int", low, high) | ("choice", [values])
+SEARCH_SPACES = {
+    "svc": {
+        "C": ("log", 0.1, 100.0),
+        "gamma": ("log", 1e-3, 1.0),
+    },
+    "nystroem_sgd": {
+        "alpha": ("log", 1e-6, 1e-2),
+        "n_components": ("choice", [100, 200, 300, 500]),
+        "loss": ("choice", ["hinge", "log_loss", "modified_huber"]),
+        "gamma": ("log", 1e-3, 1.0),
+    },
+    "hist_gb": {
+        "learning_rate": ("log", 0.01, 0.3),
+        "max_leaf_nodes": ("int", 8, 128),
+        "min_samples_leaf": ("int", 5, 100),
+        "l2_regularization": ("log", 1e-4, 10.0),
+        "max_iter": ("int", 50, 500),
+    },
+}
+
+# Search trials only rank configurations: skip probability calibration, which the final refit adds
+TRIAL_OVERRIDES = {
+    "svc": {"probability": False},
+    "nystroem_sgd": {"calibration": None},
+    "hist_gb": {"calibration": None},
+}
+
+
+def sample_configs(model_type: str, n: int, seed: int = 42) -> list:
+    """
+    n random parameter sets from SEARCH_SPACES[model_type] (log-uniform for "log" ranges).
+    """
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n):
+        config = {}
+        for name, spec in SEARCH_SPACES[model_type].items():
+            if spec[0] == "log":
+                config[name] = float(np.exp(rng.uniform(np.log(spec[1]), np.log(spec[2]))))
+            elif spec[0] == "int":
+                config[name] = int(rng.integers(spec[1], spec[2] + 1))
+            else:
+                config[name] = spec[1][rng.integers(len(spec[1]))]
+        configs.append(config)
+    return configs
@@ -0,0 +1,217 @@
+import os
+import glob
+import shutil
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("columnar_store")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+# "arrow" stores raw/processed zones as Arrow IPC (Feather v2) files, "csv" keeps latest.csv hand-offs
+STORAGE_FORMAT = os.environ.get("TELCO_STORAGE_FORMAT", "arrow")
+PART_PATTERN = "part-*.arrow"
+
+
+def zone_path(zone_dir: str, csv_name: str = "latest.csv") -> str:
+    """
+    Location a stage should read/write for a zone: the zone directory in arrow mode,
+    the legacy CSV file inside it in csv mode.
+    """
+    if STORAGE_FORMAT == "arrow":
+        return zone_dir
+    return os.path.join(zone_dir, csv_name)
+
+
+def partition_dir(zone_dir: str, ingest_date: str = None) -> str:
+    ingest_date = ingest_date or os.environ.get("TELCO_INGEST_DATE") or datetime.now().strftime("%Y-%m-%d")
+    return os.path.join(zone_dir, f"ingest_date={ingest_date}")
+
+
+def _part_pattern(source: str = None) -> str:
+    return f"part-{source}-*.arrow" if source else PART_PATTERN
+
+
+def list_parts(zone_dir: str, source: str = None) -> list:
+    """
+    All part files of a zone (or of one source within it), ordered by ingestion date and then write order.
+    """
+    parts = sorted(glob.glob(os.path.join(zone_dir, "ingest_date=*", _part_pattern(source))))
+    if source:
+        # "part-db-*" would also match a source called "db-east"
+        parts = [part for part in parts if part_source(part) == source]
+    return parts
+
+
+def part_source(part_file: str):
+    """
+    Source name encoded in a part file name (part-<source>-NNNNN.arrow), or None for unnamed parts.
+    """
+    stem = os.path.basename(part_file)[len("part-"):-len(".arrow")]
+    return stem.rsplit("-", 1)[0] if "-" in stem else None
+
+
+def prune_sources(zone_dir: str, keep_sources: list) -> int:
+    """
+    Delete parts of sources that are no longer configured. Returns the number of parts removed.
+    """
+    removed = 0
+    for part in list_parts(zone_dir):
+        if part_source(part) not in keep_sources:
+            os.remove(part)
+            removed += 1
+    return removed
+
+
+def write_partition(df: pd.DataFrame, zone_dir: str, mode: str = "overwrite", ingest_date: str = None,
+                    schema=None, source: str = None) -> str:
+    """
+    Write df as an uncompressed Arrow IPC part under zone_dir/ingest_date=YYYY-MM-DD/.
+
+    mode="overwrite" replaces every existing partition (a new full snapshot),
+    mode="append" adds the next part file to the current date's partition (a delta).
+    With source set, parts are named part-<source>-NNNNN.arrow and overwrite only replaces that
+    source's parts, so several sources can write into one zone concurrently.
+    Uncompressed IPC files can be memory-mapped and read without copying numeric buffers.
+    Returns the path of the written part.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    if mode == "overwrite":
+        if source:
+            for old in list_parts(zone_dir, source):
+                os.remove(old)
+        else:
+            for old in glob.glob(os.path.join(zone_dir, "ingest_date=*")):
+                shutil.rmtree(old, ignore_errors=True)
+
+    part_dir = partition_dir(zone_dir, ingest_date)
+    os.makedirs(part_dir, exist_ok=True)
+    seq = len(list_parts(zone_dir, source)) if source else len(glob.glob(os.path.join(part_dir, PART_PATTERN)))
+    part_name = f"part-{source}-{seq:05d}.arrow" if source else f"part-{seq:05d}.arrow"
+    part_file = os.path.join(part_dir, part_name)
+
+    # Write to a temp file and rename so readers never see a half-written part
+    tmp_file = part_file + ".tmp"
+    feather.write_feather(table, tmp_file, compression="uncompressed")
+    os.replace(tmp_file, part_file)
+
+    logger.info(f"Wrote {table.num_rows} rows to {part_file}")
+    return part_file
+
+
+def read_zone_table(zone_dir: str, columns: list = None):
+    """
+    Memory-map every part of a zone and return them as one pyarrow.Table (no copies).
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    parts = list_parts(zone_dir)
+    if not parts:
+        raise FileNotFoundError(f"No Arrow parts found under {zone_dir}")
+
+    tables = [feather.read_table(part, columns=columns, memory_map=True) for part in parts]
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def read_zone(zone_dir: str, columns: list = None) -> pd.DataFrame:
+    return read_zone_table(zone_dir, columns=columns).to_pandas(split_blocks=True)
+
+
+def read_frame(path: str, columns: list = None, dtype=None) -> pd.DataFrame:
+    """
+    Read a stage hand-off: an Arrow zone directory or a CSV file. dtype only applies to CSV
+    files (Arrow zones keep the types, categories included, they were written with).
+    """
+    if os.path.isdir(path):
+        return read_zone(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, dtype=dtype)
+
+
+def iter_frames(path: str, chunksize: int = 100_000, source: str = None, dtype=None):
+    """
+    Yield a stage hand-off as DataFrame chunks of at most chunksize rows
+    (record batches of each Arrow part, or read_csv chunks).
+    source restricts an Arrow zone to that source's parts. dtype only applies to CSV files,
+    where types are otherwise inferred per chunk and can differ between chunks.
+    """
+    if not os.path.isdir(path):
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=dtype)
+        return
+
+    import pyarrow as pa
+
+    for part in list_parts(path, source):
+        # Read one record batch at a time instead of memory-mapping the part: mapped pages
+        # stay resident once touched, so a full scan would hold the whole part in memory
+        with pa.OSFile(part) as f:
+            reader = pa.ipc.open_file(f)
+            for i in range(reader.num_record_batches):
+                for batch in pa.Table.from_batches([reader.get_batch(i)]).to_batches(max_chunksize=chunksize):
+                    yield batch.to_pandas()
+
+
+def write_frame(df: pd.DataFrame, path: str, mode: str = "overwrite", schema=None, source: str = None) -> str:
+    """
+    Write a stage hand-off to whatever zone_path() resolved to: an Arrow zone or a CSV file.
+    source only applies to Arrow zones (see write_partition).
+    """
+    if path.endswith(".csv"):
+        df.to_csv(path, index=False, mode="w" if mode == "overwrite" else "a",
+                  header=mode == "overwrite" or not os.path.exists(path))
+        return path
+    return write_partition(df, path, mode=mode, schema=schema, source=source)
+
+
+def export_csv(zone_dir: str, csv_path: str) -> str:
+    """
+    Export a zone to CSV (CSV is an export format only in arrow mode).
+    """
+    read_zone(zone_dir).to_csv(csv_path, index=False)
+    logger.info(f"Exported {zone_dir} to {csv_path}")
+    return csv_path
+
+
+SQLITE_TO_ARROW = {"INTEGER": "int64", "REAL": "float64", "TEXT": "string"}
+
+
+def sqlite_affinity(declared_type: str) -> str:
+    """
+    Type affinity SQLite gives a declared column type (INT, BIGINT, VARCHAR(20), DOUBLE, ...),
+    following its rules in order. Untyped, BLOB and NUMERIC columns count as TEXT here.
+    """
+    declared_type = (declared_type or "").upper()
+    if "INT" in declared_type:
+        return "INTEGER"
+    if any(name in declared_type for name in ("CHAR", "CLOB", "TEXT")):
+        return "TEXT"
+    if any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+        return "REAL"
+    return "TEXT"
+
+
+def arrow_schema_from_sqlite(conn, table_name: str, columns: list = None):
+    """
+    Build a pyarrow schema from the declared column types of a SQLite table,
+    so every chunk of an incremental load is written with the same types.
+    """
+    import pyarrow as pa
+
+    declared = {row[1]: sqlite_affinity(row[2]) for row in conn.execute(f"PRAGMA table_info({table_name})")}
+    names = columns or list(declared)
+    return pa.schema([(name, SQLITE_TO_ARROW[declared.get(name, "TEXT")]) for name in names])
@@ -0,0 +1,229 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+
+class FeatureSpec:
+    """
+    A registered engineered feature: metadata for the feature store plus a vectorized
+    expression that maps a dict of input column arrays to the feature array, and the same
+    expression as SQL over the input columns (for the SQL pushdown storage path).
+    """
+
+    def __init__(self, name, description, inputs, expression, source="processed_data", version="v1", decimals=2,
+                 sql=None):
+        self.name = name
+        self.description = description
+        self.inputs = list(inputs)
+        self.expression = expression
+        self.sql = sql
+        self.source = source
+        self.version = version
+        self.decimals = decimals
+
+    def as_definition(self) -> tuple:
+        return (self.name, self.description, self.source, self.version)
+
+
+# Registration order is the column order in processed_data
+FEATURE_REGISTRY = {}
+
+
+def register_feature(name, description, inputs, expression, source="processed_data", version="v1", decimals=2,
+                     sql=None):
+    """
+    Add a feature to the registry. expression receives {column: float64 ndarray} for the
+    listed inputs and must return an ndarray of the same length using column-wise ops only.
+    sql is the equivalent SQLite expression over the (numeric) input columns.
+    """
+    FEATURE_REGISTRY[name] = FeatureSpec(name, description, inputs, expression, source, version, decimals, sql)
+    return FEATURE_REGISTRY[name]
+
+
+def feature_definitions() -> list:
+    """
+    (feature_name, description, source, version) tuples, as stored in feature_metadata.
+    """
+    return [spec.as_definition() for spec in FEATURE_REGISTRY.values()]
+
+
+def safe_divide(numerator: np.ndarray, denominator: np.ndarray, fill: float = 0.0) -> np.ndarray:
+    """
+    numerator / denominator where denominator > 0, fill elsewhere (no divide-by-zero warnings).
+    """
+    positive = denominator > 0
+    out = np.full(numerator.shape, fill, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=positive)
+    return out
+
+
+def compute_features(df: pd.DataFrame, names: list = None) -> pd.DataFrame:
+    """
+    Compute registered features (all of them by default) in one pass: every input column is
+    converted once to a contiguous float64 array, shared by all expressions, and the results
+    are assigned back to df together.
+    """
+    specs = [FEATURE_REGISTRY[name] for name in (names or FEATURE_REGISTRY)]
+    needed = dict.fromkeys(col for spec in specs for col in spec.inputs)
+    arrays = {col: np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)) for col in needed}
+
+    results = {}
+    for spec in specs:
+        values = spec.expression(arrays)
+        results[spec.name] = np.round(values, spec.decimals) if spec.decimals is not None else values
+
+    return df.assign(**results)
+
+
+# -------------------------
+# Telco engineered features
+# -------------------------
+register_feature(
+    "AvgChargesPerMonth", "Average charges per tenure month",
+    ["TotalCharges", "tenure"],
+    lambda c: safe_divide(c["TotalCharges"], c["tenure"]),
+    sql="CASE WHEN tenure > 0 THEN TotalCharges / tenure ELSE 0.0 END",
+)
+register_feature(
+    "ExtraCharges", "Difference between billed and expected charges",
+    ["TotalCharges", "MonthlyCharges", "tenure"],
+    lambda c: c["TotalCharges"] - c["MonthlyCharges"] * c["tenure"],
+    sql="TotalCharges - MonthlyCharges * tenure",
+)
+register_feature(
+    "LifetimeValue", "Total expected value of customer",
+    ["tenure", "MonthlyCharges"],
+    lambda c: c["tenure"] * c["MonthlyCharges"],
+    sql="tenure * MonthlyCharges",
+)
+register_feature(
+    "Tenure_Charges_Interaction", "Interaction between tenure and charges",
+    ["tenure", "MonthlyCharges"],
+    lambda c: c["tenure"] * (c["MonthlyCharges"] / 100.0),
+    sql="tenure * (MonthlyCharges / 100.0)",
+)
+
+
+# -------------------------
+# feature_metadata table and load generations
+# -------------------------
+FEATURE_METADATA_DDL = """
+CREATE TABLE IF NOT EXISTS feature_metadata (
+    feature_name TEXT PRIMARY KEY,
+    description TEXT,
+    source TEXT,
+    version TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    generation INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def ensure_feature_metadata(conn):
+    """
+    Create feature_metadata if needed and add the generation column to tables created
+    before it existed.
+    """
+    conn.execute(FEATURE_METADATA_DDL)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(feature_metadata)")}
+    if "generation" not in columns:
+        conn.execute("ALTER TABLE feature_metadata ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+
+
+def bump_generation(conn, source: str = "processed_data"):
+    """
+    Mark a new load of `source`: every feature read from it moves to the next generation,
+    which tells feature caches that their entries are stale.
+    """
+    ensure_feature_metadata(conn)
+    conn.execute(
+        "UPDATE feature_metadata SET generation = "
+        "(SELECT COALESCE(MAX(generation), 0) FROM feature_metadata WHERE source = ?) + 1 WHERE source = ?",
+        (source, source),
+    )
+
+
+def read_generation(conn, source: str = "processed_data") -> int:
+    """
+    Current load generation of `source` (0 if nothing is registered yet).
+    """
+    try:
+        row = conn.execute(
+            "SELECT COALESCE(MAX(generation), 0) FROM feature_metadata WHERE source = ?", (source,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Table (or generation column) not created yet
+        return 0
+    return row[0]
+
+
+def load_version(db_file: str, source: str = "processed_data"):
+    """
+    Cheap identity of the data currently in `source`, read without loading it: the
+    data_storage fingerprint that produced it (its inputs, schema and code), its row count
+    and load generation. Downstream stages key their caches on it instead of digesting the
+    loaded table. None if the table cannot be read.
+    """
+    from telco_common.stage_cache import StageCache
+
+    if not os.path.exists(db_file):
+        return None
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0]
+        generation = read_generation(conn, source)
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    return f"{StageCache('data_storage').load().get('fingerprint')}:{rows}:{generation}"
+
+
+# -------------------------
+# feature_history table (point-in-time feature values)
+# -------------------------
+FEATURE_HISTORY_TABLE = "feature_history"
+
+
+def ensure_feature_history(conn, feature_names: list = None):
+    """
+    Create feature_history (one row per customer per change of its feature values, stamped
+    with valid_from) and its (customerID, valid_from) index. Registry features added later
+    become new columns.
+    """
+    feature_names = list(feature_names or FEATURE_REGISTRY)
+    columns = ", ".join(f"{name} REAL" for name in feature_names)
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {FEATURE_HISTORY_TABLE} "
+        f"(customerID TEXT NOT NULL, valid_from TEXT NOT NULL, {columns}, PRIMARY KEY (customerID, valid_from))"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{FEATURE_HISTORY_TABLE}_valid_from ON {FEATURE_HISTORY_TABLE} (valid_from)"
+    )
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({FEATURE_HISTORY_TABLE})")}
+    for name in feature_names:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {FEATURE_HISTORY_TABLE} ADD COLUMN {name} REAL")
+
+
+def record_feature_history(conn, table_name: str, valid_from: str, feature_names: list = None) -> int:
+    """
+    Append a version to feature_history for every customer in table_name whose feature
+    values differ from its latest recorded version (or that has none yet). Runs as one
+    set-based INSERT ... SELECT; returns the number of versions written.
+    """
+    feature_names = list(feature_names or FEATURE_REGISTRY)
+    ensure_feature_history(conn, feature_names)
+    columns = ", ".join(feature_names)
+    changed = " OR ".join(f"p.{name} IS NOT h.{name}" for name in feature_names)
+    before = conn.total_changes
+    conn.execute(
+        f"INSERT OR REPLACE INTO {FEATURE_HISTORY_TABLE} (customerID, valid_from, {columns}) "
+        f"SELECT p.customerID, ?, {', '.join('p.' + name for name in feature_names)} FROM {table_name} AS p "
+        f"LEFT JOIN {FEATURE_HISTORY_TABLE} AS h ON h.customerID = p.customerID AND h.valid_from = "
+        f"(SELECT MAX(valid_from) FROM {FEATURE_HISTORY_TABLE} WHERE customerID = p.customerID AND valid_from <= ?) "
+        f"WHERE p.customerID IS NOT NULL AND (h.customerID IS NULL OR {changed})",
+        (valid_from, valid_from),
+    )
+    return conn.total_changes - before
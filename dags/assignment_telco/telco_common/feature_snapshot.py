@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from telco_common.feature_engine import FEATURE_REGISTRY, read_generation
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("feature_snapshot")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+BASE_DIR = os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco")
+SNAPSHOT_ROOT = os.environ.get("TELCO_FEATURE_SNAPSHOT_DIR", os.path.join(BASE_DIR, "7_feature_store", "snapshots"))
+CURRENT_LINK = "current"
+KEYS_FILE = "customerID.npy"
+MANIFEST_FILE = "manifest.json"
+
+# Older snapshots are kept so processes still mapping them are not cut off mid-read
+SNAPSHOTS_TO_KEEP = 3
+EXPORT_CHUNK_SIZE = 200_000
+
+
+def _column_file(name: str) -> str:
+    return f"{name}.npy"
+
+
+def current_snapshot_dir(root: str = SNAPSHOT_ROOT):
+    """
+    Directory of the published snapshot (None if nothing has been published yet).
+    """
+    link = os.path.join(root, CURRENT_LINK)
+    if not os.path.islink(link):
+        return None
+    return os.path.join(root, os.readlink(link))
+
+
+# -------------------------
+# Export and atomic publish
+# -------------------------
+def _export_arrays(db_file: str, table_name: str, feature_names: list):
+    """
+    Read customerID plus the feature columns in chunks and return them sorted by key.
+    """
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        generation = read_generation(conn)
+        cursor = conn.execute(f"SELECT customerID, {', '.join(feature_names)} FROM {table_name}")
+        key_chunks, value_chunks = [], []
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            frame = pd.DataFrame.from_records(rows, columns=["customerID"] + feature_names)
+            key_chunks.append(frame["customerID"].astype(str).str.encode("utf-8").to_numpy(dtype=object))
+            value_chunks.append(frame[feature_names].to_numpy(dtype=np.float64, na_value=np.nan))
+    finally:
+        conn.close()
+
+    if not key_chunks:
+        return np.empty(0, dtype="S1"), np.empty((0, len(feature_names))), generation
+
+    keys = np.concatenate(key_chunks).astype("S")
+    values = np.concatenate(value_chunks)
+
+    order = np.argsort(keys, kind="stable")
+    keys, values = keys[order], values[order]
+    # A key loaded more than once keeps its last row
+    last = np.append(keys[1:] != keys[:-1], True)
+    return keys[last], values[last], generation
+
+
+def publish_snapshot(db_file: str, table_name: str = "processed_data", feature_names: list = None,
+                     root: str = SNAPSHOT_ROOT) -> str:
+    """
+    Export feature_names of table_name into a new snapshot directory (one fixed-width .npy
+    file per column, rows sorted by customerID) and atomically repoint root/current at it.
+    Returns the new snapshot directory.
+    """
+    start = time.perf_counter()
+    feature_names = list(feature_names or FEATURE_REGISTRY)
+    keys, values, generation = _export_arrays(db_file, table_name, feature_names)
+
+    os.makedirs(root, exist_ok=True)
+    name = f"snapshot-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}"
+    tmp_dir = os.path.join(root, f".{name}.tmp")
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, KEYS_FILE), keys)
+    for i, feature in enumerate(feature_names):
+        np.save(os.path.join(tmp_dir, _column_file(feature)), np.ascontiguousarray(values[:, i]))
+    manifest = {
+        "table": table_name,
+        "rows": int(len(keys)),
+        "features": feature_names,
+        "generation": generation,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Rename the finished directory into place, then swap the symlink (rename is atomic)
+    os.rename(tmp_dir, os.path.join(root, name))
+    tmp_link = os.path.join(root, f".{CURRENT_LINK}.tmp")
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(name, tmp_link)
+    os.replace(tmp_link, os.path.join(root, CURRENT_LINK))
+
+    prune_snapshots(root)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Published feature snapshot {name} ({len(keys)} customers, {len(feature_names)} features) in {elapsed:.2f}s")
+    return os.path.join(root, name)
+
+
+def prune_snapshots(root: str = SNAPSHOT_ROOT, keep: int = SNAPSHOTS_TO_KEEP):
+    """
+    Remove all but the newest `keep` snapshots (never the current one).
+    """
+    current = current_snapshot_dir(root)
+    snapshots = sorted(d for d in os.listdir(root) if d.startswith("snapshot-"))
+    for name in snapshots[:-keep] if keep else snapshots:
+        path = os.path.join(root, name)
+        if current is None or os.path.realpath(path) != os.path.realpath(current):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# -------------------------
+# Reader
+# -------------------------
+class FeatureSnapshot:
+    """
+    Read-only view of the published snapshot. Every array is memory-mapped, so the OS page
+    cache is shared by all serving processes and a lookup is a binary search over the sorted
+    key array. Rows come back as (customerID, *features) tuples like FeatureStoreClient's.
+    """
+
+    REFRESH_INTERVAL = 1.0
+
+    def __init__(self, root: str = SNAPSHOT_ROOT, feature_names: list = None):
+        self.root = root
+        self._requested = feature_names
+        self._path = None
+        self._checked_at = 0.0
+        self.reload()
+
+    def reload(self):
+        path = current_snapshot_dir(self.root)
+        if path is None:
+            raise FileNotFoundError(f"No feature snapshot published under {self.root}")
+        path = os.path.realpath(path)
+        with open(os.path.join(path, MANIFEST_FILE), "r") as f:
+            manifest = json.load(f)
+
+        feature_names = list(self._requested or manifest["features"])
+        missing = set(feature_names) - set(manifest["features"])
+        if missing:
+            raise KeyError(f"Features not in snapshot {path}: {sorted(missing)}")
+
+        keys = np.load(os.path.join(path, KEYS_FILE), mmap_mode="r")
+        values = [np.load(os.path.join(path, _column_file(name)), mmap_mode="r") for name in feature_names]
+        # Swapped in one assignment so concurrent lookups never mix two snapshots
+        self._arrays = (keys, values)
+        self.feature_names = feature_names
+        self.columns = ["customerID"] + feature_names
+        self.manifest = manifest
+        self._path = path
+
+    def refresh(self):
+        """
+        Switch to a newer snapshot if one was published (checked at most once per REFRESH_INTERVAL).
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.REFRESH_INTERVAL:
+            return
+        self._checked_at = now
+        current = current_snapshot_dir(self.root)
+        if current is not None and os.path.realpath(current) != self._path:
+            self.reload()
+
+    def __len__(self):
+        return len(self._arrays[0])
+
+    @staticmethod
+    def _positions(keys: np.ndarray, customer_ids: list):
+        """
+        Row positions of customer_ids in keys and a mask of which were found.
+        """
+        query = np.array([cid.encode("utf-8") for cid in customer_ids], dtype="S")
+        if not len(keys) or not len(query):
+            return np.zeros(len(query), dtype=np.int64), np.zeros(len(query), dtype=bool)
+        positions = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        return positions, keys[positions] == query
+
+    def get_customer_features(self, customer_id: str):
+        """
+        One customer's (customerID, *features) tuple, or None if unknown.
+        """
+        self.refresh()
+        keys, values = self._arrays
+        key = customer_id.encode("utf-8")
+        i = int(np.searchsorted(keys, key))
+        if i == len(keys) or keys[i] != key:
+            return None
+        return (customer_id, *(float(column[i]) for column in values))
+
+    def get_bulk_features(self, customer_ids: list, output: str = "tuples"):
+        """
+        Vectorized lookup; output is "tuples", "numpy" (IDs, float64 matrix) or "frame",
+        matching FeatureStoreClient.get_bulk_features. Unknown IDs are dropped.
+        """
+        self.refresh()
+        keys, values = self._arrays
+        ids = list(dict.fromkeys(customer_ids))
+        positions, found = self._positions(keys, ids)
+        positions = positions[found]
+        found_ids = np.array(ids, dtype=object)[found]
+        matrix = np.column_stack([column[positions] for column in values])
+
+        if output == "numpy":
+            return found_ids, matrix
+        if output == "frame":
+            frame = pd.DataFrame(matrix, columns=self.feature_names)
+            frame.insert(0, "customerID", found_ids)
+            return frame
+        return list(zip(found_ids.tolist(), *matrix.T.tolist()))
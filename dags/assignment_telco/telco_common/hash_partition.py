@@ -0,0 +1,91 @@
+import os
+import glob
+import math
+import logging
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("hash_partition")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+# Peak pandas memory of joining/cleaning a bucket per byte of Arrow/CSV input
+# (object-dtype strings, the merge result and temporaries), measured on the Telco data
+MEMORY_EXPANSION = 8
+
+
+def bucket_count(input_bytes: int, memory_limit_mb: float, workers: int = 1,
+                 expansion: float = MEMORY_EXPANSION) -> int:
+    """
+    Number of buckets that keeps one bucket per worker (plus one being written out by the
+    driver) within memory_limit_mb, whatever the input size.
+    """
+    budget = memory_limit_mb * 1e6 / (workers + 1)
+    return max(1, math.ceil(input_bytes * expansion / budget))
+
+
+def bucket_of(keys: pd.Series, n_buckets: int) -> np.ndarray:
+    """
+    Bucket of every key: a seeded 64-bit hash, stable across processes and runs.
+    """
+    return (pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy() % n_buckets).astype(np.int64)
+
+
+def partition_frames(frames, key: str, n_buckets: int, out_dir: str) -> int:
+    """
+    Split a stream of DataFrame chunks into n_buckets on-disk buckets by hash of key.
+    Chunk c of bucket b is written to out_dir/bucket-<b>/chunk-<c>.arrow, so reading a
+    bucket's chunks in name order keeps the input order of its rows. Only one chunk is held
+    in memory at a time. Returns the number of rows partitioned.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    rows = 0
+    for chunk_no, chunk in enumerate(frames):
+        buckets = bucket_of(chunk[key], n_buckets)
+        order = np.argsort(buckets, kind="stable")
+        bounds = np.searchsorted(buckets[order], np.arange(n_buckets + 1))
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        for bucket in range(n_buckets):
+            if bounds[bucket] == bounds[bucket + 1]:
+                continue
+            bucket_dir = os.path.join(out_dir, f"bucket-{bucket:05d}")
+            os.makedirs(bucket_dir, exist_ok=True)
+            feather.write_feather(table.take(order[bounds[bucket]:bounds[bucket + 1]]),
+                                  os.path.join(bucket_dir, f"chunk-{chunk_no:05d}.arrow"),
+                                  compression="uncompressed")
+        rows += len(chunk)
+    return rows
+
+
+def read_bucket(out_dir: str, bucket: int, columns: list = None) -> pd.DataFrame:
+    """
+    All rows of one bucket in input order (an empty frame with columns if the bucket has none).
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    parts = sorted(glob.glob(os.path.join(out_dir, f"bucket-{bucket:05d}", "chunk-*.arrow")))
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    tables = [feather.read_table(part, memory_map=True) for part in parts]
+    table = tables[0] if len(tables) == 1 else pa.concat_tables(tables, promote_options="default")
+    return table.to_pandas()
+
+
+def input_size(path: str) -> int:
+    """
+    Bytes of a stage hand-off on disk (all files of a zone directory, or one file).
+    """
+    if os.path.isdir(path):
+        return sum(os.path.getsize(p) for p in glob.glob(os.path.join(path, "**", "*"), recursive=True)
+                   if os.path.isfile(p))
+    return os.path.getsize(path) if os.path.exists(path) else 0
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import shutil
+import logging
+import numpy as np
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from sklearn.metrics import accuracy_score
+
+from telco_common.churn_models import TRIAL_OVERRIDES, fit_model
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("hyperparameter_search")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+
+# -------------------------
+# Memory-mapped training matrices
+# -------------------------
+def dump_matrices(data_dir: str, **arrays):
+    """
+    Save arrays (dense or CSR) under data_dir as .npy files that workers memory-map,
+    so the matrices are written once instead of pickled into every task.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    layout = {}
+    for name, array in arrays.items():
+        if sp.issparse(array):
+            csr = array.tocsr()
+            for part in ("data", "indices", "indptr"):
+                np.save(os.path.join(data_dir, f"{name}.{part}.npy"), getattr(csr, part))
+            layout[name] = {"sparse": True, "shape": list(csr.shape)}
+        else:
+            np.save(os.path.join(data_dir, f"{name}.npy"), np.asarray(array))
+            layout[name] = {"sparse": False}
+    with open(os.path.join(data_dir, "layout.json"), "w") as f:
+        json.dump(layout, f)
+
+
+def load_matrices(data_dir: str) -> dict:
+    with open(os.path.join(data_dir, "layout.json"), "r") as f:
+        layout = json.load(f)
+    arrays = {}
+    for name, info in layout.items():
+        if info["sparse"]:
+            parts = [np.load(os.path.join(data_dir, f"{name}.{part}.npy"), mmap_mode="r")
+                     for part in ("data", "indices", "indptr")]
+            arrays[name] = sp.csr_matrix(tuple(parts), shape=tuple(info["shape"]), copy=False)
+        else:
+            arrays[name] = np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode="r")
+    return arrays
+
+
+# -------------------------
+# Trial worker
+# -------------------------
+_worker_data = {}
+
+
+def _init_worker(data_dir: str):
+    _worker_data.update(load_matrices(data_dir))
+
+
+def run_trial(model_type: str, trial_id: int, params: dict, n_rows: int, rung: int) -> dict:
+    """
+    Fit one configuration on the first n_rows training rows (the rows were shuffled before
+    dumping, so any prefix is a random sample) and score it on the validation rows.
+    """
+    X_fit, y_fit = _worker_data["X_fit"][:n_rows], np.asarray(_worker_data["y_fit"][:n_rows])
+    start = time.perf_counter()
+    model = fit_model(model_type, X_fit, y_fit, {**params, **TRIAL_OVERRIDES.get(model_type, {})})
+    fit_seconds = time.perf_counter() - start
+    score = accuracy_score(np.asarray(_worker_data["y_val"]), model.predict(_worker_data["X_val"]))
+    return {"trial_id": trial_id, "rung": rung, "n_rows": n_rows, "params": params,
+            "val_accuracy": float(score), "fit_seconds": fit_seconds}
+
+
+# -------------------------
+# Asynchronous successive halving
+# -------------------------
+def next_promotion(done: list, promoted: list, eta: int, force: bool = False):
+    """
+    (rung, result) of a finished trial to retrain on the next rung's budget, highest rung first:
+    a trial is promotable once it ranks in the top 1/eta of the results completed so far at
+    its rung (ASHA). With force, the best unpromoted trial of the highest rung with results
+    advances even if that rung has fewer than eta results (so the search always reaches the
+    final budget). None if no trial can be promoted.
+    """
+    for rung in range(len(done) - 2, -1, -1):
+        ranked = sorted(done[rung], key=lambda r: r["val_accuracy"], reverse=True)
+        keep = max(1, len(ranked) // eta) if force else len(ranked) // eta
+        for result in ranked[:keep]:
+            if result["trial_id"] not in promoted[rung]:
+                return rung, result
+        if force and ranked:
+            return None
+    return None
+
+
+def successive_halving(model_type: str, configs: list, X_fit, y_fit, X_val, y_val, data_dir: str,
+                       min_rows: int = None, eta: int = 3, max_workers: int = None, on_result=None,
+                       seed: int = 42) -> dict:
+    """
+    Asynchronous successive-halving (ASHA) search over configs: every configuration is trained
+    on a small row budget, and a configuration moves to a budget eta times larger as soon as it
+    ranks in the top 1/eta of the trials finished so far at its budget, up to the full training
+    set. Trials run in a process pool that reads memory-mapped matrices. There is no barrier
+    between rungs: whenever a trial finishes, the freed worker gets a promotion if one is due,
+    or else a new configuration, so workers never wait for the slowest trial of a rung.
+
+    on_result(result) is called in this process for every finished trial (e.g. MLflow logging).
+    Returns the best result of the final rung.
+    """
+    n_total = X_fit.shape[0]
+    n_rungs = max(1, int(np.floor(np.log(len(configs)) / np.log(eta))) + 1) if len(configs) > 1 else 1
+    min_rows = min_rows or max(200, int(n_total / eta ** (n_rungs - 1)))
+    rung_rows = [min(min_rows * eta ** rung, n_total) for rung in range(n_rungs - 1)] + [n_total]
+
+    # Shuffle once so that every row-budget prefix is a random subsample
+    order = np.random.default_rng(seed).permutation(n_total)
+    dump_matrices(data_dir, X_fit=X_fit[order], y_fit=np.asarray(y_fit)[order],
+                  X_val=X_val, y_val=np.asarray(y_val))
+
+    max_workers = max_workers or os.cpu_count()
+    done = [[] for _ in range(n_rungs)]
+    promoted = [set() for _ in range(n_rungs)]
+    pending_configs = list(enumerate(configs))
+    running = {}
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_worker, initargs=(data_dir,)) as executor:
+
+            def submit(trial_id, params, rung):
+                future = executor.submit(run_trial, model_type, trial_id, params, rung_rows[rung], rung)
+                running[future] = rung
+
+            while True:
+                # Keep every worker busy: promotions first, then configurations not tried yet
+                while len(running) < max_workers:
+                    promotion = next_promotion(done, promoted, eta)
+                    if promotion is not None:
+                        rung, result = promotion
+                        promoted[rung].add(result["trial_id"])
+                        submit(result["trial_id"], result["params"], rung + 1)
+                    elif pending_configs:
+                        submit(*pending_configs.pop(0), 0)
+                    else:
+                        break
+                if not running:
+                    # Rungs with fewer than eta results still send their best trial on
+                    promotion = next_promotion(done, promoted, eta, force=True) if not done[-1] else None
+                    if promotion is None:
+                        break
+                    rung, result = promotion
+                    promoted[rung].add(result["trial_id"])
+                    submit(result["trial_id"], result["params"], rung + 1)
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    rung = running.pop(future)
+                    result = future.result()
+                    done[rung].append(result)
+                    if on_result is not None:
+                        on_result(result)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    for rung, results in enumerate(done):
+        if results:
+            logger.info(f"Rung {rung}: {len(results)} trials on {rung_rows[rung]} rows, best val_accuracy "
+                        f"{max(r['val_accuracy'] for r in results):.4f}")
+    return max(done[-1], key=lambda r: r["val_accuracy"])
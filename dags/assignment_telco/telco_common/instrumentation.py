@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import logging
+import resource
+import functools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("instrumentation")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+BASE_DIR = os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco")
+METRICS_DIR = os.path.join(BASE_DIR, "_metrics")
+METRICS_FILE = os.environ.get("TELCO_METRICS_FILE", os.path.join(METRICS_DIR, "stage_metrics.jsonl"))
+
+# Opt-in sampling profiler: TELCO_PROFILE=all or a comma-separated list of stage names
+PROFILE_STAGES = {s.strip() for s in os.environ.get("TELCO_PROFILE", "").split(",") if s.strip()}
+PROFILE_INTERVAL_MS = float(os.environ.get("TELCO_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.path.join(METRICS_DIR, "profiles")
+
+
+# -------------------------
+# Memory readings
+# -------------------------
+def _peak_rss_bytes() -> int:
+    """
+    Peak resident set size of this process since start or the last reset (VmHWM).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # No procfs: lifetime peak only
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _reset_peak_rss() -> bool:
+    """
+    Reset VmHWM to the current RSS so the next reading is the peak of one step (Linux only).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _children_usage():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * 1024
+
+
+# -------------------------
+# Sampling profiler
+# -------------------------
+class SamplingProfiler:
+    """
+    Samples the stack of one thread every interval_ms from a background thread and counts
+    collapsed stacks ("outer;inner;leaf count" lines, the input format of flamegraph.pl and
+    speedscope). Costs nothing unless started.
+    """
+
+    def __init__(self, thread_id: int = None, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval_ms / 1000.0
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+# -------------------------
+# Measurements
+# -------------------------
+class Measurement:
+    """
+    One stage or sub-step. Callers set rows_in / rows_out inside the block; the rest is filled
+    in when the block exits.
+    """
+
+    def __init__(self, stage: str, step: str = None, rows_in: int = None):
+        self.stage = stage
+        self.step = step
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.extra = {}
+        self._peak = 0
+
+    def as_record(self) -> dict:
+        return {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "dag_run_id": os.environ.get("AIRFLOW_CTX_DAG_RUN_ID"),
+            "task_id": os.environ.get("AIRFLOW_CTX_TASK_ID"),
+            "stage": self.stage,
+            "step": self.step,
+            **{k: v for k, v in self.__dict__.items() if not k.startswith("_") and k not in ("stage", "step", "extra")},
+            **self.extra,
+        }
+
+
+_local = threading.local()
+_records = []
+_records_lock = threading.Lock()
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _write_record(record: dict):
+    os.makedirs(os.path.dirname(METRICS_FILE), exist_ok=True)
+    line = json.dumps(record, default=str) + "\n"
+    with open(METRICS_FILE, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(line)
+
+
+@contextmanager
+def measure(stage: str, step: str = None, rows_in: int = None):
+    """
+    Record wall time, CPU time (this process, and finished child processes such as pool
+    workers), peak RSS, rows in/out and throughput of the enclosed block, append it to
+    METRICS_FILE as one JSON line and keep it for drain().
+
+    Nested blocks are sub-steps: peak RSS is reset for each of them (the enclosing block still
+    reports the overall peak). The top-level block of a stage listed in TELCO_PROFILE also
+    runs the sampling profiler and dumps its collapsed stacks under PROFILE_DIR.
+    """
+    m = Measurement(stage, step, rows_in)
+    stack = _stack()
+    on_main = threading.current_thread() is threading.main_thread()
+
+    # Memory peaks are per process, so only the main thread resets them
+    if on_main:
+        if stack:
+            stack[-1]._peak = max(stack[-1]._peak, _peak_rss_bytes())
+        _reset_peak_rss()
+
+    profiler = None
+    if step is None and (stage in PROFILE_STAGES or "all" in PROFILE_STAGES):
+        profiler = SamplingProfiler()
+        profiler.start()
+
+    stack.append(m)
+    children_cpu_start, _ = _children_usage()
+    cpu_start = time.process_time() if on_main else time.thread_time()
+    wall_start = time.perf_counter()
+    status = "ok"
+    try:
+        yield m
+    except BaseException:
+        status = "failed"
+        raise
+    finally:
+        m.wall_seconds = round(time.perf_counter() - wall_start, 4)
+        m.cpu_seconds = round((time.process_time() if on_main else time.thread_time()) - cpu_start, 4)
+        children_cpu, children_peak = _children_usage()
+        m.children_cpu_seconds = round(children_cpu - children_cpu_start, 4)
+        m._peak = max(m._peak, _peak_rss_bytes())
+        m.peak_rss_mb = round(m._peak / 1e6, 1)
+        m.children_peak_rss_mb = round(children_peak / 1e6, 1) if m.children_cpu_seconds else None
+        rows = m.rows_out if m.rows_out is not None else m.rows_in
+        m.rows_per_sec = round(rows / m.wall_seconds, 1) if rows and m.wall_seconds > 0 else None
+        m.status = status
+        stack.pop()
+        if stack:
+            stack[-1]._peak = max(stack[-1]._peak, m._peak)
+
+        if profiler is not None:
+            profiler.stop()
+            m.extra["profile"] = profiler.dump(os.path.join(
+                PROFILE_DIR, f"{stage}-{datetime.now().strftime('%Y%m%dT%H%M%S')}.folded"))
+
+        record = m.as_record()
+        with _records_lock:
+            _records.append(record)
+        try:
+            _write_record(record)
+        except OSError as e:
+            logger.warning(f"Could not append metrics to {METRICS_FILE}: {e}")
+        name = f"{stage}.{step}" if step else stage
+        logger.info(f"[metrics] {name}: wall {m.wall_seconds:.2f}s, cpu {m.cpu_seconds:.2f}s, "
+                    f"peak RSS {m.peak_rss_mb:.0f} MB, rows in/out {m.rows_in}/{m.rows_out}"
+                    + (f", {m.rows_per_sec:,.0f} rows/sec" if m.rows_per_sec else ""))
+
+
+@contextmanager
+def step(name: str, rows_in: int = None):
+    """
+    Sub-step of the enclosing measure() block (a stage of its own when there is none).
+    """
+    stack = _stack()
+    stage = stack[-1].stage if stack else name
+    with measure(stage, step=name if stack else None, rows_in=rows_in) as m:
+        yield m
+
+
+def instrumented(stage: str, rows_out=None):
+    """
+    Decorator measuring every call of a stage entry point. rows_out(result) may derive the
+    output row count from the return value.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(stage) as m:
+                result = func(*args, **kwargs)
+                if rows_out is not None and result is not None and m.rows_out is None:
+                    m.rows_out = rows_out(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def current() -> Measurement:
+    """
+    Innermost active measurement of this thread (None outside measure()).
+    """
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def drain() -> list:
+    """
+    Return and forget the records collected in this process (pushed to XCom by the DAG tasks).
+    """
+    with _records_lock:
+        records = list(_records)
+        _records.clear()
+    return records
+
+
+def mlflow_metrics(measurements: list) -> dict:
+    """
+    Flatten finished measurements into MLflow metric names such as fit_wall_seconds.
+    """
+    metrics = {}
+    for m in measurements:
+        record = m.as_record()
+        prefix = record["step"] or record["stage"]
+        for key in ("wall_seconds", "cpu_seconds", "peak_rss_mb", "rows_per_sec"):
+            if record.get(key) is not None:
+                metrics[f"{prefix}_{key}"] = record[key]
+    return metrics
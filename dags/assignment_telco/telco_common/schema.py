@@ -0,0 +1,205 @@
+import os
+import re
+import logging
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("schema")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_FILE = os.path.join(PIPELINE_DIR, "6_data_storage", "schema.sql")
+DEFAULT_TABLE = "processed_data"
+
+CREATE_TABLE = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*?)\)\s*;", re.IGNORECASE | re.DOTALL)
+CHECK_BETWEEN = re.compile(r"CHECK\s*\(\s*\w+\s+BETWEEN\s+(-?\d+)\s+AND\s+(-?\d+)\s*\)", re.IGNORECASE)
+CHECK_IN = re.compile(r"CHECK\s*\(\s*\w+\s+IN\s*\(([-\d,\s]+)\)\s*\)", re.IGNORECASE)
+# "-- range: lo..hi" after a column definition declares its values without constraining the table
+RANGE_COMMENT = re.compile(
+    r"^\s*(?:CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?\w+\s*\(\s*)?(\w+)\s+\w+[^\n]*?--\s*range:\s*(-?\d+)\s*\.\.\s*(-?\d+)",
+    re.IGNORECASE | re.MULTILINE,
+)
+TABLE_START = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+
+# Narrowest integer dtype for a declared value range
+INT_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+class ColumnSpec:
+    """
+    A column declared in schema.sql: SQL type, primary key flag and its declared value
+    range, if any: a "-- range: lo..hi" comment (documentation only, SQLite does not
+    enforce it) or a CHECK constraint (BETWEEN lo AND hi, or IN (...)).
+    """
+
+    def __init__(self, name, sql_type, primary_key=False, low=None, high=None):
+        self.name = name
+        self.sql_type = sql_type
+        self.primary_key = primary_key
+        self.low = low
+        self.high = high
+
+    @property
+    def dtype(self):
+        """
+        Compact pandas dtype: category for text columns (primary keys stay plain strings,
+        they are hashed, joined on and encoded per row), the narrowest integer holding the
+        declared range, float64 for REAL (2-decimal charges are not exact in float32, and
+        stored values are compared exactly when upserting).
+        """
+        if self.sql_type == "TEXT":
+            return np.dtype(object) if self.primary_key else pd.CategoricalDtype()
+        if self.sql_type == "INTEGER":
+            if self.low is None:
+                return np.dtype(np.int64)
+            return np.dtype(next(t for t in INT_DTYPES if np.iinfo(t).min <= self.low and self.high <= np.iinfo(t).max))
+        return np.dtype(np.float64)
+
+
+def split_columns(body: str) -> list:
+    """
+    Column definitions of a CREATE TABLE body: split on commas outside parentheses.
+    """
+    parts, depth, current = [], 0, []
+    for char in body:
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += (char == "(") - (char == ")")
+        current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def range_comments(schema_sql: str) -> dict:
+    """
+    {(table, column): (lo, hi)} of the "-- range: lo..hi" comments in schema_sql.
+    """
+    ranges = {}
+    for statement in re.split(r";\s*\n", schema_sql):
+        table = TABLE_START.search(re.sub(r"--[^\n]*", "", statement))
+        if table:
+            for column, low, high in RANGE_COMMENT.findall(statement):
+                ranges[(table.group(1), column)] = (int(low), int(high))
+    return ranges
+
+
+def parse_schema(schema_sql: str) -> dict:
+    """
+    {table: {column: ColumnSpec}} of every CREATE TABLE statement (table constraints such as
+    PRIMARY KEY (...) on their own are skipped).
+    """
+    declared = range_comments(schema_sql)
+    schema_sql = re.sub(r"--[^\n]*", "", schema_sql)
+    tables = {}
+    for table, body in CREATE_TABLE.findall(schema_sql):
+        columns = {}
+        for definition in split_columns(body):
+            tokens = definition.split()
+            if len(tokens) < 2 or tokens[0].upper() in ("PRIMARY", "UNIQUE", "CHECK", "FOREIGN", "CONSTRAINT"):
+                continue
+            low, high = declared.get((table, tokens[0]), (None, None))
+            between, listed = CHECK_BETWEEN.search(definition), CHECK_IN.search(definition)
+            if between:
+                low, high = int(between.group(1)), int(between.group(2))
+            elif listed:
+                values = [int(v) for v in listed.group(1).split(",")]
+                low, high = min(values), max(values)
+            columns[tokens[0]] = ColumnSpec(tokens[0], tokens[1].upper(),
+                                            primary_key="PRIMARY KEY" in definition.upper(), low=low, high=high)
+        tables[table] = columns
+    return tables
+
+
+@lru_cache(maxsize=None)
+def load_schema(schema_file: str = SCHEMA_FILE) -> dict:
+    with open(schema_file, "r") as f:
+        return parse_schema(f.read())
+
+
+def table_columns(table: str = DEFAULT_TABLE) -> dict:
+    return load_schema()[table]
+
+
+def compact_dtypes(table: str = DEFAULT_TABLE) -> dict:
+    """
+    {column: compact dtype} for every column of table.
+    """
+    return {name: spec.dtype for name, spec in table_columns(table).items()}
+
+
+def csv_dtypes(table: str = DEFAULT_TABLE) -> dict:
+    """
+    dtype= for pd.read_csv of a file with (some of) the table's columns: text columns are
+    parsed straight into categories, keys as strings. Integers are narrowed afterwards by
+    apply_dtypes, since read_csv cannot parse missing values into int8/int16.
+    """
+    return {name: (str if spec.primary_key else "category")
+            for name, spec in table_columns(table).items() if spec.sql_type == "TEXT"}
+
+
+def apply_dtypes(df: pd.DataFrame, table: str = DEFAULT_TABLE) -> pd.DataFrame:
+    """
+    Cast the columns of df that the table declares to their compact dtypes, in place.
+    Integer columns with missing values use the nullable Int8/Int16/... dtypes, and values
+    outside the declared range keep int64 (with a warning) instead of wrapping around.
+    Returns df.
+    """
+    columns = table_columns(table)
+    for col in df.columns:
+        spec = columns.get(col)
+        if spec is None:
+            continue
+        dtype, series = spec.dtype, df[col]
+        if isinstance(dtype, pd.CategoricalDtype):
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                df[col] = series.astype("category")
+        elif dtype.kind == "i":
+            values = series if pd.api.types.is_numeric_dtype(series) else pd.to_numeric(series)
+            if spec.low is not None and values.notna().any() and (values.min() < spec.low or values.max() > spec.high):
+                logger.warning(f"{col} outside its declared range [{spec.low}, {spec.high}]; kept as int64")
+                dtype = np.dtype(np.int64)
+            if values.isna().any():
+                df[col] = values.astype(f"Int{dtype.itemsize * 8}")
+            elif values.dtype != dtype:
+                df[col] = values.astype(dtype)
+        elif series.dtype != dtype:
+            df[col] = pd.to_numeric(series).astype(dtype)
+    return df
+
+
+def concat_compact(frames: list) -> pd.DataFrame:
+    """
+    pd.concat for chunks cast by apply_dtypes: categorical columns whose chunks have different
+    categories are combined with union_categoricals instead of falling back to object.
+    """
+    if not frames:
+        return pd.DataFrame()
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    df = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = pd.api.types.union_categoricals([frame[col] for frame in frames])
+    return df
+
+
+def read_sql_compact(conn, query: str, params=None, table: str = DEFAULT_TABLE, chunksize: int = 100_000) -> pd.DataFrame:
+    """
+    pd.read_sql_query in chunks of chunksize rows, each cast with apply_dtypes, so only one
+    chunk at a time is held as Python-object strings.
+    """
+    chunks = pd.read_sql_query(query, conn, params=params, chunksize=chunksize)
+    return concat_compact([apply_dtypes(chunk, table) for chunk in chunks])
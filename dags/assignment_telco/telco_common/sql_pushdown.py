@@ -0,0 +1,207 @@
+import os
+import csv
+import json
+import time
+import logging
+from itertools import islice
+
+from telco_common.feature_engine import FEATURE_REGISTRY
+from telco_common.instrumentation import step
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("sql_pushdown")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+STAGING_TABLE = "staging_csv_data"
+SOURCE_STAGING_TABLE = "staging_db_data"
+STAGING_BATCH_SIZE = 20_000
+SOURCE_ALIAS = "source_db"
+DB_COLUMNS = ["tenure", "MonthlyCharges", "TotalCharges"]
+
+
+def pushdown_sources(config_path: str) -> tuple:
+    """
+    (csv file, SQLite file, table) of the ingestion config: the pushdown path joins exactly
+    one CSV source with one SQLite source, like data_preparation does.
+    """
+    with open(config_path, "r") as f:
+        sources = json.load(f).get("sources", [])
+    csv_sources = [src for src in sources if src["type"] == "csv"]
+    sqlite_sources = [src for src in sources if src["type"] == "sqlite"]
+    if len(csv_sources) != 1 or len(sqlite_sources) != 1:
+        raise ValueError(f"SQL pushdown needs exactly one csv and one sqlite source in {config_path}")
+    return csv_sources[0]["path"], sqlite_sources[0]["path"], sqlite_sources[0]["table"]
+
+
+# -------------------------
+# Staging
+# -------------------------
+def load_csv_staging(conn, csv_file: str, table: str = STAGING_TABLE, batch_size: int = STAGING_BATCH_SIZE) -> tuple:
+    """
+    Bulk-load a CSV file into a TEMP staging table of TEXT columns named after its header,
+    streaming the rows with executemany. Returns (column names, rows loaded).
+    """
+    start = time.perf_counter()
+    with open(csv_file, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+        conn.execute(f"CREATE TEMP TABLE {table} ({', '.join(f'{col} TEXT' for col in columns)})")
+        insert_sql = f"INSERT INTO temp.{table} VALUES ({', '.join('?' * len(columns))})"
+        total = 0
+        while True:
+            batch = list(islice(reader, batch_size))
+            if not batch:
+                break
+            conn.executemany(insert_sql, batch)
+            total += len(batch)
+    logger.info(f"Staged {total} rows of {csv_file} in temp.{table} in {time.perf_counter() - start:.2f}s")
+    return columns, total
+
+
+def stage_source_table(conn, source_table: str, key: str = "customerID", table: str = SOURCE_STAGING_TABLE) -> int:
+    """
+    Copy the latest row (highest rowid) of each customer in the attached source table into a
+    TEMP staging table indexed on key, like the keep="last" de-duplication of data_preparation.
+    Customers with a NULL or blank TotalCharges are dropped and the numerics cast. The
+    registered features only read these columns, so their unrounded values are computed
+    here, once per customer. Returns the number of rows staged.
+    """
+    features = feature_sql()
+    conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+    conn.execute(
+        f"CREATE TEMP TABLE {table} AS "
+        f"SELECT {key}, {', '.join(DB_COLUMNS)}, {', '.join(f'{expr} AS {name}' for name, (expr, _) in features.items())} "
+        f"FROM (SELECT {key}, CAST(tenure AS INTEGER) AS tenure, CAST(MonthlyCharges AS REAL) AS MonthlyCharges, "
+        f"CAST(TotalCharges AS REAL) AS TotalCharges FROM {SOURCE_ALIAS}.{source_table} "
+        f"WHERE rowid IN (SELECT MAX(rowid) FROM {SOURCE_ALIAS}.{source_table} GROUP BY {key}) "
+        f"AND TotalCharges IS NOT NULL AND TRIM(TotalCharges) <> '')"
+    )
+    conn.execute(f"CREATE INDEX temp.idx_{table}_{key} ON {table} ({key})")
+    return conn.execute(f"SELECT COUNT(*) FROM temp.{table}").fetchone()[0]
+
+
+# -------------------------
+# Set-based preparation and feature engineering
+# -------------------------
+def numpy_round_sql(column: str, decimals: int) -> str:
+    """
+    SQL for np.round(column, decimals): rint(column * 10**decimals) / 10**decimals with
+    round-half-to-even. SQLite's ROUND() rounds half away from zero instead (0.125 -> 0.13,
+    numpy gives 0.12), which would make pushed-down features differ from compute_features().
+    """
+    scale = f"{10.0 ** decimals!r}"
+    y = f"({column} * {scale})"
+    t = f"CAST({y} AS INTEGER)"
+    f = f"({y} - {t})"
+    return (f"(CASE WHEN {f} > 0.5 THEN {t} + 1 WHEN {f} < -0.5 THEN {t} - 1 "
+            f"WHEN {f} = 0.5 OR {f} = -0.5 THEN {t} + {t} % 2 ELSE {t} END) / {scale}")
+
+
+def feature_sql() -> dict:
+    """
+    {name: (SQL expression, decimals)} of every registered feature.
+    """
+    for name, spec in FEATURE_REGISTRY.items():
+        if not spec.sql:
+            raise ValueError(f"Feature {name} has no SQL expression and cannot be pushed down")
+        if not set(spec.inputs) <= set(DB_COLUMNS):
+            raise ValueError(f"Feature {name} reads columns outside {DB_COLUMNS} and cannot be pushed down")
+    return {name: (spec.sql, spec.decimals) for name, spec in FEATURE_REGISTRY.items()}
+
+
+def prepare_sql(conn, target_table: str, csv_columns: list, key: str, upsert: bool) -> str:
+    """
+    One INSERT ... SELECT producing target_table from the two staging tables:
+      - blank CSV fields as NULL (as pandas reads them), CSV columns cast to the declared types
+      - inner join on key, features rounded like compute_features()
+      - rows inserted in CSV order, like the pandas merge (the row order of processed_data
+        decides the train/test split of model_building)
+    With upsert, existing rows are only rewritten when a value changed.
+    """
+    declared = {row[1]: row[2].upper() for row in conn.execute(f"PRAGMA table_info({target_table})")}
+
+    def csv_value(col):
+        value = f"NULLIF(c.{col}, '')"
+        return f"CAST({value} AS {declared[col]})" if declared.get(col) in ("INTEGER", "REAL") else value
+
+    features = feature_sql()
+    columns = csv_columns + DB_COLUMNS + list(features)
+    rounded = [numpy_round_sql(f"d.{name}", decimals) if decimals is not None else f"d.{name}"
+               for name, (_, decimals) in features.items()]
+
+    # CROSS JOIN makes SQLite scan the CSV rows in the outer loop (in load order, no sort)
+    # and look each customer up in the indexed source staging table.
+    # WHERE true: without it SQLite would parse ON CONFLICT as a join constraint
+    sql = (
+        f"INSERT INTO {target_table} ({', '.join(columns)}) "
+        f"SELECT {', '.join(csv_value(col) for col in csv_columns)}, "
+        f"{', '.join(f'd.{col}' for col in DB_COLUMNS)}, {', '.join(rounded)} "
+        f"FROM temp.{STAGING_TABLE} AS c CROSS JOIN temp.{SOURCE_STAGING_TABLE} AS d ON d.{key} = c.{key} "
+        f"WHERE true"
+    )
+    if upsert:
+        updates = [col for col in columns if col != key]
+        sql += (
+            f" ON CONFLICT({key}) DO UPDATE SET {', '.join(f'{col} = excluded.{col}' for col in updates)} "
+            f"WHERE {' OR '.join(f'{target_table}.{col} IS NOT excluded.{col}' for col in updates)}"
+        )
+    return sql
+
+
+def attach_source(conn, source_db: str):
+    if not os.path.exists(source_db):
+        raise FileNotFoundError(f"Source database not found: {source_db}")
+    conn.execute(f"ATTACH DATABASE ? AS {SOURCE_ALIAS}", (source_db,))
+
+
+def prepare_in_sqlite(conn, csv_file: str, source_db: str, source_table: str, target_table: str,
+                      key: str = "customerID", upsert: bool = True) -> int:
+    """
+    Build target_table inside SQLite: attach source_db, stage csv_file and the source table
+    and run prepare_sql(), in one transaction. With upsert, rows whose key is no longer
+    produced by the join are deleted, as a full reload would drop them. conn must be in
+    autocommit mode (isolation_level=None) with the target schema applied. Returns the
+    number of rows written or deleted.
+    """
+    attach_source(conn, source_db)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            with step("stage_csv") as m:
+                csv_columns, m.rows_out = load_csv_staging(conn, csv_file)
+            with step("stage_source") as m:
+                m.rows_out = stage_source_table(conn, source_table, key)
+            sql = prepare_sql(conn, target_table, csv_columns, key, upsert)
+            start = time.perf_counter()
+            with step("insert_select") as m:
+                before = conn.total_changes
+                conn.execute(sql)
+                written = m.rows_out = conn.total_changes - before
+            if upsert:
+                with step("delete_missing") as m:
+                    before = conn.total_changes
+                    conn.execute(
+                        f"DELETE FROM {target_table} WHERE {key} NOT IN "
+                        f"(SELECT c.{key} FROM temp.{STAGING_TABLE} AS c "
+                        f"JOIN temp.{SOURCE_STAGING_TABLE} AS d ON d.{key} = c.{key})"
+                    )
+                    m.rows_out = conn.total_changes - before
+                written += m.rows_out
+            conn.execute(f"DROP TABLE temp.{STAGING_TABLE}")
+            conn.execute(f"DROP TABLE temp.{SOURCE_STAGING_TABLE}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.execute(f"DETACH DATABASE {SOURCE_ALIAS}")
+    logger.info(f"INSERT ... SELECT wrote {written} rows to {target_table} in {time.perf_counter() - start:.2f}s")
+    return written
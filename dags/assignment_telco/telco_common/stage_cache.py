@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import fcntl
+import glob
+import hashlib
+import logging
+from datetime import datetime
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("stage_cache")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+BASE_DIR = os.environ.get("TELCO_BASE_DIR", "/opt/airflow/logs/assignment_telco")
+CACHE_DIR = os.path.join(BASE_DIR, "_stage_cache")
+FILE_HASH_MEMO = os.path.join(CACHE_DIR, "_file_hashes.json")
+
+# Set TELCO_STAGE_CACHE=off to force every stage to recompute
+CACHE_ENABLED = os.environ.get("TELCO_STAGE_CACHE", "on") != "off"
+# Artifacts older than this are eligible for eviction
+CACHE_MAX_AGE_DAYS = float(os.environ.get("TELCO_STAGE_CACHE_MAX_AGE_DAYS", "14"))
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+# -------------------------
+# Content fingerprints
+# -------------------------
+def _load_memo() -> dict:
+    if not os.path.exists(FILE_HASH_MEMO):
+        return {}
+    try:
+        with open(FILE_HASH_MEMO, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_memo(memo: dict, replace: bool = False):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(FILE_HASH_MEMO + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        merged = {} if replace else _load_memo()
+        merged.update(memo)
+        tmp_file = FILE_HASH_MEMO + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(merged, f)
+        os.replace(tmp_file, FILE_HASH_MEMO)
+
+
+def file_digest(path: str, memo: dict = None) -> str:
+    """
+    blake2b digest of a file's content. Digests are memoized by (size, mtime_ns), so an
+    unchanged file is only read once no matter how many stages fingerprint it.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    if memo is not None:
+        entry = memo.get(path)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["digest"]
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    if memo is not None:
+        memo[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest}
+    return digest
+
+
+def _expand(path: str) -> list:
+    if os.path.isdir(path):
+        files = [p for p in glob.glob(os.path.join(path, "**", "*"), recursive=True) if os.path.isfile(p)]
+        # Ignore temp files and bookkeeping that do not change the data itself
+        return sorted(p for p in files if not p.endswith((".tmp", ".lock")))
+    return [path]
+
+
+def fingerprint(inputs: list = (), code: list = (), params: dict = None, extra: list = ()) -> str:
+    """
+    Fingerprint of a stage run: content of every input file (directories are walked),
+    the stage's source files and its parameters. extra takes already-computed digests
+    (e.g. of in-memory DataFrames).
+    """
+    memo = _load_memo()
+    h = hashlib.blake2b(digest_size=16)
+    for kind, paths in (("input", inputs), ("code", code)):
+        for path in paths:
+            for file in _expand(path):
+                h.update(f"{kind}:{os.path.relpath(file, path) if os.path.isdir(path) else file}:".encode())
+                h.update(file_digest(file, memo).encode() if os.path.exists(file) else b"missing")
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    for item in extra:
+        h.update(str(item).encode())
+    _save_memo(memo)
+    return h.hexdigest()
+
+
+def frame_digest(df) -> str:
+    """
+    Content digest of a pandas object (values, column names and dtypes), a NumPy array
+    or a SciPy sparse matrix.
+    """
+    import numpy as np
+    import pandas as pd
+
+    h = hashlib.blake2b(digest_size=16)
+    if hasattr(df, "tocsr"):
+        csr = df.tocsr()
+        h.update(repr((csr.shape, str(csr.dtype))).encode())
+        for part in (csr.data, csr.indices, csr.indptr):
+            h.update(np.ascontiguousarray(part).tobytes())
+        return h.hexdigest()
+    if isinstance(df, np.ndarray):
+        h.update(repr((df.shape, str(df.dtype))).encode())
+        h.update(np.ascontiguousarray(df).tobytes())
+        return h.hexdigest()
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    if hasattr(df, "columns"):
+        h.update(json.dumps([str(c) for c in df.columns]).encode())
+        h.update(json.dumps(df.dtypes.astype(str).tolist()).encode())
+    return h.hexdigest()
+
+
+# -------------------------
+# Stage manifests
+# -------------------------
+class StageCache:
+    """
+    Per-stage manifest that stores the fingerprint of the last successful run together with
+    the outputs it produced. A stage calls hit() before doing any work and store() after.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in stage)
+        self.manifest_file = os.path.join(CACHE_DIR, f"{safe_name}.json")
+
+    def load(self) -> dict:
+        if not os.path.exists(self.manifest_file):
+            return {}
+        with open(self.manifest_file, "r") as f:
+            return json.load(f)
+
+    def hit(self, fp: str) -> bool:
+        """
+        True if the last run had the same fingerprint and all of its outputs still exist.
+        """
+        if not CACHE_ENABLED:
+            return False
+        manifest = self.load()
+        if manifest.get("fingerprint") != fp:
+            return False
+        if not all(os.path.exists(out) for out in manifest.get("outputs", [])):
+            return False
+        logger.info(f"Stage {self.stage}: inputs unchanged (fingerprint {fp[:12]}), skipping")
+        return True
+
+    def outputs(self) -> list:
+        return self.load().get("outputs", [])
+
+    def metadata(self) -> dict:
+        return self.load().get("metadata", {})
+
+    def store(self, fp: str, outputs: list = (), metadata: dict = None):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        manifest = {
+            "stage": self.stage,
+            "fingerprint": fp,
+            "outputs": [os.path.abspath(out) for out in outputs],
+            "metadata": metadata or {},
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_file = self.manifest_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+
+# -------------------------
+# Eviction
+# -------------------------
+def evict_stale_artifacts(base_dir: str = BASE_DIR, max_age_days: float = CACHE_MAX_AGE_DAYS) -> list:
+    """
+    Remove stale artifacts under base_dir:
+      - leftover *.tmp files from interrupted writes,
+      - stage manifests whose outputs no longer exist,
+      - validation reports older than max_age_days that no manifest references,
+      - memoized digests of files that were deleted.
+    mlruns/ and the SQLite databases are never touched. Returns the removed paths.
+    """
+    cutoff = time.time() - max_age_days * 86400
+    removed = []
+
+    def _remove(path):
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError as e:
+            logger.warning(f"Could not evict {path}: {e}")
+
+    for tmp in glob.glob(os.path.join(base_dir, "**", "*.tmp"), recursive=True):
+        if "mlruns" not in tmp.split(os.sep) and os.path.getmtime(tmp) < cutoff:
+            _remove(tmp)
+
+    referenced = set()
+    for manifest_file in glob.glob(os.path.join(CACHE_DIR, "*.json")):
+        if manifest_file == FILE_HASH_MEMO:
+            continue
+        try:
+            with open(manifest_file, "r") as f:
+                outputs = json.load(f).get("outputs", [])
+        except (OSError, ValueError):
+            outputs = []
+        if not all(os.path.exists(out) for out in outputs):
+            _remove(manifest_file)
+        else:
+            referenced.update(outputs)
+
+    reports = glob.glob(os.path.join(base_dir, "4_data_validation", "validation_reports", "*"))
+    for report in reports:
+        if os.path.abspath(report) not in referenced and os.path.getmtime(report) < cutoff:
+            _remove(report)
+
+    memo = _load_memo()
+    live = {path: entry for path, entry in memo.items() if os.path.exists(path)}
+    if len(live) != len(memo):
+        _save_memo(live, replace=True)
+
+    logger.info(f"Evicted {len(removed)} stale artifacts under {base_dir}")
+    return removed
@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+
+# Keys produced by DataFrame.describe(include="all"), in the same order
+DESCRIBE_KEYS = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class QuantileSketch:
+    """
+    Mergeable approximate quantile sketch (KLL-style compactor hierarchy).
+    Level i holds items of weight 2**i; a level is halved into the next one whenever it
+    exceeds k items, so memory is O(k log n) regardless of the number of rows.
+    """
+
+    def __init__(self, k: int = 2048, seed: int = 0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values.astype(float)])
+            self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        for i, level in enumerate(other.levels):
+            if i == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[i] = np.concatenate([self.levels[i], level])
+        self._compress()
+
+    def _compress(self):
+        i = 0
+        while i < len(self.levels):
+            level = self.levels[i]
+            if len(level) > self.k:
+                level = np.sort(level)
+                # Keep an odd leftover at this level, promote every other item (random offset)
+                keep = level[-1:] if len(level) % 2 else level[:0]
+                body = level[:len(level) - len(keep)]
+                promoted = body[self._rng.integers(0, 2)::2]
+                self.levels[i] = keep
+                if i + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[i + 1] = np.concatenate([self.levels[i + 1], promoted])
+            i += 1
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return [np.nan for _ in qs]
+        weights = np.concatenate([np.full(len(level), 2.0 ** i) for i, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        return [float(items[min(np.searchsorted(cum, q * cum[-1], side="left"), len(items) - 1)]) for q in qs]
+
+
+class HyperLogLog:
+    """
+    Mergeable distinct-count estimator over 64-bit hashes (2**p one-byte registers).
+    """
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        hashes = hashes.astype(np.uint64)
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Rank = position of the leftmost 1-bit in the remaining (64 - p) bits
+        bit_length = np.zeros(len(rest), dtype=np.int64)
+        nonzero = rest > 0
+        bit_length[nonzero] = np.frexp(rest[nonzero].astype(float))[1]
+        rank = (64 - self.p) - bit_length + 1
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(float))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+
+class TopKCounter:
+    """
+    Bounded frequent-items counter. Exact for columns with at most `capacity` distinct values,
+    approximate otherwise (only the `capacity` most frequent values are kept between chunks).
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counts = {}
+
+    def update_counts(self, counts: dict):
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        if len(self.counts) > self.capacity:
+            kept = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:self.capacity]
+            self.counts = dict(kept)
+
+    def merge(self, other: "TopKCounter"):
+        self.update_counts(other.counts)
+
+    def top(self):
+        if not self.counts:
+            return np.nan, np.nan
+        value, count = max(self.counts.items(), key=lambda kv: kv[1])
+        return value, count
+
+
+def _promote(current, new):
+    """
+    dtype of a column seen across chunks (e.g. int64 + float64 -> float64, anything + object -> object).
+    Categorical chunks with different categories stay categorical.
+    """
+    if current is None or current == new:
+        return new
+    if isinstance(current, pd.CategoricalDtype) and isinstance(new, pd.CategoricalDtype):
+        return pd.CategoricalDtype()
+    try:
+        return np.result_type(current, new)
+    except TypeError:
+        return np.dtype(object)
+
+
+class ColumnStats:
+    """
+    Mergeable single-pass statistics for one column: counts, nulls, min/max,
+    Welford mean/variance, approximate quantiles, distinct count and most frequent value.
+    A column that turns out not to be numeric (a later chunk or merged part is not) drops
+    its numeric statistics; its most frequent value then covers the non-numeric chunks only.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.count = 0
+        self.numeric = True
+        self.dtype = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.quantiles = QuantileSketch()
+        self.distinct = HyperLogLog()
+        self.top = TopKCounter()
+
+    def update(self, series: pd.Series):
+        self.rows += len(series)
+        self.dtype = _promote(self.dtype, series.dtype)
+        values = series.dropna()
+        n = len(values)
+        if not n:
+            return
+        self.count += n
+        self.distinct.update_hashes(pd.util.hash_array(values.to_numpy()))
+
+        if self.numeric and pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            arr = values.to_numpy(dtype=float)
+            self._merge_moments(n, float(arr.mean()), float(((arr - arr.mean()) ** 2).sum()))
+            self.min = np.fmin(self.min, arr.min())
+            self.max = np.fmax(self.max, arr.max())
+            self.quantiles.update(arr)
+        else:
+            self._drop_numeric()
+            counts = values.value_counts(sort=False)
+            # Categorical columns also count the categories absent from this chunk
+            self.top.update_counts(counts[counts > 0].to_dict())
+
+    def _drop_numeric(self):
+        # Moments and quantiles of earlier numeric chunks must not mix into a non-numeric report
+        if self.numeric:
+            self.numeric = False
+            self.mean, self.m2 = 0.0, 0.0
+            self.min = self.max = np.nan
+            self.quantiles = QuantileSketch()
+
+    def _merge_moments(self, n_b, mean_b, m2_b):
+        # Chan et al. parallel form of Welford's update
+        n_a = self.count - n_b
+        delta = mean_b - self.mean
+        total = n_a + n_b
+        self.mean += delta * n_b / total
+        self.m2 += m2_b + delta * delta * n_a * n_b / total
+
+    def merge(self, other: "ColumnStats"):
+        self.rows += other.rows
+        if other.dtype is not None:
+            self.dtype = _promote(self.dtype, other.dtype)
+        if not other.numeric:
+            self._drop_numeric()
+        if other.count:
+            self.count += other.count
+            if self.numeric:
+                self._merge_moments(other.count, other.mean, other.m2)
+                self.min = np.fmin(self.min, other.min)
+                self.max = np.fmax(self.max, other.max)
+        if self.numeric:
+            self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+        self.top.merge(other.top)
+
+    @property
+    def nulls(self) -> int:
+        return self.rows - self.count
+
+    def describe(self) -> dict:
+        """
+        Same keys as DataFrame.describe(include="all") for this column.
+        """
+        stats = dict.fromkeys(DESCRIBE_KEYS, np.nan)
+        stats["count"] = float(self.count)
+        if self.numeric:
+            q25, q50, q75 = self.quantiles.quantiles([0.25, 0.5, 0.75])
+            stats.update({
+                "mean": self.mean if self.count else np.nan,
+                "std": float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan,
+                "min": self.min, "25%": q25, "50%": q50, "75%": q75, "max": self.max,
+            })
+        else:
+            top, freq = self.top.top()
+            stats.update({"unique": self.distinct.count(), "top": top, "freq": freq})
+        return stats
+
+
+class FrameStats:
+    """
+    Streaming validation state for a whole table: one ColumnStats per column plus duplicate
+    detection on 64-bit row hashes. Duplicates are counted exactly from the kept hashes up to
+    EXACT_DUPLICATE_ROWS rows (8 bytes per row, 8 MB at most); past that the hashes are
+    dropped and duplicates are estimated as rows minus a HyperLogLog distinct count
+    (about 0.4% relative error on the distinct count), so memory does not grow with the rows.
+    """
+
+    EXACT_DUPLICATE_ROWS = 1_000_000
+
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+        self.row_hashes = []
+        self.row_distinct = HyperLogLog(p=16)
+
+    def update(self, chunk: pd.DataFrame):
+        for col in chunk.columns:
+            self.columns.setdefault(col, ColumnStats()).update(chunk[col])
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        self.rows += len(hashes)
+        self.row_distinct.update_hashes(hashes)
+        if self.row_hashes is not None:
+            self.row_hashes.append(hashes)
+            if self.rows > self.EXACT_DUPLICATE_ROWS:
+                self.row_hashes = None
+
+    @property
+    def duplicates_count(self) -> int:
+        if self.row_hashes is None:
+            return max(0, self.rows - self.row_distinct.count())
+        if not self.row_hashes:
+            return 0
+        hashes = np.concatenate(self.row_hashes)
+        return int(len(hashes) - len(np.unique(hashes)))
+
+    def report(self) -> dict:
+        return {
+            "missing_values": {col: stats.nulls for col, stats in self.columns.items()},
+            "duplicates_count": self.duplicates_count,
+            "data_types": {col: str(stats.dtype) for col, stats in self.columns.items()},
+            "summary_stats": {col: stats.describe() for col, stats in self.columns.items()},
+        }
@@ -0,0 +1,195 @@
+import os
+import csv
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("synthetic_data")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE_CSV = os.path.join(PIPELINE_DIR, "csv_data.csv")
+REFERENCE_SQL = os.path.join(PIPELINE_DIR, "1_problem_formulation", "insert_data.sql")
+
+SIZES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+CHUNK_ROWS = 500_000
+DB_TABLE = "customer_data"
+DB_COLUMNS = ["customerID", "tenure", "MonthlyCharges", "TotalCharges"]
+
+# customerID is NNNN-XXXXX: 10^4 digit blocks times 26^5 letter blocks. Row numbers are
+# spread over that space with a multiplicative bijection, so IDs are unique and look random.
+ID_SPACE = 10_000 * 26 ** 5
+ID_MULTIPLIER = 73_430_942_007  # ~0.618 * ID_SPACE, coprime with it (prime factors 2, 5 and 13)
+ID_OFFSET = 1_234_567
+
+# Limits of the reference data
+MAX_TENURE = 72
+MIN_MONTHLY, MAX_MONTHLY = 18.25, 118.75
+
+
+# -------------------------
+# Reference distributions
+# -------------------------
+def load_reference(csv_file: str = REFERENCE_CSV, sql_file: str = REFERENCE_SQL) -> pd.DataFrame:
+    """
+    The shipped 7,043 customers: CSV attributes joined with the tenure and charges of insert_data.sql.
+    """
+    attributes = pd.read_csv(csv_file, dtype=str)
+    rows = []
+    with open(sql_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.lstrip().upper().startswith("INSERT INTO"):
+                values = line[line.index("(") + 1:line.rindex(")")]
+                rows.append(next(csv.reader([values], quotechar="'", skipinitialspace=True)))
+    charges = pd.DataFrame(rows, columns=DB_COLUMNS)
+    charges["tenure"] = charges["tenure"].astype(int)
+    charges["MonthlyCharges"] = charges["MonthlyCharges"].astype(float)
+    return attributes.merge(charges, on="customerID", how="inner")
+
+
+def customer_ids(start: int, count: int) -> np.ndarray:
+    """
+    Deterministic unique customerIDs for rows start .. start + count - 1.
+    """
+    n = (np.arange(start, start + count, dtype=np.int64) * ID_MULTIPLIER + ID_OFFSET) % ID_SPACE
+    digits = n % 10_000
+    letters = n // 10_000
+    parts = [np.char.zfill(digits.astype(str), 4), np.full(count, "-")]
+    for power in range(4, -1, -1):
+        parts.append(np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))[(letters // 26 ** power) % 26])
+    ids = parts[0]
+    for part in parts[1:]:
+        ids = np.char.add(ids, part)
+    return ids
+
+
+def generate_chunk(reference: pd.DataFrame, start: int, rows: int, seed: int):
+    """
+    rows synthetic customers. Attributes and churn are drawn jointly from a reference customer
+    (keeping dependencies such as "No internet service" and the churn correlations); tenure
+    and charges are that customer's values with noise. New customers (tenure 0) get the blank
+    ' ' TotalCharges of the source system. Returns the CSV-side and SQLite-side frames.
+    """
+    rng = np.random.default_rng([seed, start])
+    picks = rng.integers(0, len(reference), rows)
+    ref = reference.iloc[picks].reset_index(drop=True)
+
+    ids = customer_ids(start, rows)
+    attributes = ref.drop(columns=DB_COLUMNS[1:]).assign(customerID=ids)
+
+    ref_tenure = ref["tenure"].to_numpy()
+    tenure = np.where(ref_tenure == 0, 0,
+                      np.clip(ref_tenure + rng.integers(-2, 3, rows), 1, MAX_TENURE))
+    monthly = np.clip(np.round((ref["MonthlyCharges"].to_numpy() + rng.normal(0.0, 1.5, rows)) * 20) / 20,
+                      MIN_MONTHLY, MAX_MONTHLY)
+    total = np.round(tenure * monthly * rng.normal(1.0, 0.03, rows), 2)
+    total_text = np.where(tenure == 0, " ", total.astype(str))
+
+    charges = pd.DataFrame({"customerID": ids, "tenure": tenure, "MonthlyCharges": monthly,
+                            "TotalCharges": total_text})
+    return attributes, charges
+
+
+# -------------------------
+# Writers
+# -------------------------
+def generate_dataset(out_dir: str, rows: int, seed: int = 42, sql_dump: bool = False) -> dict:
+    """
+    Write rows synthetic customers to out_dir, split like the real sources:
+      csv_data.csv        customer attributes and Churn (same columns as the shipped CSV)
+      customer_db.sqlite  customer_data(customerID, tenure, MonthlyCharges, TotalCharges), all TEXT
+      insert_data.sql     the same table as an INSERT-per-row dump (only with sql_dump)
+      ingestion_sources.json  an ingestion config pointing at the two sources (TELCO_INGESTION_CONFIG)
+    Output depends only on rows and seed. Returns the manifest (also written as manifest.json).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    start_time = time.perf_counter()
+    reference = load_reference()
+    csv_file = os.path.join(out_dir, "csv_data.csv")
+    db_file = os.path.join(out_dir, "customer_db.sqlite")
+    sql_file = os.path.join(out_dir, "insert_data.sql")
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(f"CREATE TABLE {DB_TABLE} (customerID TEXT, tenure TEXT, MonthlyCharges TEXT, TotalCharges TEXT)")
+    dump = open(sql_file, "w", encoding="utf-8") if sql_dump else None
+    try:
+        if dump:
+            dump.write(f"DROP TABLE IF EXISTS {DB_TABLE};\n")
+            dump.write(f"CREATE TABLE {DB_TABLE} (customerID TEXT, tenure TEXT, MonthlyCharges TEXT, TotalCharges TEXT);\n")
+        for start in range(0, rows, CHUNK_ROWS):
+            attributes, charges = generate_chunk(reference, start, min(CHUNK_ROWS, rows - start), seed)
+            attributes.to_csv(csv_file, mode="w" if start == 0 else "a", header=start == 0, index=False)
+            # TEXT affinity stores the numbers as text, like the source system
+            records = list(charges.itertuples(index=False, name=None))
+            conn.executemany(f"INSERT INTO {DB_TABLE} VALUES (?, ?, ?, ?)", records)
+            conn.commit()
+            if dump:
+                dump.writelines(f"INSERT INTO {DB_TABLE} VALUES ('{c}', '{t}', '{m}', '{tc}');\n"
+                                for c, t, m, tc in records)
+            logger.info(f"Generated {start + len(charges):,} / {rows:,} rows")
+    finally:
+        conn.close()
+        if dump:
+            dump.close()
+
+    sources = {
+        "max_workers": 2,
+        "executor": "thread",
+        "sources": [
+            {"name": "csv_data", "type": "csv", "path": csv_file},
+            {"name": "customer_db", "type": "sqlite", "path": db_file, "table": DB_TABLE},
+        ],
+    }
+    with open(os.path.join(out_dir, "ingestion_sources.json"), "w") as f:
+        json.dump(sources, f, indent=2)
+
+    manifest = {"rows": rows, "seed": seed, "sql_dump": sql_dump,
+                "seconds": round(time.perf_counter() - start_time, 2)}
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"Synthetic dataset with {rows:,} customers written to {out_dir} in {manifest['seconds']}s")
+    return manifest
+
+
+def ensure_dataset(out_dir: str, rows: int, seed: int = 42, sql_dump: bool = False) -> dict:
+    """
+    Reuse a dataset already generated in out_dir with the same parameters, generate it otherwise.
+    """
+    try:
+        with open(os.path.join(out_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+        if manifest["rows"] == rows and manifest["seed"] == seed and (manifest["sql_dump"] or not sql_dump):
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    return generate_dataset(out_dir, rows, seed, sql_dump)
+
+
+def parse_size(size: str) -> int:
+    return SIZES[size.lower()] if size.lower() in SIZES else int(size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic Telco churn dataset (CSV + SQLite sources).")
+    parser.add_argument("--size", default="100k", help=f"row count or one of {', '.join(SIZES)}")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sql-dump", action="store_true", help="also write insert_data.sql for db_creation")
+    args = parser.parse_args()
+    generate_dataset(args.out, parse_size(args.size), args.seed, args.sql_dump)
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import fcntl
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------
+# Setup logging
+# -------------------------
+logger = logging.getLogger("tracking")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+# log_batch accepts at most this many params per call
+MAX_PARAMS_PER_BATCH = 100
+
+
+class Tracker:
+    """
+    Thin MLflow tracking layer whose cost per run does not grow with the experiment:
+      - the experiment is resolved (or created) once and cached,
+      - run numbers come from a file counter incremented under an exclusive lock,
+        instead of loading every past run with search_runs,
+      - params and metrics are sent with one log_batch call,
+      - model artifacts are written and registered on a background thread, so training
+        returns as soon as the run is created.
+    MLflow is imported on first use and nothing global is set at import time.
+    """
+
+    def __init__(self, tracking_uri: str, experiment_name: str, state_dir: str):
+        self.tracking_uri = tracking_uri
+        self.experiment_name = experiment_name
+        self.counter_file = os.path.join(state_dir, "run_counters.json")
+        os.makedirs(state_dir, exist_ok=True)
+        self._client = None
+        self._experiment_id = None
+        self._lock = threading.Lock()
+        self._uploads = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mlflow-upload")
+        self._pending = []
+
+    @property
+    def client(self):
+        if self._client is None:
+            import mlflow
+            from mlflow.tracking import MlflowClient
+
+            # register_model resolves the registry from the global tracking URI
+            mlflow.set_tracking_uri(self.tracking_uri)
+            self._client = MlflowClient(tracking_uri=self.tracking_uri)
+        return self._client
+
+    @property
+    def experiment_id(self) -> str:
+        if self._experiment_id is None:
+            with self._lock:
+                if self._experiment_id is None:
+                    experiment = self.client.get_experiment_by_name(self.experiment_name)
+                    self._experiment_id = experiment.experiment_id if experiment else \
+                        self.client.create_experiment(self.experiment_name)
+        return self._experiment_id
+
+    # -------------------------
+    # Run numbering
+    # -------------------------
+    def _existing_run_count(self) -> int:
+        """
+        Seed for a counter that does not exist yet: the number of top-level runs already in a
+        local file store (one directory listing, done once per experiment). Nested runs, such
+        as the per-trial runs of a tuning sweep, carry a mlflow.parentRunId tag and are not
+        numbered, so they are not counted.
+        """
+        if not self.tracking_uri.startswith("file:"):
+            return 0
+        experiment_dir = os.path.join(self.tracking_uri[len("file:"):], self.experiment_id)
+        if not os.path.isdir(experiment_dir):
+            return 0
+        return sum(1 for entry in os.scandir(experiment_dir)
+                   if entry.is_dir() and os.path.exists(os.path.join(entry.path, "meta.yaml"))
+                   and not os.path.exists(os.path.join(entry.path, "tags", "mlflow.parentRunId")))
+
+    def next_run_number(self) -> int:
+        """
+        Next run number of the experiment, atomic across concurrent processes.
+        """
+        experiment_id = self.experiment_id
+        with open(self.counter_file + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            counters = {}
+            if os.path.exists(self.counter_file):
+                with open(self.counter_file, "r") as f:
+                    counters = json.load(f)
+            number = counters.get(experiment_id, self._existing_run_count()) + 1
+            counters[experiment_id] = number
+            tmp_file = self.counter_file + ".tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(counters, f)
+            os.replace(tmp_file, self.counter_file)
+        return number
+
+    # -------------------------
+    # Runs
+    # -------------------------
+    def start_run(self, run_name: str, parent_run_id: str = None) -> str:
+        """
+        Create a run (nested under parent_run_id if given) and return its run_id.
+        """
+        tags = {"mlflow.parentRunId": parent_run_id} if parent_run_id else None
+        return self.client.create_run(self.experiment_id, run_name=run_name, tags=tags).info.run_id
+
+    def log_batch(self, run_id: str, params: dict = None, metrics: dict = None):
+        from mlflow.entities import Metric, Param
+
+        timestamp = int(time.time() * 1000)
+        metric_list = [Metric(key, float(value), timestamp, 0) for key, value in (metrics or {}).items()]
+        param_list = [Param(key, str(value)) for key, value in (params or {}).items()]
+        for start in range(0, max(len(param_list), 1), MAX_PARAMS_PER_BATCH):
+            self.client.log_batch(run_id, metrics=metric_list if start == 0 else [],
+                                  params=param_list[start:start + MAX_PARAMS_PER_BATCH])
+
+    def end_run(self, run_id: str, status: str = "FINISHED"):
+        self.client.set_terminated(run_id, status)
+
+    def _log_model(self, run_id: str, model, artifact_path: str, registered_model_name: str = None):
+        import mlflow
+        import mlflow.sklearn
+
+        start = time.perf_counter()
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                local_path = os.path.join(tmp_dir, artifact_path)
+                mlflow.sklearn.save_model(model, local_path)
+                self.client.log_artifacts(run_id, local_path, artifact_path)
+            if registered_model_name:
+                mlflow.register_model(f"runs:/{run_id}/{artifact_path}", registered_model_name)
+        except Exception:
+            logger.exception(f"Failed to log model for run {run_id}")
+            self.end_run(run_id, "FAILED")
+            raise
+        self.end_run(run_id)
+        logger.info(f"Model for run {run_id} written in the background in {time.perf_counter() - start:.2f}s")
+        return run_id
+
+    def log_model_async(self, run_id: str, model, artifact_path: str, registered_model_name: str = None):
+        """
+        Save, upload and (optionally) register an sklearn model on the upload thread, then
+        finish the run. Returns a Future; the interpreter waits for it before exiting.
+        """
+        future = self._uploads.submit(self._log_model, run_id, model, artifact_path, registered_model_name)
+        self._pending.append(future)
+        return future
+
+    def wait(self):
+        """
+        Block until every background model upload has finished (re-raising failures).
+        """
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
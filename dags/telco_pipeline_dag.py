@@ -1,7 +1,18 @@
+import os
+import sys
 from airflow import DAG
-from airflow.operators.bash import BashOperator
+from airflow.decorators import task, task_group
+from airflow.operators.python import PythonOperator
 from datetime import datetime
 
+# Stage modules are imported inside the tasks, so parsing this file stays cheap
+sys.path.insert(0, "/opt/airflow/dags/assignment_telco")
+from telco_common.pipeline import EXECUTION_MODE  # noqa: E402
+
+# "tasks" runs one PythonOperator per stage, "single_process" runs the whole chain
+# in one task (one interpreter, DataFrames handed between stages in memory)
+PIPELINE_MODE = os.environ.get("TELCO_PIPELINE_MODE", "tasks")
+
 default_args = {
     'owner': 'airflow',
     'depends_on_past': False,
@@ -9,47 +20,97 @@ default_args = {
     'retries': 1,
 }
 
-with DAG(
-    dag_id='telco_data_pipeline',
-    default_args=default_args,
-    description='Telco End-to-End Data Pipeline',
-    schedule_interval=None,
-    catchup=False,
-) as dag:
 
-    db_creation = BashOperator(
-        task_id='db_creation',
-        bash_command='python /opt/airflow/dags/assignment_telco/1_problem_formulation/db_creation.py'
-    )
+def push_metrics(ti):
+    from telco_common.instrumentation import drain
 
-    ingestion = BashOperator(
-        task_id='data_ingestion',
-        bash_command='python /opt/airflow/dags/assignment_telco/2_data_ingestion/data_ingestion.py'
-    )
+    # Wall/CPU time, peak RSS and rows of the stage and its sub-steps
+    ti.xcom_push(key="metrics", value=drain())
 
-    validation = BashOperator(
-        task_id='data_validation',
-        bash_command='python /opt/airflow/dags/assignment_telco/4_data_validation/data_validation.py'
-    )
 
-    preparation = BashOperator(
-        task_id='data_preparation',
-        bash_command='python /opt/airflow/dags/assignment_telco/5_data_preparation/data_preparation.py'
-    )
+def run_stage(stage, ti):
+    from telco_common.pipeline import run_stage as run_pipeline_stage
 
-    storage = BashOperator(
-        task_id='data_storage',
-        bash_command='python /opt/airflow/dags/assignment_telco/6_data_storage/data_storage.py'
-    )
+    # Stage results (DataFrames, reports) stay out of XCom
+    run_pipeline_stage(stage)
+    push_metrics(ti)
 
-    feature_store = BashOperator(
-        task_id='feature_store',
-        bash_command='python /opt/airflow/dags/assignment_telco/7_feature_store/feature_store.py'
-    )
 
-    model_building = BashOperator(
-        task_id='model_building',
-        bash_command='python /opt/airflow/dags/assignment_telco/9_model_building/model_building.py'
+def run_pipeline(ti):
+    from telco_common.pipeline import run_pipeline as run_all_stages
+
+    run_all_stages()
+    push_metrics(ti)
+
+
+@task
+def ingestion_sources():
+    from telco_common.pipeline import load_stage
+
+    return load_stage("data_ingestion").plan_ingestion()
+
+
+@task
+def ingest_source(source, ti=None):
+    from telco_common.pipeline import load_stage
+
+    load_stage("data_ingestion").ingest_source(source)
+    push_metrics(ti)
+    return source
+
+
+@task
+def validate_source(source, ti=None):
+    from telco_common.pipeline import load_stage
+
+    load_stage("data_validation").validate_source(source)
+    push_metrics(ti)
+
+
+@task_group
+def source_branch(source):
+    # Each configured source is ingested and then validated on its own,
+    # so one slow or retried source does not hold back the others
+    validate_source(ingest_source(source))
+
+
+def stage_task(stage):
+    return PythonOperator(
+        task_id=stage,
+        python_callable=run_stage,
+        op_args=[stage],
     )
 
-    db_creation >> ingestion >> validation >> preparation >> storage >> feature_store >> model_building
+
+with DAG(
+    dag_id='telco_data_pipeline',
+    default_args=default_args,
+    description='Telco End-to-End Data Pipeline',
+    schedule_interval=None,
+    catchup=False,
+) as dag:
+
+    if PIPELINE_MODE == "single_process":
+        pipeline = PythonOperator(
+            task_id='telco_pipeline',
+            python_callable=run_pipeline,
+        )
+    else:
+        db_creation = stage_task('db_creation')
+        sources = source_branch.expand(source=ingestion_sources())
+        storage = stage_task('data_storage')
+        feature_store = stage_task('feature_store')
+        model_building = stage_task('model_building')
+        batch_scoring = stage_task('batch_scoring')
+
+        # Ingestion reads the source systems, not customer_db_test.sqlite, so building the
+        # database overlaps with ingestion/validation; storage writes to it and waits for both
+        if EXECUTION_MODE == "sql_pushdown":
+            # data_storage joins the source systems itself inside SQLite
+            sources >> storage
+        else:
+            sources >> stage_task('data_preparation') >> storage
+        db_creation >> storage
+        # Registering feature metadata and training only share processed_data as input
+        storage >> [feature_store, model_building]
+        model_building >> batch_scoring
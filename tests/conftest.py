@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# Pipeline modules read TELCO_BASE_DIR (and create directories under it) at import time:
+# point it at a scratch directory before any of them is imported
+os.environ["TELCO_BASE_DIR"] = tempfile.mkdtemp(prefix="telco_tests_")
+os.environ.pop("TELCO_FEATURE_DB", None)
+os.environ.pop("TELCO_FEATURE_SNAPSHOT_DIR", None)
+
+PIPELINE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dags", "assignment_telco")
+# Stage scripts are imported by module name, like Airflow's DAG file runs them
+for path in (os.path.join(PIPELINE_DIR, "6_data_storage"), os.path.join(PIPELINE_DIR, "7_feature_store"), PIPELINE_DIR):
+    sys.path.insert(0, path)
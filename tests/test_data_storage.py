@@ -0,0 +1,90 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from data_storage import digest_table, schema_for_upsert, upsert_dataframe
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "db.sqlite", isolation_level=None)
+    conn.execute("CREATE TABLE processed_data (customerID TEXT PRIMARY KEY, tenure INTEGER, MonthlyCharges REAL, Contract TEXT)")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def customers():
+    return pd.DataFrame({
+        "customerID": [f"C{i}" for i in range(10)],
+        "tenure": pd.Series(range(10), dtype="int16"),
+        "MonthlyCharges": [20.5 + i for i in range(10)],
+        "Contract": pd.Categorical(["Month-to-month", "One year"] * 5),
+    })
+
+
+def table(conn) -> pd.DataFrame:
+    return pd.read_sql_query("SELECT * FROM processed_data ORDER BY customerID", conn)
+
+
+def expected(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({"tenure": "int64", "Contract": object}).sort_values("customerID").reset_index(drop=True)
+
+
+def test_first_load_writes_every_row(conn, customers):
+    assert upsert_dataframe(conn, customers, "processed_data") == 10
+    pd.testing.assert_frame_equal(table(conn), expected(customers))
+    assert conn.execute(f"SELECT COUNT(*) FROM {digest_table('processed_data')}").fetchone()[0] == 10
+
+
+def test_unchanged_load_writes_nothing(conn, customers):
+    upsert_dataframe(conn, customers, "processed_data")
+    # Same values with other dtypes (as read from CSV instead of the Arrow zone) are unchanged too
+    assert upsert_dataframe(conn, customers.astype({"tenure": "int64", "Contract": object}), "processed_data") == 0
+
+
+def test_changed_and_dropped_customers(conn, customers):
+    upsert_dataframe(conn, customers, "processed_data")
+    update = customers.drop(index=[0, 1, 2]).copy()
+    update.loc[5, "MonthlyCharges"] = 99.99
+    update.loc[6, "Contract"] = "One year"
+
+    assert upsert_dataframe(conn, update, "processed_data") == 3 + 1 + 1
+    pd.testing.assert_frame_equal(table(conn), expected(update))
+
+    # The dropped customers come back as inserts
+    assert upsert_dataframe(conn, customers, "processed_data") == 3 + 2
+    pd.testing.assert_frame_equal(table(conn), expected(customers))
+
+
+def test_missing_digests_fall_back_to_value_comparison(conn, customers):
+    upsert_dataframe(conn, customers, "processed_data")
+    # A replace or SQL-pushdown load rewrites rows and drops the digest table
+    conn.execute(f"DROP TABLE {digest_table('processed_data')}")
+    conn.execute("UPDATE processed_data SET tenure = 70 WHERE customerID = 'C3'")
+
+    assert upsert_dataframe(conn, customers, "processed_data") == 1
+    pd.testing.assert_frame_equal(table(conn), expected(customers))
+    assert upsert_dataframe(conn, customers, "processed_data") == 0
+
+
+def test_digests_out_of_step_with_table_are_rebuilt(conn, customers):
+    upsert_dataframe(conn, customers, "processed_data")
+    conn.execute("DELETE FROM processed_data WHERE customerID = 'C4'")
+    assert upsert_dataframe(conn, customers, "processed_data") == 1
+    assert table(conn)["customerID"].tolist() == sorted(customers["customerID"])
+
+
+def test_failed_upsert_rolls_back(conn, customers):
+    upsert_dataframe(conn, customers, "processed_data")
+    broken = customers.assign(Unknown=1)
+    with pytest.raises(sqlite3.OperationalError):
+        upsert_dataframe(conn, broken.drop(index=[0]), "processed_data")
+    assert len(table(conn)) == 10
+    assert not conn.in_transaction
+
+
+def test_schema_for_upsert_keeps_existing_rows():
+    sql = "DROP TABLE IF EXISTS processed_data;\nCREATE TABLE processed_data (customerID TEXT PRIMARY KEY);"
+    assert schema_for_upsert(sql).strip() == "CREATE TABLE IF NOT EXISTS processed_data (customerID TEXT PRIMARY KEY);"
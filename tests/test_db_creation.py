@@ -0,0 +1,86 @@
+import os
+import sqlite3
+
+import pytest
+
+from telco_common.pipeline import load_stage
+
+db_creation = load_stage("db_creation")
+
+
+def rows(db_file, table="customer_data"):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute(f"SELECT * FROM {table} ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def dump(tmp_path):
+    sql_file = tmp_path / "insert_data.sql"
+    sql_file.write_text(
+        "DROP TABLE IF EXISTS customer_data;\n"
+        "CREATE TABLE customer_data (customerID TEXT, tenure TEXT, MonthlyCharges TEXT, TotalCharges TEXT);\n"
+        "INSERT INTO customer_data VALUES ('7590-VHVEG', '1', '29.85', '29.85');\n"
+        "INSERT INTO customer_data VALUES ('4472-LVYGI', '0', '52.55', ' ');\n"
+        "INSERT INTO customer_data VALUES ('O''Brien-1', '34', '56.95', '1889.5');\n"
+    )
+    return str(sql_file)
+
+
+def test_bulk_load_matches_script_mode(tmp_path, dump):
+    script_db, bulk_db = str(tmp_path / "script.sqlite"), str(tmp_path / "bulk.sqlite")
+    db_creation.create_db_file(script_db, dump)
+    assert db_creation.bulk_load_db(bulk_db, dump) == 3
+
+    assert rows(bulk_db) == [db_creation.coerce_row(row) for row in rows(script_db)]
+    assert rows(bulk_db)[1] == ("4472-LVYGI", 0, 52.55, None)
+
+
+def test_bulk_load_of_the_shipped_dump_matches_script_mode(tmp_path):
+    script_db, bulk_db = str(tmp_path / "script.sqlite"), str(tmp_path / "bulk.sqlite")
+    db_creation.create_db_file(script_db, db_creation.SQL_FILE)
+    db_creation.bulk_load_db(bulk_db, db_creation.SQL_FILE, batch_size=1_000)
+    assert rows(bulk_db) == [db_creation.coerce_row(row) for row in rows(script_db)]
+
+
+def test_csv_source(tmp_path):
+    csv_file = tmp_path / "customers.csv"
+    csv_file.write_text("gender,customerID,tenure,MonthlyCharges,TotalCharges\nMale,A,2,10.5,21\nFemale,B,0,5, \n")
+    db_file = str(tmp_path / "db.sqlite")
+    assert db_creation.bulk_load_db(db_file, str(csv_file)) == 2
+    assert rows(db_file) == [("A", 2, 10.5, 21.0), ("B", 0, 5.0, None)]
+
+
+def test_swap_leaves_the_rest_of_the_database_alone(tmp_path, dump):
+    db_file = str(tmp_path / "db.sqlite")
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE processed_data (customerID TEXT PRIMARY KEY)")
+    conn.execute("INSERT INTO processed_data VALUES ('kept')")
+    conn.commit()
+    conn.close()
+
+    db_creation.bulk_load_db(db_file, dump)
+    db_creation.bulk_load_db(db_file, dump)
+
+    assert len(rows(db_file)) == 3
+    assert rows(db_file, "processed_data") == [("kept",)]
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    conn.close()
+    assert not os.path.exists(f"{db_file}.staging")
+
+
+def test_failed_load_keeps_the_previous_table(tmp_path, dump):
+    db_file = str(tmp_path / "db.sqlite")
+    db_creation.bulk_load_db(db_file, dump)
+    broken = tmp_path / "broken.csv"
+    broken.write_text("customerID,tenure,MonthlyCharges,TotalCharges\nA,not a number,1,1\n")
+
+    with pytest.raises(ValueError):
+        db_creation.bulk_load_db(db_file, str(broken))
+    assert len(rows(db_file)) == 3
+    assert not os.path.exists(f"{db_file}.staging")
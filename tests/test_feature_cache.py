@@ -0,0 +1,115 @@
+import sqlite3
+
+import pytest
+
+import feature_store
+from feature_store import FEATURE_DEFINITIONS, FeatureCache, FeatureStoreClient
+from telco_common.feature_engine import bump_generation, ensure_feature_metadata
+
+FEATURES = [f[0] for f in FEATURE_DEFINITIONS]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(feature_store.time, "monotonic", clock)
+    return clock
+
+
+def test_lru_eviction():
+    cache = FeatureCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    # "b" was the least recently used entry
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = FeatureCache(ttl_seconds=10)
+    cache.put("a", 1)
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (1, 1, 1, 0)
+
+
+def test_new_generation_drops_every_entry():
+    cache = FeatureCache()
+    cache.set_generation(1)
+    cache.put("a", 1)
+    cache.set_generation(1)
+    assert cache.get("a") == 1
+    cache.set_generation(2)
+    assert cache.get("a") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    db_file = str(tmp_path / "features.sqlite")
+    conn = sqlite3.connect(db_file)
+    conn.execute(f"CREATE TABLE processed_data (customerID TEXT PRIMARY KEY, {', '.join(f + ' REAL' for f in FEATURES)})")
+    conn.executemany(f"INSERT INTO processed_data VALUES (?{', ?' * len(FEATURES)})",
+                     [(f"C{i}", *[float(i)] * len(FEATURES)) for i in range(50)])
+    ensure_feature_metadata(conn)
+    conn.executemany("INSERT INTO feature_metadata (feature_name, description, source, version) VALUES (?, ?, ?, ?)",
+                     FEATURE_DEFINITIONS)
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def test_client_serves_from_cache_until_the_generation_changes(db_file, monkeypatch):
+    monkeypatch.setattr(FeatureStoreClient, "GENERATION_CHECK_INTERVAL", 0.0)
+    client = FeatureStoreClient(db_file, cache=FeatureCache())
+    assert client.get_customer_features("C1")[1] == 1.0
+
+    writer = sqlite3.connect(db_file)
+    writer.execute(f"UPDATE processed_data SET {FEATURES[0]} = 42 WHERE customerID = 'C1'")
+    writer.commit()
+    assert client.get_customer_features("C1")[1] == 1.0
+
+    bump_generation(writer)
+    writer.commit()
+    writer.close()
+    assert client.get_customer_features("C1")[1] == 42.0
+    client.close()
+
+
+def test_bulk_lookups_fetch_only_misses(db_file):
+    client = FeatureStoreClient(db_file, cache=FeatureCache())
+    fetched = []
+    fetch_rows = client.fetch_rows
+    client.fetch_rows = lambda ids: fetched.append(list(ids)) or fetch_rows(ids)
+
+    rows = client.get_bulk_features(["C1", "C2", "missing"])
+    assert sorted(row[0] for row in rows) == ["C1", "C2"]
+    rows = client.get_bulk_features(["C2", "C3", "C1"])
+    assert sorted(row[0] for row in rows) == ["C1", "C2", "C3"]
+    # Unknown IDs are not cached, so they are looked up again
+    assert fetched == [["C1", "C2", "missing"], ["C3"]]
+    client.close()
+
+
+def test_bulk_lookup_large_and_padded_chunks(db_file, monkeypatch):
+    monkeypatch.setattr(FeatureStoreClient, "TEMP_TABLE_THRESHOLD", 40)
+    client = FeatureStoreClient(db_file)
+    ids = [f"C{i}" for i in range(45)] + ["C0"]
+    assert sorted(row[0] for row in client.get_bulk_features(ids)) == sorted(set(ids))
+    frame = client.get_bulk_features(["C7"], output="frame")
+    assert list(frame.columns) == ["customerID"] + FEATURES and frame.iloc[0, 1] == 7.0
+    client.close()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from telco_common import feature_engine
+from telco_common.feature_engine import FEATURE_REGISTRY, compute_features, feature_definitions, safe_divide
+
+FEATURES = ["AvgChargesPerMonth", "ExtraCharges", "LifetimeValue", "Tenure_Charges_Interaction"]
+
+
+def legacy_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
+    # data_storage.add_engineered_features before the feature registry (row-wise apply)
+    df = df.copy()
+    df["AvgChargesPerMonth"] = df.apply(lambda x: x["TotalCharges"] / x["tenure"] if x["tenure"] > 0 else 0, axis=1)
+    df["ExtraCharges"] = df["TotalCharges"] - (df["MonthlyCharges"] * df["tenure"])
+    df["LifetimeValue"] = df["tenure"] * df["MonthlyCharges"]
+    df["Tenure_Charges_Interaction"] = df["tenure"] * (df["MonthlyCharges"] / 100.0)
+    df[FEATURES] = df[FEATURES].round(2)
+    return df
+
+
+@pytest.fixture
+def customers():
+    rng = np.random.default_rng(7)
+    n = 2_000
+    tenure = rng.integers(0, 73, size=n)
+    monthly = np.round(rng.uniform(18, 120, size=n), 2)
+    total = np.round(tenure * monthly * rng.uniform(0.9, 1.1, size=n), 2)
+    return pd.DataFrame({
+        "customerID": [f"C{i:05d}" for i in range(n)],
+        "tenure": tenure.astype("int16"),
+        "MonthlyCharges": monthly,
+        "TotalCharges": total,
+    })
+
+
+def test_registry_matches_legacy_apply(customers):
+    expected = legacy_engineered_features(customers)
+    result = compute_features(customers)
+    assert list(result.columns) == list(expected.columns)
+    for name in FEATURES:
+        np.testing.assert_array_equal(result[name].to_numpy(), expected[name].to_numpy(dtype=float), err_msg=name)
+
+
+def test_zero_tenure_gives_zero_average(customers):
+    result = compute_features(customers.assign(tenure=0))
+    assert (result["AvgChargesPerMonth"] == 0).all()
+
+
+def test_compute_features_leaves_input_untouched(customers):
+    compute_features(customers)
+    assert not set(FEATURES) & set(customers.columns)
+
+
+def test_compute_selected_features(customers):
+    result = compute_features(customers, names=["LifetimeValue"])
+    assert "LifetimeValue" in result and "ExtraCharges" not in result
+
+
+def test_definitions_follow_registration_order():
+    assert [definition[0] for definition in feature_definitions()] == FEATURES
+
+
+def test_safe_divide_fills_non_positive_denominators():
+    out = safe_divide(np.array([1.0, 2.0, 3.0]), np.array([2.0, 0.0, -1.0]), fill=-1.0)
+    np.testing.assert_array_equal(out, [0.5, -1.0, -1.0])
+
+
+def test_registered_feature_is_computed_and_defined(customers, monkeypatch):
+    monkeypatch.setattr(feature_engine, "FEATURE_REGISTRY", dict(FEATURE_REGISTRY))
+    feature_engine.register_feature("ChargesRatio", "Monthly over total charges",
+                                     ["MonthlyCharges", "TotalCharges"],
+                                     lambda c: safe_divide(c["MonthlyCharges"], c["TotalCharges"]), decimals=3)
+    result = feature_engine.compute_features(customers)
+    assert list(result.columns)[-1] == "ChargesRatio"
+    expected = np.where(customers["TotalCharges"] > 0, customers["MonthlyCharges"] / customers["TotalCharges"], 0.0)
+    np.testing.assert_allclose(result["ChargesRatio"], np.round(expected, 3))
+    assert feature_engine.feature_definitions()[-1] == ("ChargesRatio", "Monthly over total charges", "processed_data", "v1")
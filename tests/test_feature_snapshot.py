@@ -0,0 +1,93 @@
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from telco_common.feature_snapshot import FeatureSnapshot, current_snapshot_dir, publish_snapshot
+
+FEATURES = ["LifetimeValue", "ExtraCharges"]
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    db_file = str(tmp_path / "db.sqlite")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE processed_data (customerID TEXT PRIMARY KEY, LifetimeValue REAL, ExtraCharges REAL)")
+    conn.executemany("INSERT INTO processed_data VALUES (?, ?, ?)",
+                     [(f"{i:04d}-ABCDE", i * 10.0, None if i == 3 else -float(i)) for i in range(100, 0, -1)])
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / "snapshots")
+
+
+def test_publish_and_look_up(db_file, root):
+    path = publish_snapshot(db_file, "processed_data", FEATURES, root=root)
+    assert os.path.realpath(current_snapshot_dir(root)) == os.path.realpath(path)
+
+    snapshot = FeatureSnapshot(root)
+    assert len(snapshot) == 100
+    assert snapshot.columns == ["customerID"] + FEATURES
+    assert snapshot.get_customer_features("0042-ABCDE") == ("0042-ABCDE", 420.0, -42.0)
+    assert snapshot.get_customer_features("0000-ABCDE") is None
+    assert snapshot.get_customer_features("9999-ZZZZZ") is None
+    assert np.isnan(snapshot.get_customer_features("0003-ABCDE")[2])
+
+
+def test_bulk_lookup_outputs(db_file, root):
+    publish_snapshot(db_file, "processed_data", FEATURES, root=root)
+    snapshot = FeatureSnapshot(root, feature_names=["ExtraCharges"])
+    ids = ["0007-ABCDE", "missing", "0001-ABCDE", "0007-ABCDE"]
+
+    assert snapshot.get_bulk_features(ids) == [("0007-ABCDE", -7.0), ("0001-ABCDE", -1.0)]
+    found, matrix = snapshot.get_bulk_features(ids, output="numpy")
+    assert found.tolist() == ["0007-ABCDE", "0001-ABCDE"] and matrix.shape == (2, 1)
+    frame = snapshot.get_bulk_features(ids, output="frame")
+    assert list(frame.columns) == ["customerID", "ExtraCharges"]
+    assert snapshot.get_bulk_features([]) == []
+
+
+def test_readers_follow_a_new_publish(db_file, root, monkeypatch):
+    publish_snapshot(db_file, "processed_data", FEATURES, root=root)
+    snapshot = FeatureSnapshot(root)
+    monkeypatch.setattr(FeatureSnapshot, "REFRESH_INTERVAL", 0.0)
+
+    conn = sqlite3.connect(db_file)
+    conn.execute("UPDATE processed_data SET LifetimeValue = 1.5 WHERE customerID = '0042-ABCDE'")
+    conn.commit()
+    conn.close()
+    assert snapshot.get_customer_features("0042-ABCDE")[1] == 420.0
+
+    publish_snapshot(db_file, "processed_data", FEATURES, root=root)
+    assert snapshot.get_customer_features("0042-ABCDE")[1] == 1.5
+
+
+def test_old_snapshots_are_pruned(db_file, root):
+    for _ in range(5):
+        latest = publish_snapshot(db_file, "processed_data", FEATURES, root=root)
+    names = sorted(name for name in os.listdir(root) if name.startswith("snapshot-"))
+    assert len(names) == 3 and names[-1] == os.path.basename(latest)
+    assert not [name for name in os.listdir(root) if name.endswith(".tmp")]
+
+
+def test_empty_table_and_missing_snapshot(tmp_path, root):
+    with pytest.raises(FileNotFoundError):
+        FeatureSnapshot(root)
+    db_file = str(tmp_path / "empty.sqlite")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE processed_data (customerID TEXT, LifetimeValue REAL, ExtraCharges REAL)")
+    conn.close()
+    publish_snapshot(db_file, "processed_data", FEATURES, root=root)
+    snapshot = FeatureSnapshot(root)
+    assert len(snapshot) == 0 and snapshot.get_customer_features("0001-ABCDE") is None
+
+
+def test_unknown_features_are_rejected(db_file, root):
+    publish_snapshot(db_file, "processed_data", FEATURES, root=root)
+    with pytest.raises(KeyError):
+        FeatureSnapshot(root, feature_names=["AvgChargesPerMonth"])
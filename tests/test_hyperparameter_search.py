@@ -0,0 +1,78 @@
+import numpy as np
+
+from telco_common.churn_models import sample_configs
+from telco_common.hyperparameter_search import load_matrices, dump_matrices, next_promotion, successive_halving
+
+
+def results(scores, start=0):
+    return [{"trial_id": start + i, "val_accuracy": score, "params": {}} for i, score in enumerate(scores)]
+
+
+def test_top_fraction_of_a_rung_is_promoted_best_first():
+    done = [results([0.70, 0.90, 0.60, 0.80, 0.75, 0.65]), [], []]
+    promoted = [set(), set(), set()]
+
+    rung, result = next_promotion(done, promoted, eta=3)
+    assert (rung, result["trial_id"]) == (0, 1)
+    promoted[0].add(1)
+    assert next_promotion(done, promoted, eta=3)[1]["trial_id"] == 3
+    promoted[0].add(3)
+    # Only 6 // 3 = 2 trials of the rung qualify so far
+    assert next_promotion(done, promoted, eta=3) is None
+
+
+def test_no_promotion_before_eta_results():
+    done = [results([0.9, 0.8]), []]
+    assert next_promotion(done, [set(), set()], eta=3) is None
+
+
+def test_promotions_favour_the_highest_rung():
+    done = [results([0.5, 0.6, 0.7]), results([0.8, 0.7, 0.9], start=10), []]
+    rung, result = next_promotion(done, [set(), set(), set()], eta=3)
+    assert (rung, result["trial_id"]) == (1, 12)
+
+
+def test_force_sends_the_best_of_an_incomplete_rung_on():
+    done = [results([0.5, 0.6, 0.7]), results([0.8], start=10), []]
+    promoted = [{2}, set(), set()]
+    assert next_promotion(done, promoted, eta=3) is None
+    rung, result = next_promotion(done, promoted, eta=3, force=True)
+    assert (rung, result["trial_id"]) == (1, 10)
+    promoted[1].add(10)
+    assert next_promotion(done, promoted, eta=3, force=True) is None
+
+
+def test_matrices_round_trip(tmp_path):
+    import scipy.sparse as sp
+    dense, sparse = np.arange(12.0).reshape(4, 3), sp.random(5, 4, density=0.5, format="csr", random_state=0)
+    dump_matrices(str(tmp_path), dense=dense, sparse=sparse)
+    loaded = load_matrices(str(tmp_path))
+    np.testing.assert_array_equal(loaded["dense"], dense)
+    assert (loaded["sparse"] != sparse).nnz == 0
+
+
+def test_successive_halving_reaches_the_full_budget(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(900, 5))
+    y = (X[:, 0] + 0.5 * rng.normal(size=900) > 0).astype(int)
+    configs = sample_configs("svc", 9)
+    finished = []
+
+    best = successive_halving("svc", configs, X[:600], y[:600], X[600:], y[600:], str(tmp_path / "trials"),
+                              min_rows=100, eta=3, max_workers=1, on_result=finished.append)
+
+    by_rung = {}
+    for result in finished:
+        by_rung.setdefault(result["rung"], []).append(result)
+    assert [len(by_rung[rung]) for rung in sorted(by_rung)] == [9, 3, 1]
+    assert [by_rung[rung][0]["n_rows"] for rung in sorted(by_rung)] == [100, 300, 600]
+    # With one worker every decision follows the previous result: a promoted trial ranked in the
+    # top 1/eta of its rung's results finished at that point (at least the best, when forced)
+    done = {}
+    for previous, result in zip(finished, finished[1:]):
+        done.setdefault(previous["rung"], []).append(previous)
+        if result["rung"]:
+            ranked = sorted(done[result["rung"] - 1], key=lambda r: r["val_accuracy"], reverse=True)
+            assert result["trial_id"] in {r["trial_id"] for r in ranked[:max(1, len(ranked) // 3)]}
+    assert best == by_rung[2][0] and best["n_rows"] == 600
+    assert not (tmp_path / "trials").exists()
@@ -0,0 +1,87 @@
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import feature_store
+import feature_store_api
+from feature_store_api import MicroBatcher
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def rows_for(ids):
+    return [(cid, float(cid[1:])) for cid in ids if cid != "missing"]
+
+
+def test_concurrent_lookups_are_coalesced():
+    calls = []
+
+    def fetch(ids):
+        calls.append(sorted(ids))
+        return rows_for(ids)
+
+    async def lookups():
+        batcher = MicroBatcher(fetch, max_batch=100, max_wait_ms=5)
+        ids = [f"C{i % 30}" for i in range(90)] + ["missing"]
+        rows = await asyncio.gather(*(batcher.get(cid) for cid in ids))
+        return batcher, ids, rows
+
+    batcher, ids, rows = run(lookups())
+    # One query for the 31 distinct IDs of 91 requests
+    assert calls == [sorted(set(ids))]
+    assert rows[:-1] == [(cid, float(cid[1:])) for cid in ids[:-1]]
+    assert rows[-1] is None
+    assert batcher.stats() == {"requests": 91, "batches": 1, "avg_batch_size": 91.0}
+    assert not batcher._tasks
+
+
+def test_full_batch_flushes_without_waiting():
+    calls = []
+
+    def fetch(ids):
+        calls.append(len(ids))
+        return rows_for(ids)
+
+    async def lookups():
+        # With a 10 s timer, only full batches can answer within the 1 s timeout
+        batcher = MicroBatcher(fetch, max_batch=10, max_wait_ms=10_000)
+        return await asyncio.wait_for(asyncio.gather(*(batcher.get(f"C{i}") for i in range(20))), timeout=1)
+
+    rows = run(lookups())
+    assert calls == [10, 10]
+    assert [row[0] for row in rows] == [f"C{i}" for i in range(20)]
+
+
+def test_fetch_errors_reach_every_waiter():
+    def fetch(ids):
+        raise sqlite3.OperationalError("database is locked")
+
+    async def lookups():
+        batcher = MicroBatcher(fetch, max_wait_ms=1)
+        return await asyncio.gather(*(batcher.get(cid) for cid in ("C1", "C1", "C2")), return_exceptions=True)
+
+    results = run(lookups())
+    assert len(results) == 3 and all(isinstance(r, sqlite3.OperationalError) for r in results)
+
+
+def test_api_serves_batched_lookups(tmp_path, monkeypatch):
+    features = [f[0] for f in feature_store.FEATURE_DEFINITIONS]
+    conn = sqlite3.connect(feature_store.DB_FILE)
+    conn.execute("DROP TABLE IF EXISTS processed_data")
+    conn.execute(f"CREATE TABLE processed_data (customerID TEXT PRIMARY KEY, {', '.join(f + ' REAL' for f in features)})")
+    conn.execute(f"INSERT INTO processed_data VALUES ('C1'{', 1.5' * len(features)})")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(feature_store_api, "FEATURE_DOC_FILE", str(tmp_path / "feature_store.md"))
+    monkeypatch.setattr(feature_store_api, "FEATURE_BACKEND", "sql")
+
+    with TestClient(feature_store_api.app) as client:
+        assert client.get("/features/C1").json() == {"customerID": "C1", **dict.fromkeys(features, 1.5)}
+        assert client.get("/features/C2").status_code == 404
+        assert [r["customerID"] for r in client.post("/features", json=["C1", "C2"]).json()] == ["C1"]
+        assert client.get("/stats").json()["batching"]["requests"] == 2
+    assert (tmp_path / "feature_store.md").exists()
@@ -0,0 +1,72 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_store import get_training_dataset
+from telco_common.feature_engine import FEATURE_HISTORY_TABLE, record_feature_history
+
+FEATURES = ["LifetimeValue", "ExtraCharges"]
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    db_file = str(tmp_path / "db.sqlite")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE processed_data (customerID TEXT PRIMARY KEY, LifetimeValue REAL, ExtraCharges REAL)")
+    conn.executemany("INSERT INTO processed_data VALUES (?, ?, ?)", [("A", 1.0, 10.0), ("B", 2.0, 20.0)])
+    assert record_feature_history(conn, "processed_data", "2024-01-01 00:00:00", FEATURES) == 2
+    conn.execute("UPDATE processed_data SET LifetimeValue = 5.0 WHERE customerID = 'A'")
+    conn.execute("INSERT INTO processed_data VALUES ('C', 3.0, 30.0)")
+    # Only the changed and the new customer get a version
+    assert record_feature_history(conn, "processed_data", "2024-02-01 00:00:00", FEATURES) == 2
+    assert record_feature_history(conn, "processed_data", "2024-03-01 00:00:00", FEATURES) == 0
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def reference(db_file, customer_id, event_time):
+    # The per-row lookup the as-of join replaces
+    conn = sqlite3.connect(db_file)
+    row = conn.execute(
+        f"SELECT {', '.join(FEATURES)} FROM {FEATURE_HISTORY_TABLE} WHERE customerID = ? AND valid_from <= ? "
+        f"ORDER BY valid_from DESC LIMIT 1", (customer_id, event_time),
+    ).fetchone()
+    conn.close()
+    return list(row) if row else [np.nan] * len(FEATURES)
+
+
+def test_features_valid_at_each_event_time(db_file):
+    entities = pd.DataFrame({
+        "customerID": ["A", "A", "A", "B", "C", "C", "D"],
+        "event_timestamp": ["2023-12-31", "2024-01-15", "2024-02-01", "2024-06-01",
+                            "2024-01-15", "2024-02-02", "2024-06-01"],
+        "label": [0, 1, 0, 1, 1, 0, 1],
+    })
+    result = get_training_dataset(entities, features=FEATURES, db_file=db_file)
+
+    assert list(result.columns) == ["customerID", "event_timestamp", "label"] + FEATURES + ["feature_valid_from"]
+    assert result["label"].tolist() == entities["label"].tolist()
+    for i, row in entities.iterrows():
+        expected = reference(db_file, row["customerID"], str(pd.Timestamp(row["event_timestamp"])))
+        np.testing.assert_array_equal(result.loc[i, FEATURES].to_numpy(dtype=float), expected)
+    assert result["LifetimeValue"].tolist()[:3] == pytest.approx([np.nan, 1.0, 5.0], nan_ok=True)
+    assert pd.isna(result.loc[6, "feature_valid_from"])
+
+
+def test_as_of_applies_to_every_row(db_file):
+    entities = pd.DataFrame({"customerID": ["A", "B", "C"]})
+    result = get_training_dataset(entities, features=["LifetimeValue"], as_of="2024-01-20", db_file=db_file)
+    assert result["LifetimeValue"].tolist() == pytest.approx([1.0, 2.0, np.nan], nan_ok=True)
+
+
+def test_invalid_requests(db_file):
+    entities = pd.DataFrame({"customerID": ["A"], "event_timestamp": ["2024-01-01"]})
+    with pytest.raises(ValueError, match="Unknown features"):
+        get_training_dataset(entities, features=["NotAFeature"], db_file=db_file)
+    with pytest.raises(ValueError, match="no event_time column"):
+        get_training_dataset(entities, timestamp_column="event_time", db_file=db_file)
+    with pytest.raises(ValueError, match="must not be missing"):
+        get_training_dataset(entities.assign(event_timestamp=[None]), db_file=db_file)
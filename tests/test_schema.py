@@ -0,0 +1,114 @@
+import logging
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from telco_common import schema
+from telco_common.schema import (
+    SCHEMA_FILE, apply_dtypes, compact_dtypes, concat_compact, csv_dtypes, parse_schema, read_sql_compact,
+)
+
+SAMPLE = """
+DROP TABLE IF EXISTS t;
+
+CREATE TABLE t (
+    id TEXT PRIMARY KEY,
+    flag INTEGER,  -- range: 0..1
+    small INTEGER CHECK (small BETWEEN -5 AND 300),
+    level INTEGER CHECK (level IN (1, 2, 3)),
+    big INTEGER,  -- range: 0..100000
+    plain INTEGER,  -- a comment, not a range
+    amount REAL,
+    label TEXT,
+    -- (a commented-out column, with parentheses)
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS other (flag INTEGER  -- range: -200..200
+);
+"""
+
+
+def test_parse_schema_reads_range_comments_and_checks():
+    tables = parse_schema(SAMPLE)
+    assert list(tables) == ["t", "other"]
+    t = tables["t"]
+    assert list(t) == ["id", "flag", "small", "level", "big", "plain", "amount", "label"]
+    ranges = {name: (spec.low, spec.high) for name, spec in t.items()}
+    assert ranges["flag"] == (0, 1) and ranges["small"] == (-5, 300) and ranges["level"] == (1, 3)
+    assert ranges["big"] == (0, 100_000) and ranges["plain"] == (None, None)
+    assert t["id"].primary_key and not t["label"].primary_key
+    # Ranges are per table
+    assert (tables["other"]["flag"].low, tables["other"]["flag"].high) == (-200, 200)
+
+
+def test_dtypes_derived_from_declarations():
+    dtypes = {name: spec.dtype for name, spec in parse_schema(SAMPLE)["t"].items()}
+    assert dtypes["id"] == np.dtype(object)
+    assert dtypes["flag"] == np.int8 and dtypes["small"] == np.int16 and dtypes["level"] == np.int8
+    assert dtypes["big"] == np.int32 and dtypes["plain"] == np.int64
+    assert dtypes["amount"] == np.float64
+    assert isinstance(dtypes["label"], pd.CategoricalDtype)
+    assert parse_schema(SAMPLE)["other"]["flag"].dtype == np.int16
+
+
+def test_processed_data_schema():
+    dtypes = compact_dtypes()
+    assert dtypes["SeniorCitizen"] == np.int8 and dtypes["tenure"] == np.int16
+    assert dtypes["customerID"] == np.dtype(object) and dtypes["TotalCharges"] == np.float64
+    assert isinstance(dtypes["Contract"], pd.CategoricalDtype)
+    assert csv_dtypes()["customerID"] is str and csv_dtypes()["gender"] == "category"
+    assert "tenure" not in csv_dtypes()
+
+
+def test_declared_ranges_do_not_constrain_the_table():
+    conn = sqlite3.connect(":memory:")
+    with open(SCHEMA_FILE) as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO processed_data (customerID, SeniorCitizen, tenure) VALUES ('x', 2, 5000)")
+    assert conn.execute("SELECT SeniorCitizen, tenure FROM processed_data").fetchone() == (2, 5000)
+
+
+def test_apply_dtypes_casts_and_keeps_values():
+    df = pd.DataFrame({
+        "customerID": ["a", "b", "c"],
+        "SeniorCitizen": [0, 1, 0],
+        "tenure": [1.0, np.nan, 72.0],
+        "TotalCharges": ["10.5", "20", "30.25"],
+        "gender": ["Male", "Female", "Male"],
+        "extra": [1, 2, 3],
+    })
+    out = apply_dtypes(df.copy())
+    assert out["SeniorCitizen"].dtype == np.int8
+    assert out["tenure"].dtype == "Int16" and out["tenure"].isna().sum() == 1
+    assert out["TotalCharges"].tolist() == [10.5, 20.0, 30.25]
+    assert isinstance(out["gender"].dtype, pd.CategoricalDtype) and out["gender"].tolist() == df["gender"].tolist()
+    assert out["customerID"].dtype == object and out["extra"].dtype == np.int64
+
+
+def test_out_of_range_values_keep_int64(caplog):
+    df = pd.DataFrame({"tenure": [1, 5000]})
+    with caplog.at_level(logging.WARNING, logger=schema.logger.name):
+        out = apply_dtypes(df)
+    assert out["tenure"].dtype == np.int64 and out["tenure"].tolist() == [1, 5000]
+    assert "outside its declared range" in caplog.text
+
+
+def test_concat_compact_unions_categories():
+    chunks = [apply_dtypes(pd.DataFrame({"gender": values, "tenure": [1] * len(values)}))
+              for values in (["Male"], ["Female", "Female"], [])]
+    df = concat_compact(chunks)
+    assert isinstance(df["gender"].dtype, pd.CategoricalDtype)
+    assert df["gender"].tolist() == ["Male", "Female", "Female"]
+    assert df["tenure"].dtype == np.int16 and df.index.tolist() == [0, 1, 2]
+
+
+def test_read_sql_compact_reads_in_chunks():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE processed_data (customerID TEXT, gender TEXT, tenure INTEGER)")
+    conn.executemany("INSERT INTO processed_data VALUES (?, ?, ?)",
+                     [(f"C{i}", "Male" if i % 3 else "Female", i) for i in range(25)])
+    df = read_sql_compact(conn, "SELECT * FROM processed_data ORDER BY tenure", chunksize=10)
+    assert len(df) == 25 and df["tenure"].tolist() == list(range(25))
+    assert isinstance(df["gender"].dtype, pd.CategoricalDtype) and df["tenure"].dtype == np.int16
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from telco_common.pipeline import PIPELINE_DIR
+from telco_common.sql_pushdown import numpy_round_sql
+from telco_common.synthetic_data import generate_dataset
+
+RUN_STAGES = """
+import sys
+sys.path.insert(0, {pipeline_dir!r})
+from telco_common.pipeline import run_pipeline
+run_pipeline(sys.argv[1:])
+"""
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    data_dir = str(tmp_path_factory.mktemp("sources"))
+    generate_dataset(data_dir, 3_000)
+    return data_dir
+
+
+def build_processed_data(dataset, base_dir, mode, stages, csv_file=None) -> pd.DataFrame:
+    """
+    Run stages in a fresh interpreter (the stage modules read their configuration at import)
+    and return processed_data sorted by customerID.
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    config = os.path.join(dataset, "ingestion_sources.json")
+    if csv_file is not None:
+        with open(config) as f:
+            text = f.read().replace(os.path.join(dataset, "csv_data.csv"), csv_file)
+        config = os.path.join(base_dir, "ingestion_sources.json")
+        with open(config, "w") as f:
+            f.write(text)
+    env = {**os.environ, "TELCO_BASE_DIR": base_dir, "TELCO_INGESTION_CONFIG": config,
+           "TELCO_EXECUTION_MODE": mode, "TELCO_STAGE_CACHE": "off"}
+    subprocess.run([sys.executable, "-c", RUN_STAGES.format(pipeline_dir=PIPELINE_DIR), *stages],
+                   env=env, cwd=base_dir, check=True, capture_output=True)
+    conn = sqlite3.connect(os.path.join(base_dir, "customer_db_test.sqlite"))
+    try:
+        return pd.read_sql_query("SELECT * FROM processed_data ORDER BY customerID", conn)
+    finally:
+        conn.close()
+
+
+def test_pushdown_matches_pandas_path(dataset, tmp_path):
+    pandas_path = build_processed_data(dataset, str(tmp_path / "pandas"), "pandas",
+                                       ["data_ingestion", "data_preparation", "data_storage"])
+    pushdown = build_processed_data(dataset, str(tmp_path / "pushdown"), "sql_pushdown", ["data_storage"])
+
+    assert len(pushdown) > 0
+    pd.testing.assert_frame_equal(pushdown[pandas_path.columns], pandas_path, check_exact=True)
+
+
+def test_pushdown_upsert_deletes_dropped_customers(dataset, tmp_path):
+    base_dir = str(tmp_path / "pushdown")
+    full = build_processed_data(dataset, base_dir, "sql_pushdown", ["data_storage"])
+
+    csv = pd.read_csv(os.path.join(dataset, "csv_data.csv"), dtype=str, keep_default_na=False)
+    dropped = set(csv["customerID"].iloc[:25])
+    cut_file = str(tmp_path / "csv_cut.csv")
+    csv.iloc[25:].to_csv(cut_file, index=False)
+    cut = build_processed_data(dataset, base_dir, "sql_pushdown", ["data_storage"], csv_file=cut_file)
+
+    assert set(cut["customerID"]) == set(full["customerID"]) - dropped
+    pd.testing.assert_frame_equal(cut, full[~full["customerID"].isin(dropped)].reset_index(drop=True))
+
+
+@pytest.mark.parametrize("decimals", [0, 2])
+def test_rounding_matches_numpy(decimals):
+    values = np.array([0.125, 2.675, -1.005, 1e6 + 0.5, -0.5, 1.5, 2.5, 0.0, 123.456])
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE v (x REAL)")
+    conn.executemany("INSERT INTO v VALUES (?)", [(float(v),) for v in values])
+    rounded = [row[0] for row in conn.execute(f"SELECT {numpy_round_sql('x', decimals)} FROM v ORDER BY rowid")]
+    np.testing.assert_array_equal(rounded, np.round(values, decimals))
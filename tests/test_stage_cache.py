@@ -0,0 +1,108 @@
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from telco_common import stage_cache
+from telco_common.feature_engine import bump_generation, ensure_feature_metadata, load_version
+from telco_common.stage_cache import StageCache, fingerprint, frame_digest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(stage_cache, "CACHE_DIR", str(tmp_path / "_stage_cache"))
+    monkeypatch.setattr(stage_cache, "FILE_HASH_MEMO", str(tmp_path / "_stage_cache" / "_file_hashes.json"))
+    monkeypatch.setattr(stage_cache, "CACHE_ENABLED", True)
+    return tmp_path
+
+
+def test_fingerprint_follows_content_code_and_params(tmp_path):
+    data, code = tmp_path / "data.csv", tmp_path / "stage.py"
+    data.write_text("a,b\n1,2\n")
+    code.write_text("x = 1\n")
+    fp = fingerprint(inputs=[str(data)], code=[str(code)], params={"mode": "bulk"})
+
+    assert fingerprint(inputs=[str(data)], code=[str(code)], params={"mode": "bulk"}) == fp
+    assert fingerprint(inputs=[str(data)], code=[str(code)], params={"mode": "script"}) != fp
+    assert fingerprint(inputs=[str(data)], code=[str(code)], params={"mode": "bulk"}, extra=["v2"]) != fp
+
+    code.write_text("x = 2\n")
+    assert fingerprint(inputs=[str(data)], code=[str(code)], params={"mode": "bulk"}) != fp
+
+
+def test_fingerprint_sees_rewritten_input_with_same_size(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("1,2\n")
+    fp = fingerprint(inputs=[str(data)])
+    data.write_text("3,4\n")
+    os.utime(data, ns=(os.stat(data).st_atime_ns, os.stat(data).st_mtime_ns + 1_000_000))
+    assert fingerprint(inputs=[str(data)]) != fp
+
+
+def test_fingerprint_walks_directories_and_missing_inputs(tmp_path):
+    zone = tmp_path / "zone"
+    zone.mkdir()
+    (zone / "part-0.parquet").write_bytes(b"a")
+    fp = fingerprint(inputs=[str(zone)])
+    (zone / "part-1.parquet").write_bytes(b"b")
+    assert fingerprint(inputs=[str(zone)]) != fp
+    # Temp files of an interrupted write do not change the data
+    fp = fingerprint(inputs=[str(zone)])
+    (zone / "part-2.parquet.tmp").write_bytes(b"c")
+    assert fingerprint(inputs=[str(zone)]) == fp
+    assert fingerprint(inputs=[str(tmp_path / "missing.csv")]) != fingerprint(inputs=[str(zone)])
+
+
+def test_manifest_hit_and_miss(tmp_path):
+    output = tmp_path / "out.csv"
+    output.write_text("x")
+    cache = StageCache("unit stage")
+
+    assert not cache.hit("fp-1")
+    cache.store("fp-1", outputs=[str(output)], metadata={"rows": 1})
+    assert cache.hit("fp-1")
+    assert not cache.hit("fp-2")
+    assert cache.metadata() == {"rows": 1}
+    assert cache.outputs() == [str(output)]
+
+    output.unlink()
+    assert not cache.hit("fp-1")
+
+
+def test_cache_off_always_misses(tmp_path, monkeypatch):
+    cache = StageCache("unit")
+    cache.store("fp")
+    monkeypatch.setattr(stage_cache, "CACHE_ENABLED", False)
+    assert not cache.hit("fp")
+
+
+def test_frame_digest_follows_values_and_dtypes():
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    assert frame_digest(df) == frame_digest(df.copy())
+    assert frame_digest(df) != frame_digest(df.assign(a=[1, 3]))
+    assert frame_digest(df) != frame_digest(df.astype({"a": "float64"}))
+
+
+def test_load_version_follows_rows_and_generation(tmp_path):
+    db_file = str(tmp_path / "db.sqlite")
+    assert load_version(db_file) is None
+
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE processed_data (customerID TEXT PRIMARY KEY)")
+    ensure_feature_metadata(conn)
+    conn.execute("INSERT INTO feature_metadata (feature_name, source) VALUES ('f', 'processed_data')")
+    conn.execute("INSERT INTO processed_data VALUES ('a')")
+    conn.commit()
+    version = load_version(db_file)
+    assert load_version(db_file) == version
+
+    bump_generation(conn)
+    conn.commit()
+    assert load_version(db_file) != version
+    version = load_version(db_file)
+
+    conn.execute("INSERT INTO processed_data VALUES ('b')")
+    conn.commit()
+    conn.close()
+    assert load_version(db_file) != version
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from telco_common.streaming_stats import ColumnStats, FrameStats, HyperLogLog, QuantileSketch, TopKCounter
+
+
+def rank_error(values: np.ndarray, estimate: float, q: float) -> float:
+    return abs(np.searchsorted(np.sort(values), estimate) / len(values) - q)
+
+
+def test_quantile_sketch_merge_matches_exact_ranks():
+    values = np.random.default_rng(1).normal(size=200_000)
+    left, right = QuantileSketch(k=512), QuantileSketch(k=512, seed=1)
+    left.update(values[:120_000])
+    right.update(values[120_000:])
+    left.merge(right)
+
+    qs = [0.01, 0.25, 0.5, 0.75, 0.99]
+    for q, estimate in zip(qs, left.quantiles(qs)):
+        assert rank_error(values, estimate, q) < 0.01
+    # Memory stays O(k log n), not O(n)
+    assert sum(len(level) for level in left.levels) < 20 * 512
+
+
+def test_quantile_sketch_empty():
+    assert all(np.isnan(v) for v in QuantileSketch().quantiles([0.5]))
+
+
+def test_hyperloglog_merge_counts_union():
+    left, right = HyperLogLog(), HyperLogLog()
+    left.update_hashes(pd.util.hash_array(np.arange(0, 60_000)))
+    right.update_hashes(pd.util.hash_array(np.arange(40_000, 100_000)))
+    left.merge(right)
+    assert abs(left.count() - 100_000) / 100_000 < 0.03
+
+
+def test_hyperloglog_small_cardinality_is_exact_enough():
+    hll = HyperLogLog()
+    hll.update_hashes(pd.util.hash_array(np.array(["a", "b", "c", "a"], dtype=object)))
+    assert hll.count() == 3
+
+
+def test_topk_merge_is_exact_under_capacity():
+    left, right = TopKCounter(), TopKCounter()
+    left.update_counts({"Yes": 3, "No": 5})
+    right.update_counts({"Yes": 4})
+    left.merge(right)
+    assert left.counts == {"Yes": 7, "No": 5}
+    assert left.top() == ("Yes", 7)
+
+
+def test_topk_keeps_most_frequent_past_capacity():
+    counter = TopKCounter(capacity=2)
+    counter.update_counts({"a": 10, "b": 1, "c": 5})
+    assert counter.counts == {"a": 10, "c": 5}
+
+
+def test_column_stats_merge_matches_describe():
+    series = pd.Series(np.random.default_rng(2).integers(0, 72, size=10_000)).astype(float)
+    series[::50] = np.nan
+    parts = [ColumnStats(), ColumnStats()]
+    parts[0].update(series[:3_000])
+    parts[1].update(series[3_000:])
+    parts[0].merge(parts[1])
+
+    stats, expected = parts[0].describe(), series.describe()
+    assert stats["count"] == expected["count"]
+    assert np.isclose(stats["mean"], expected["mean"])
+    assert np.isclose(stats["std"], expected["std"])
+    assert (stats["min"], stats["max"]) == (expected["min"], expected["max"])
+    assert abs(stats["50%"] - expected["50%"]) <= 1
+    assert parts[0].nulls == series.isna().sum()
+
+
+def test_column_stats_drops_numeric_stats_when_a_chunk_is_text():
+    stats = ColumnStats()
+    stats.update(pd.Series([1.0, 2.0, 3.0]))
+    stats.update(pd.Series(["x", "x", " "]))
+    report = stats.describe()
+    assert not stats.numeric
+    assert np.isnan(report["mean"]) and np.isnan(report["min"])
+    assert (report["top"], report["freq"]) == ("x", 2)
+
+
+def test_column_stats_merge_with_text_part_drops_numeric_stats():
+    numeric, text = ColumnStats(), ColumnStats()
+    numeric.update(pd.Series([1.0, 2.0]))
+    text.update(pd.Series(["a"]))
+    numeric.merge(text)
+    assert not numeric.numeric
+    assert np.isnan(numeric.describe()["mean"])
+    assert numeric.describe()["count"] == 3
+
+
+def test_frame_stats_counts_duplicates_exactly():
+    df = pd.DataFrame({"id": [1, 2, 2, 3, 3, 3], "v": ["a", "b", "b", "c", "c", "c"]})
+    stats = FrameStats()
+    stats.update(df.iloc[:3])
+    stats.update(df.iloc[3:])
+    report = stats.report()
+    assert report["duplicates_count"] == df.duplicated().sum() == 3
+    assert report["missing_values"] == {"id": 0, "v": 0}
+
+
+def test_frame_stats_estimates_duplicates_past_the_exact_limit(monkeypatch):
+    monkeypatch.setattr(FrameStats, "EXACT_DUPLICATE_ROWS", 1_000)
+    ids = np.arange(20_000) % 15_000
+    stats = FrameStats()
+    for start in range(0, len(ids), 4_000):
+        stats.update(pd.DataFrame({"id": ids[start:start + 4_000]}))
+    assert stats.row_hashes is None
+    assert abs(stats.duplicates_count - 5_000) < 0.1 * 5_000